@@ -1,15 +1,80 @@
 #!/usr/bin/env python3
 
+import argparse
+import os
 import sys
 from typing import Final
 
-from .nbttag import NBTTagType, NBTTag
+from .batch import OPERATIONS, processfiles
+from .nbtcompression import Compression, readcompressedfromstream
+from .nbtpath import NBTPath
+from .nbttag import NBTTag
 from .nbttagio import writesnbttostream
 
-def print_help() -> None :
-    print(f"Usage: {sys.argv[0]} read [<filename>]")
+def print_progress(done: int, total: int) -> None :
+    print(f"\r{done}/{total}", end="\n" if done == total else "",
+          file=sys.stderr, flush=True)
 
-ARGC: Final[int] = len(sys.argv)
+def read(args: argparse.Namespace) -> None :
+    if args.filename is None :
+        TAG: NBTTag = readcompressedfromstream(sys.stdin.buffer)
+    else :
+        with open(args.filename, "rb") as f :
+            TAG = readcompressedfromstream(f)
+    writesnbttostream(TAG, sys.stdout.buffer, indent=args.indent)
+    sys.stdout.buffer.write(b"\n")
 
-if ARGC == 1 :
-    print_help()
\ No newline at end of file
+def batch(args: argparse.Namespace) -> None :
+    for i in processfiles(args.files, args.operation,
+                          NBTPath.parse(args.path),
+                          compression=Compression[args.compression.upper()],
+                          workers=args.workers, chunksize=args.chunksize,
+                          ordered=not args.unordered,
+                          progress=print_progress if args.progress else None) :
+        if args.operation == "reencode" and args.output is not None and \
+           i.success :
+            NAME: str = os.path.basename(i.source)
+            if i.chunk is not None :
+                NAME += f".{i.chunk[0]}.{i.chunk[1]}.nbt"
+            with open(os.path.join(args.output, NAME), "wb") as f :
+                f.write(i.data)
+        print(i)
+
+PARSER: Final[argparse.ArgumentParser] = \
+argparse.ArgumentParser(prog="nbtutils")
+SUBPARSERS: Final[argparse._SubParsersAction] = \
+PARSER.add_subparsers(dest="command")
+READ_PARSER: Final[argparse.ArgumentParser] = \
+SUBPARSERS.add_parser("read", help="print an NBT file as SNBT")
+READ_PARSER.add_argument("filename", nargs="?")
+READ_PARSER.add_argument("-i", "--indent", type=int,
+                         help="pretty-print with this many spaces per level")
+BATCH_PARSER: Final[argparse.ArgumentParser] = \
+SUBPARSERS.add_parser("batch", help="process NBT and region files in "
+                                    "parallel")
+BATCH_PARSER.add_argument("operation", choices=OPERATIONS)
+BATCH_PARSER.add_argument("files", nargs="+")
+BATCH_PARSER.add_argument("-p", "--path", default="{}",
+                          help="path queried by query, like Data.Player")
+BATCH_PARSER.add_argument("-c", "--compression", default="gzip",
+                          choices=[i.name.lower() for i in Compression],
+                          help="compression used by reencode")
+BATCH_PARSER.add_argument("-o", "--output",
+                          help="directory to write reencoded files to")
+BATCH_PARSER.add_argument("-w", "--workers", type=int,
+                          help="number of worker processes")
+BATCH_PARSER.add_argument("--chunksize", type=int, default=1,
+                          help="number of files handed to a worker at once")
+BATCH_PARSER.add_argument("--unordered", action="store_true",
+                          help="print results as soon as they are ready")
+BATCH_PARSER.add_argument("--progress", action="store_true",
+                          help="report progress on stderr")
+
+ARGS: Final[argparse.Namespace] = PARSER.parse_args()
+
+if ARGS.command == "read" :
+    read(ARGS)
+elif ARGS.command == "batch" :
+    batch(ARGS)
+else :
+    PARSER.print_help()
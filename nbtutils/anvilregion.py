@@ -0,0 +1,136 @@
+"""
+This module reads Anvil region (.mca) files.
+
+* CHUNK_COMPRESSION  chunk compression type ids mapped to Compression.
+* AnvilRegion        a memory-mapped region file with lazy chunk access.
+"""
+
+__all__ = ["CHUNK_COMPRESSION", "AnvilRegion"]
+
+import mmap
+import os
+import struct
+from types import TracebackType
+from typing import Dict, Final, Iterator, List, Optional, Tuple, Type, \
+                   Union
+
+from .nbtcompression import Compression, readcompressedfromstream
+from .nbttag import NBTTag
+from .nbttagio import MAX_DEPTH
+
+SECTOR_SIZE: Final[int] = 4096
+
+CHUNK_COMPRESSION: Final[Dict[int, Compression]] = {
+    1: Compression.GZIP, 2: Compression.ZLIB, 3: Compression.NONE
+}
+
+_HEADER: Final[struct.Struct] = struct.Struct(">1024I")
+_CHUNK_HEADER: Final[struct.Struct] = struct.Struct(">iB")
+
+class AnvilRegion :
+    """
+    A region file, mapped into memory when opened.
+
+    Only the 8 KiB header is parsed up front. Chunks are addressed by their
+    coordinates within the region; any chunk coordinates may be passed, as
+    only their lowest 5 bits are used. Each chunk is located, inflated and
+    decoded only when it is read.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]) -> None :
+        self.path: str = os.fspath(path)
+        self._file = open(self.path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        self.offsets: Tuple[int, ...] = (0,) * 1024
+        self.timestamps: Tuple[int, ...] = (0,) * 1024
+        try :
+            if os.fstat(self._file.fileno()).st_size >= 2 * SECTOR_SIZE :
+                self._map = mmap.mmap(self._file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+                self.offsets = _HEADER.unpack_from(self._map, 0)
+                self.timestamps = _HEADER.unpack_from(self._map, SECTOR_SIZE)
+        except BaseException :
+            self.close()
+            raise
+
+    def close(self) -> None :
+        if self._map is not None :
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "AnvilRegion" :
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None :
+        self.close()
+
+    def __repr__(self) -> str :
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def __len__(self) -> int :
+        return sum(1 for i in self.offsets if i)
+
+    def __contains__(self, xz: Tuple[int, int]) -> bool :
+        return bool(self.offsets[(xz[0] & 31) + (xz[1] & 31) * 32])
+
+    def __iter__(self) -> Iterator[Tuple[int, int]] :
+        return self.iterchunks()
+
+    def iterchunks(self,
+                   modifiedafter: Optional[int]=None) -> Iterator[Tuple[int,
+                                                                        int]] :
+        """
+        Yield the coordinates of the stored chunks, only those saved after
+        the modifiedafter epoch second if it is given.
+        """
+        for i in range(1024) :
+            if self.offsets[i] and (modifiedafter is None or \
+                                    self.timestamps[i] > modifiedafter) :
+                yield i & 31, i >> 5
+
+    def timestamp(self, x: int, z: int) -> int :
+        return self.timestamps[(x & 31) + (z & 31) * 32]
+
+    def readrawchunk(self, x: int, z: int) -> Optional[Tuple[int, bytes]] :
+        """
+        Return the compression type id and the still compressed payload of
+        a chunk, or None if it isn't stored. Payloads of oversized chunks
+        are read from their external .mcc file.
+        """
+        ENTRY: Final[int] = self.offsets[(x & 31) + (z & 31) * 32]
+        if not ENTRY or self._map is None :
+            return None
+        START: Final[int] = (ENTRY >> 8) * SECTOR_SIZE
+        if START + 5 > len(self._map) :
+            raise ValueError(f"chunk {x & 31}, {z & 31} is out of the file")
+        LENGTH, COMPRESSION = _CHUNK_HEADER.unpack_from(self._map, START)
+        if COMPRESSION & 128 :
+            REGION_X, REGION_Z = self._regioncoordinates()
+            with open(os.path.join(os.path.dirname(self.path),
+                                   f"c.{REGION_X * 32 + (x & 31)}."
+                                   f"{REGION_Z * 32 + (z & 31)}.mcc"),
+                      "rb") as f :
+                return COMPRESSION & 127, f.read()
+        if LENGTH < 1 or START + 4 + LENGTH > len(self._map) :
+            raise ValueError(f"chunk {x & 31}, {z & 31} has a bad length")
+        return COMPRESSION, self._map[START+5:START+4+LENGTH]
+
+    def _regioncoordinates(self) -> Tuple[int, int] :
+        PARTS: Final[List[str]] = os.path.basename(self.path).split(".")
+        if len(PARTS) != 4 or PARTS[0] != "r" :
+            raise ValueError(f"can't tell region coordinates of {self.path}")
+        return int(PARTS[1]), int(PARTS[2])
+
+    def readchunk(self, x: int, z: int, *,
+                  maxdepth: int=MAX_DEPTH) -> Optional[NBTTag] :
+        """Decode a chunk, or return None if it isn't stored."""
+        RAW: Final[Optional[Tuple[int, bytes]]] = self.readrawchunk(x, z)
+        if RAW is None :
+            return None
+        if RAW[0] not in CHUNK_COMPRESSION :
+            raise ValueError(f"unsupported chunk compression {RAW[0]}")
+        return readcompressedfromstream(RAW[1], CHUNK_COMPRESSION[RAW[0]],
+                                        maxdepth=maxdepth)
@@ -0,0 +1,151 @@
+"""
+This module spreads NBT jobs over worker processes.
+
+* OPERATIONS    the names of the supported jobs.
+* BatchResult   the compact result of a job on one file or region chunk.
+* processfiles  run a job over many files in a process pool.
+
+A job reads a (possibly compressed) NBT file, or every chunk of an Anvil
+region file when the file name ends with ".mca". Results travel back from
+the workers as binary NBT bytes, which pickle much faster than tag trees,
+and are only decoded again when BatchResult.tag is called.
+"""
+
+__all__ = ["OPERATIONS", "BatchResult", "processfiles"]
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from io import BytesIO
+from typing import Callable, Dict, Final, Iterable, Iterator, List, \
+                   NamedTuple, Optional, Tuple, cast
+
+from .anvilregion import AnvilRegion
+from .datacommand import DataOperationResult, data
+from .nbtcompression import Compression, readcompressedfromstream, \
+                            writecompressedtostream
+from .nbtpath import NBTPath
+from .nbttag import NBTTag, NBTTagType
+from .nbttagio import dumps, loads
+
+OPERATIONS: Final[Tuple[str, ...]] = ("decode", "query", "reencode")
+
+class BatchResult(NamedTuple) :
+    source: str
+    chunk: Optional[Tuple[int, int]]
+    success: bool
+    result: int
+    tagtype: Optional[int]
+    data: bytes
+    error: Optional[str]
+
+    def __str__(self) -> str :
+        SOURCE: Final[str] = self.source if self.chunk is None else \
+                             f"{self.source}[{self.chunk[0]},{self.chunk[1]}]"
+        if self.error is not None :
+            return f"{SOURCE}: error: {self.error}"
+        if not self.success :
+            return f"{SOURCE}: failure"
+        if self.tagtype is None :
+            return f"{SOURCE}: {len(self.data)} bytes"
+        return f"{SOURCE}: {self.result} {self.tag()}"
+
+    def tag(self) -> Optional[NBTTag] :
+        """
+        Decode the resulting tag. Re-encode jobs carry compressed file
+        content instead, for which None is returned.
+        """
+        if not self.success or self.tagtype is None :
+            return None
+        return loads(self.data, NBTTagType(self.tagtype))
+
+def _apply(source: str, chunk: Optional[Tuple[int, int]], tag: NBTTag,
+           operation: str, path: NBTPath,
+           compression: Compression) -> BatchResult :
+    if operation == "decode" :
+        return BatchResult(source, chunk, True, 1,
+                           cast(int, tag.type.value), dumps(tag), None)
+    if operation == "query" :
+        RESULT: Final[DataOperationResult] = data.get(tag, path)
+        if RESULT.tag is None :
+            return BatchResult(source, chunk, False, 0, None, b"", None)
+        return BatchResult(source, chunk, True, RESULT.result,
+                           cast(int, RESULT.tag.type.value),
+                           dumps(RESULT.tag), None)
+    STREAM: Final[BytesIO] = BytesIO()
+    writecompressedtostream(tag, STREAM, compression)
+    return BatchResult(source, chunk, True, 1, None, STREAM.getvalue(), None)
+
+def _error(source: str, chunk: Optional[Tuple[int, int]],
+           error: Exception) -> BatchResult :
+    return BatchResult(source, chunk, False, 0, None, b"",
+                       f"{error.__class__.__name__}: {error}")
+
+def _work(sources: List[str], operation: str, path: NBTPath,
+          compression: Compression) -> List[BatchResult] :
+    RESULTS: Final[List[BatchResult]] = []
+    for i in sources :
+        try :
+            if not i.endswith(".mca") :
+                with open(i, "rb") as f :
+                    RESULTS.append(_apply(i, None,
+                                          readcompressedfromstream(f),
+                                          operation, path, compression))
+                continue
+            with AnvilRegion(i) as region :
+                for j in region :
+                    try :
+                        RESULTS.append(_apply(i, j, cast(NBTTag,
+                                                         region.readchunk(*j)),
+                                              operation, path, compression))
+                    except Exception as e :
+                        RESULTS.append(_error(i, j, e))
+        except Exception as e :
+            RESULTS.append(_error(i, None, e))
+    return RESULTS
+
+def processfiles(sources: Iterable[str], operation: str="decode",
+                 path: NBTPath=NBTPath(), *,
+                 compression: Compression=Compression.GZIP,
+                 workers: Optional[int]=None, chunksize: int=1,
+                 ordered: bool=True,
+                 progress: Optional[Callable[[int, int], None]]=None) \
+-> Iterator[BatchResult] :
+    """
+    Run operation on every source file and yield the results.
+
+    decode yields each root tag, query yields the data.get result of path,
+    and reencode yields the file content written with compression.
+    Sources are handed to workers in lists of chunksize files. Results are
+    yielded in source order if ordered, else as soon as a list is done.
+    progress is called with the number of finished and of all sources.
+    With workers == 0, everything runs in the calling process.
+    """
+    if operation not in OPERATIONS :
+        raise ValueError(f"unknown operation {operation!r}")
+    if chunksize < 1 :
+        raise ValueError("chunksize must be positive")
+    SOURCES: Final[List[str]] = list(sources)
+    BATCHES: Final[List[List[str]]] = [SOURCES[i:i+chunksize] \
+                                       for i in range(0, len(SOURCES),
+                                                      chunksize)]
+    done: int = 0
+    if workers == 0 :
+        for i in BATCHES :
+            RESULTS: List[BatchResult] = _work(i, operation, path,
+                                               compression)
+            done += len(i)
+            if progress is not None :
+                progress(done, len(SOURCES))
+            yield from RESULTS
+        return
+    with ProcessPoolExecutor(workers) as executor :
+        FUTURES: Final[List[Future]] = [executor.submit(_work, i, operation,
+                                                        path, compression) \
+                                        for i in BATCHES]
+        SIZES: Final[Dict[Future, int]] = {v: len(BATCHES[k]) \
+                                           for k, v in enumerate(FUTURES)}
+        for i in (FUTURES if ordered else as_completed(FUTURES)) :
+            RESULTS = i.result()
+            done += SIZES[i]
+            if progress is not None :
+                progress(done, len(SOURCES))
+            yield from RESULTS
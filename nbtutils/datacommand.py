@@ -2,11 +2,13 @@ __all__ = ["DataOperationResult", "data"]
 
 import builtins
 from numbers import Integral, Real
-from typing import Dict, Final, Literal, NamedTuple, Optional, Tuple, Union, cast, overload
+from typing import Any, Dict, Final, Iterable, List, Literal, NamedTuple, \
+                   Optional, Sequence, Tuple, Union, cast, overload
 from .nbttag import NBTByte, NBTByteArray, NBTCompound, NBTDouble, NBTFloat, \
                     NBTInt, NBTIntArray, NBTList, NBTLong, NBTLongArray, \
-                    NBTShort, NBTString, NBTTagType, NBTTag
-from .nbtpath import NBTPath
+                    NBTPersistentCompound, NBTPersistentList, NBTShort, \
+                    NBTString, NBTTagType, NBTTag
+from .nbtpath import _ARRAY_ELEMENT_TYPES, NBTPath, _pathtree
 
 class DataOperationResult(NamedTuple) :
     success: bool
@@ -32,24 +34,24 @@ class DataOperationResult(NamedTuple) :
         if arg1 is None :
             return cls(success=False, result=0, tag=None)
         if isinstance(arg1, NBTTag) :
-            if isinstance(arg1.value, (NBTByte, NBTShort, NBTInt, NBTLong,
+            if isinstance(arg1.view, (NBTByte, NBTShort, NBTInt, NBTLong,
                                        NBTFloat, NBTDouble)) :
-                result: Real = cast(Real, arg2) * arg1.value
+                result: Real = cast(Real, arg2) * arg1.view
                 return cls(success=True,
                            result=\
                             0x7fffffff if cast(Real, 0x7fffffff) < result else\
                             (-0x80000000 if result < -0x80000000 else \
                              int(result)), tag=arg1)
-            elif isinstance(arg1.value, (NBTByteArray, NBTString, NBTList,
+            elif isinstance(arg1.view, (NBTByteArray, NBTString, NBTList,
                                          NBTCompound, NBTIntArray,
                                          NBTLongArray)) :
-                result: Real = cast(Real, arg2) * len(arg1.value)
+                result: Real = cast(Real, arg2) * len(arg1.view)
                 return cls(success=True,
                            result=\
                             0x7fffffff if cast(Real, 0x7fffffff) < result else\
                             (-0x80000000 if result < -0x80000000 else \
                              int(result)), tag=arg1)
-            elif arg1.value is None :
+            elif arg1.view is None :
                 return cls(success=True, result=0, tag=arg1)
             else :
                 assert 0
@@ -70,68 +72,291 @@ class data :
     @classmethod
     def get(cls, tag: NBTTag, path: NBTPath,
             scale: Real=cast(Real, 1)) -> DataOperationResult:
-        if path.isroot() :
-            return DataOperationResult.of(tag, scale)
-        if isinstance(path[0], str) :
-            if tag.type != NBTTagType.TAG_Compound or \
-               path[0] not in cast(NBTCompound, tag.value) :
-                return DataOperationResult.of()
-            return cls.get(cast(NBTCompound, tag.value)[path[0]],
-                           cast(NBTPath, path[1:]), scale)
-        INDEX: Final[int] = cast(int, path[0])
-        if tag.type == NBTTagType.TAG_Byte_Array :
-            if len(path) > 1 :
-                return DataOperationResult.of()
-            try :
-                return DataOperationResult.\
-                       of(NBTTag(cast(NBTByteArray, tag.value)[INDEX]), scale)
-            except IndexError :
-                return DataOperationResult.of()
-        elif tag.type == NBTTagType.TAG_Int_Array :
-            if len(path) > 1 :
-                return DataOperationResult.of()
-            try :
-                return DataOperationResult.\
-                       of(NBTTag(cast(NBTIntArray, tag.value)[INDEX]), scale)
-            except IndexError :
-                return DataOperationResult.of()
-        elif tag.type == NBTTagType.TAG_Long_Array :
-            if len(path) > 1 :
-                return DataOperationResult.of()
-            try :
-                return DataOperationResult.\
-                       of(NBTTag(cast(NBTLongArray, tag.value)[INDEX]), scale)
-            except IndexError :
-                return DataOperationResult.of()
-        elif tag.type == NBTTagType.TAG_List :
-            try :
-                return DataOperationResult.\
-                       of(cls.get(cast(NBTList, tag.value)[INDEX],
-                                  cast(NBTPath, path[1:]), scale).tag, scale)
-            except IndexError :
-                return DataOperationResult.of()
-        else :
-            return DataOperationResult.of()
+        return DataOperationResult.of(path.compile()(tag), scale)
+
+    @overload
+    @classmethod
+    def getmany(cls, tags: Iterable[NBTTag], paths: Sequence[NBTPath],
+                scale: Real=cast(Real, 1), *,
+                results: Literal[False]=False) \
+    -> List[List[Optional[NBTTag]]] :
+        pass
+    @overload
+    @classmethod
+    def getmany(cls, tags: Iterable[NBTTag], paths: Sequence[NBTPath],
+                scale: Real=cast(Real, 1), *,
+                results: Literal[True]) -> List[List[DataOperationResult]] :
+        pass
+    @classmethod
+    def getmany(cls, tags: Iterable[NBTTag], paths: Sequence[NBTPath],
+                scale: Real=cast(Real, 1), *,
+                results: bool=False) \
+    -> Union[List[List[Optional[NBTTag]]], List[List[DataOperationResult]]] :
+        """
+        Run get for every path on every tag, returning one column per path
+        with one entry per tag. Entries are the found tags, or None where
+        nothing is found, unless results asks for DataOperationResults.
+
+        Paths are merged by their common prefixes, which are walked once
+        per tag.
+        """
+        TREE: Final[Dict[Any, Any]] = _pathtree(paths)
+        COLUMNS: Final[List[List[Optional[NBTTag]]]] = [[] for _ in paths]
+        ROW: Final[List[Optional[NBTTag]]] = [None] * len(paths)
+        STACK: Final[List[Tuple[Dict[Any, Any], NBTTag]]] = []
+        for i in tags :
+            STACK.append((TREE, i))
+            while STACK :
+                NODE, CURRENT = STACK.pop()
+                TYPE: NBTTagType = CURRENT.type
+                for k, v in NODE.items() :
+                    if k is None :
+                        for j in v :
+                            ROW[j] = CURRENT
+                    elif isinstance(k, str) :
+                        if TYPE == NBTTagType.TAG_Compound :
+                            NEXT: Optional[NBTTag] = \
+                            cast(NBTCompound, CURRENT.view).get(k)
+                            if NEXT is not None :
+                                STACK.append((v, NEXT))
+                    elif TYPE == NBTTagType.TAG_List :
+                        try :
+                            STACK.append((v, cast(NBTList, CURRENT.view)[k]))
+                        except IndexError :
+                            pass
+                    elif TYPE in _ARRAY_ELEMENT_TYPES and None in v :
+                        try :
+                            ELEMENT: NBTTag = NBTTag(
+                                _ARRAY_ELEMENT_TYPES[TYPE]\
+                                (cast(NBTIntArray, CURRENT.view)[k])
+                            )
+                        except IndexError :
+                            continue
+                        for j in v[None] :
+                            ROW[j] = ELEMENT
+            for j, COLUMN in enumerate(COLUMNS) :
+                COLUMN.append(ROW[j])
+                ROW[j] = None
+        if results :
+            return [[DataOperationResult.of(j, scale) for j in i] \
+                    for i in COLUMNS]
+        return COLUMNS
 
     @classmethod
     def merge(cls, tag: NBTTag, another: NBTTag) -> DataOperationResult :
         if tag.type != NBTTagType.TAG_Compound or \
            another.type != NBTTagType.TAG_Compound :
             return DataOperationResult.of()
-        NEW: Final[NBTCompound] = NBTCompound(cast(NBTCompound, tag.value))
-        NEW.update(cast(NBTCompound, another.value))
+        NEW: Final[NBTCompound] = NBTCompound(cast(NBTCompound, tag.view))
+        NEW.update(cast(NBTCompound, another.view))
         return DataOperationResult.of(cast(Integral, 1), NBTTag(NEW))
 
-    '''@overload
+    @overload
     @classmethod
-    def modify(cls, tag: NBTTag,
-               oper: Literal["append", "merge", "remove", "set"],
-               value: NBTTag) -> DataOperationResult :
+    def modify(cls, tag: NBTTag, path: NBTPath,
+               oper: Literal["append", "merge", "set"], value: NBTTag, *,
+               inplace: bool=True) -> DataOperationResult :
         pass
     @overload
     @classmethod
-    def modify(cls, tag: NBTTag, oper: Literal["insert"], index: int,
-               value: NBTTag) -> DataOperationResult :
+    def modify(cls, tag: NBTTag, path: NBTPath, oper: Literal["insert"],
+               index: int, value: NBTTag, *,
+               inplace: bool=True) -> DataOperationResult :
+        pass
+    @overload
+    @classmethod
+    def modify(cls, tag: NBTTag, path: NBTPath, oper: Literal["remove"], *,
+               inplace: bool=True) -> DataOperationResult :
         pass
     @classmethod
-    def modify(cls, tag: NBTTag, oper: Literal["append", "insert", "merge", "remove", "set"], index: Union[int, NBTTag], value: Optional[NBTTag]) :'''
\ No newline at end of file
+    def modify(cls, tag: NBTTag, path: NBTPath,
+               oper: Literal["append", "insert", "merge", "remove", "set"],
+               index: Union[int, NBTTag, None]=None,
+               value: Optional[NBTTag]=None, *,
+               inplace: bool=True) -> DataOperationResult :
+        """
+        Apply oper to what path leads to in tag, like /data modify and
+        /data remove: append to or insert into a list or array, deep-merge
+        into a compound, set or remove the tag at path. set creates missing
+        compounds along path.
+
+        If inplace, the containers of tag are changed. Otherwise tag is
+        left untouched: only the containers along path are copied, and
+        the new root shares every other subtree with tag. Either way, the
+        result carries the resulting root, or fails if nothing changed.
+
+        Persistent lists and compounds can't be changed: ValueError is
+        raised if oper would change one, before anything is changed.
+        """
+        if oper not in ("append", "insert", "merge", "remove", "set") :
+            raise ValueError(f"unknown operation {oper!r}")
+        if oper != "insert" :
+            index, value = None, cast(Optional[NBTTag], index)
+        if oper != "remove" and not isinstance(value, NBTTag) :
+            raise ValueError("value is not an NBTTag")
+        if oper in ("remove", "set") :
+            if path.isroot() :
+                return DataOperationResult.of() if oper == "remove" else \
+                       DataOperationResult.of(cast(Integral, 1),
+                                              cast(NBTTag, value))
+            KEYS: NBTPath = cast(NBTPath, path[:-1])
+        else :
+            KEYS = path
+        # The whole path is resolved before anything is changed, so a path
+        # that leads nowhere leaves tag as it was. set only creates the
+        # missing compounds when every key from there on is a name.
+        TAGS: List[NBTTag] = [tag]
+        missing: int = len(KEYS)
+        for i, KEY in enumerate(KEYS) :
+            current: NBTTag = TAGS[-1]
+            child: Optional[NBTTag] = None
+            if isinstance(KEY, str) :
+                if current.type != NBTTagType.TAG_Compound :
+                    return DataOperationResult.of()
+                child = cast(NBTCompound, current.view).get(KEY)
+                if child is None and oper == "set" and \
+                   all(isinstance(j, str) for j in path[i + 1:]) :
+                    missing = i
+                    break
+            elif current.type == NBTTagType.TAG_List :
+                try :
+                    child = cast(NBTList, current.view)[KEY]
+                except IndexError :
+                    pass
+            if child is None :
+                return DataOperationResult.of()
+            TAGS.append(child)
+        for i in TAGS :
+            _checkmutable(i)
+        if oper == "merge" and TAGS[-1].type == NBTTagType.TAG_Compound and \
+           cast(NBTTag, value).type == NBTTagType.TAG_Compound :
+            _checkmerge(cast(NBTCompound, TAGS[-1].view),
+                        cast(NBTCompound, cast(NBTTag, value).view))
+        if not inplace :
+            if tag.type in _MUTABLE :
+                TAGS[0] = NBTTag(tag.view)
+            for i in range(1, len(TAGS)) :
+                if TAGS[i].type in _MUTABLE :
+                    TAGS[i] = NBTTag(TAGS[i].view)
+                    cast(NBTCompound, TAGS[i - 1].view)\
+                    [cast(str, KEYS[i - 1])] = TAGS[i]
+        ROOT: Final[NBTTag] = TAGS[0]
+        current = TAGS[-1]
+        for KEY in KEYS[missing:] :
+            child = NBTTag(NBTCompound())
+            cast(NBTCompound, current.view)[cast(str, KEY)] = child
+            current = child
+        CHANGED: Final[int] = _modify(current, oper, index,
+                                      path[-1] if path else None, value,
+                                      inplace)
+        return DataOperationResult.of(cast(Integral, CHANGED), ROOT) \
+               if CHANGED else DataOperationResult.of()
+
+_MUTABLE: Final[Tuple[NBTTagType, ...]] = (
+    NBTTagType.TAG_Byte_Array, NBTTagType.TAG_List, NBTTagType.TAG_Compound,
+    NBTTagType.TAG_Int_Array, NBTTagType.TAG_Long_Array
+)
+_INTEGRAL: Final[Tuple[NBTTagType, ...]] = (
+    NBTTagType.TAG_Byte, NBTTagType.TAG_Short, NBTTagType.TAG_Int,
+    NBTTagType.TAG_Long
+)
+
+def _checkmutable(tag: NBTTag) -> None :
+    if isinstance(tag.view, (NBTPersistentList, NBTPersistentCompound)) :
+        raise ValueError("persistent lists and compounds can't be modified; "
+                         "thaw them first")
+
+def _checkmerge(target: NBTCompound, source: NBTCompound) -> None :
+    # Check every compound _deepmerge would merge into.
+    STACK: Final[List[Tuple[NBTCompound, NBTCompound]]] = [(target, source)]
+    while STACK :
+        TARGET, SOURCE = STACK.pop()
+        for k, v in SOURCE.items() :
+            OLD: Optional[NBTTag] = TARGET.get(k)
+            if OLD is not None and OLD.type == NBTTagType.TAG_Compound and \
+               v.type == NBTTagType.TAG_Compound :
+                _checkmutable(OLD)
+                STACK.append((cast(NBTCompound, OLD.view),
+                              cast(NBTCompound, v.view)))
+
+def _modify(target: NBTTag, oper: str, index: Optional[int],
+            key: Union[int, str, None], value: Optional[NBTTag],
+            inplace: bool) -> int :
+    # Apply oper to the container target, which set and remove change at
+    # key. Return how many tags changed.
+    VIEW: Final[Any] = target.view
+    try :
+        if oper == "merge" :
+            if target.type != NBTTagType.TAG_Compound or \
+               cast(NBTTag, value).type != NBTTagType.TAG_Compound :
+                return 0
+            return _deepmerge(VIEW, cast(NBTTag, value).view, inplace)
+        if oper in ("append", "insert") :
+            ITEM: Any = cast(NBTTag, value)
+            if target.type in _ARRAY_ELEMENT_TYPES :
+                if ITEM.type not in _INTEGRAL :
+                    return 0
+                ITEM = _ARRAY_ELEMENT_TYPES[target.type](ITEM.view)
+            elif target.type != NBTTagType.TAG_List :
+                return 0
+            if oper == "append" :
+                VIEW.append(ITEM)
+                return 1
+            POSITION: Final[int] = cast(int, index) + len(VIEW) + 1 \
+                                   if cast(int, index) < 0 else \
+                                   cast(int, index)
+            if not 0 <= POSITION <= len(VIEW) :
+                return 0
+            VIEW.insert(POSITION, ITEM)
+            return 1
+        if target.type == NBTTagType.TAG_Compound :
+            if not isinstance(key, str) :
+                return 0
+            if oper == "remove" :
+                return 1 if VIEW.pop(key, None) is not None else 0
+            if VIEW.get(key) == value :
+                return 0
+            VIEW[key] = value
+            return 1
+        if not isinstance(key, int) or \
+           target.type not in _ARRAY_ELEMENT_TYPES and \
+           target.type != NBTTagType.TAG_List :
+            return 0
+        if oper == "remove" :
+            del VIEW[key]
+            return 1
+        if target.type == NBTTagType.TAG_List :
+            if VIEW[key] == value :
+                return 0
+            VIEW[key] = value
+            return 1
+        if cast(NBTTag, value).type not in _INTEGRAL :
+            return 0
+        NEW: Final[int] = _ARRAY_ELEMENT_TYPES[target.type]\
+                          (cast(NBTTag, value).view)
+        if VIEW[key] == NEW :
+            return 0
+        VIEW[key] = NEW
+        return 1
+    except (IndexError, ValueError) :
+        return 0
+
+def _deepmerge(target: NBTCompound, source: NBTCompound,
+               inplace: bool) -> int :
+    changed: int = 0
+    STACK: Final[List[Tuple[NBTCompound, NBTCompound]]] = [(target, source)]
+    while STACK :
+        TARGET, SOURCE = STACK.pop()
+        for k, v in SOURCE.items() :
+            OLD: Optional[NBTTag] = TARGET.get(k)
+            if OLD is not None and OLD.type == NBTTagType.TAG_Compound and \
+               v.type == NBTTagType.TAG_Compound :
+                if not inplace :
+                    OLD = NBTTag(OLD.view)
+                    TARGET[k] = OLD
+                STACK.append((cast(NBTCompound, OLD.view),
+                              cast(NBTCompound, v.view)))
+            elif OLD != v :
+                TARGET[k] = v
+                changed = 1
+    return changed
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+This module implements Java's modified UTF-8, the string encoding of NBT.
+
+* encode              encode a str as modified UTF-8.
+* decode              decode modified UTF-8, or UTF-8, into a str.
+* IncrementalDecoder  a codecs.IncrementalDecoder of modified UTF-8.
+* register            register the codec with codecs as "mutf-8".
+
+Modified UTF-8 differs from UTF-8 in two ways: NUL is encoded as C0 80,
+and supplementary characters are encoded as two separately encoded UTF-16
+surrogates, 6 bytes in all. Strings with neither, and ASCII strings above
+all, are handled by the UTF-8 codec alone.
+"""
+
+__all__ = ["encode", "decode", "IncrementalDecoder", "register"]
+
+import codecs
+import re
+from typing import Final, Optional, Pattern, Tuple, Union
+
+NAMES: Final[Tuple[str, ...]] = ("mutf_8", "mutf8", "java_modified_utf_8")
+
+_SURROGATE: Final[Pattern[str]] = re.compile("[\ud800-\udfff]")
+_SUPPLEMENTARY: Final[Pattern[str]] = re.compile("[\U00010000-\U0010ffff]")
+
+def _splitsupplementary(match: "re.Match[str]") -> str :
+    CODE: Final[int] = ord(match[0]) - 0x10000
+    return chr(0xd800 | CODE >> 10) + chr(0xdc00 | CODE & 0x3ff)
+
+def _combinesurrogates(text: str) -> str :
+    return text.encode("utf-16-be", "surrogatepass").\
+           decode("utf-16-be", "surrogatepass") \
+           if _SURROGATE.search(text) else text
+
+def encode(text: str, errors: str="strict") -> bytes :
+    """
+    Encode text. Lone surrogates are encoded like paired ones, as Java
+    does, so errors only matters to the codecs interface.
+    """
+    if text.isascii() :
+        RES: bytes = text.encode()
+        return RES.replace(b"\0", b"\xc0\x80") if b"\0" in RES else RES
+    if max(text) > "\uffff" :
+        text = _SUPPLEMENTARY.sub(_splitsupplementary, text)
+    RES = text.encode("utf-8", "surrogatepass")
+    return RES.replace(b"\0", b"\xc0\x80") if b"\0" in RES else RES
+
+def decode(data: Union[bytes, bytearray, memoryview],
+           errors: str="strict") -> str :
+    """
+    Decode data. Standard UTF-8 is accepted too, so that either
+    supplementary character encoding is read back. Like in encode, errors
+    only matters to the codecs interface.
+    """
+    try :
+        return str(data, "utf-8")
+    except UnicodeDecodeError :
+        pass
+    return _combinesurrogates(bytes(data).replace(b"\xc0\x80", b"\0").\
+                              decode("utf-8", "surrogatepass"))
+
+class IncrementalDecoder(codecs.BufferedIncrementalDecoder) :
+    """
+    Decode modified UTF-8 block by block. Sequences and surrogate pairs
+    split between blocks are held back until they are complete.
+    """
+
+    def _buffer_decode(self, input: bytes, errors: str,
+                       final: bool) -> Tuple[str, int] :
+        end: int = len(input)
+        if not final :
+            # The last sequence may be incomplete.
+            lead: int = end - 1
+            while lead >= 0 and end - lead < 3 and \
+                  input[lead] & 0xc0 == 0x80 :
+                lead -= 1
+            if lead >= 0 :
+                SIZE: int = 1 if input[lead] < 0x80 else \
+                            2 if input[lead] < 0xe0 else \
+                            3 if input[lead] < 0xf0 else 4
+                if end - lead < SIZE :
+                    end = lead
+            # A high surrogate waits for the low one.
+            if end >= 3 and input[end - 3] == 0xed and \
+               0xa0 <= input[end - 2] <= 0xaf :
+                end -= 3
+        return decode(input[:end], errors), end
+
+def _search(name: str) -> Optional[codecs.CodecInfo] :
+    # codecs only turns hyphens and spaces into underscores from Python
+    # 3.9 on.
+    if name.replace("-", "_").replace(" ", "_") not in NAMES :
+        return None
+    return codecs.CodecInfo(
+        name="mutf-8",
+        encode=lambda text, errors="strict" : (encode(text, errors),
+                                               len(text)),
+        decode=lambda data, errors="strict" : (decode(data, errors),
+                                               len(data)),
+        incrementaldecoder=IncrementalDecoder
+    )
+
+_registered: bool = False
+
+def register() -> None :
+    """
+    Make the codec available to codecs, str.encode and bytes.decode as
+    "mutf-8", "mutf8" or "java-modified-utf-8". Registering again does
+    nothing.
+    """
+    global _registered
+    if not _registered :
+        codecs.register(_search)
+        _registered = True
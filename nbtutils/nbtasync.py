@@ -0,0 +1,130 @@
+"""
+This module reads and writes binary NBT over asyncio streams.
+
+* readfromasyncstream  read a tag from an asyncio.StreamReader.
+* writetoasyncstream   write a tag to an asyncio.StreamWriter.
+
+The reader frames a tag with readexactly, awaiting only while the bytes it
+needs have not arrived, and decodes it once it is complete; the writer
+awaits drain, so a slow peer holds back only its own connection. Both
+handle the nameless root tag of network NBT with named=False.
+"""
+
+__all__ = ["readfromasyncstream", "writetoasyncstream"]
+
+import asyncio
+from typing import Final, List, Optional, cast
+
+from .nbttag import NBTTag, NBTTagType
+from .nbttagio import DEPTH_EXCEED_MSG, EOF_REACH_MSG, MAX_DEPTH, _BYTE, \
+                      _INT, _USHORT, _ARRAY_ITEM_SIZES, _FIXED_SIZES, \
+                      _Decoder, _dump
+
+async def _readexactly(reader: asyncio.StreamReader, size: int,
+                       parts: List[bytes]) -> bytes :
+    try :
+        DATA: Final[bytes] = await reader.readexactly(size)
+    except asyncio.IncompleteReadError :
+        raise EOFError(EOF_REACH_MSG) from None
+    parts.append(DATA)
+    return DATA
+
+async def _frame(reader: asyncio.StreamReader, tagtype: int, maxdepth: int,
+                 parts: List[bytes]) -> None :
+    # Read the payload of a tag of tagtype into parts, walking it the way
+    # _Decoder.skip does.
+    # Each frame is [element type id of a list or -1 for a compound,
+    # remaining list elements].
+    STACK: Final[List[List[int]]] = []
+    while 1 :
+        if tagtype in _FIXED_SIZES :
+            await _readexactly(reader, _FIXED_SIZES[tagtype], parts)
+        elif tagtype in _ARRAY_ITEM_SIZES :
+            LENGTH: int = _INT.unpack(await _readexactly(reader, 4,
+                                                         parts))[0]
+            if LENGTH < 0 :
+                raise ValueError("negative length")
+            await _readexactly(reader, LENGTH * _ARRAY_ITEM_SIZES[tagtype],
+                               parts)
+        elif tagtype == 8 :
+            await _readexactly(reader,
+                               _USHORT.unpack(await _readexactly(reader, 2,
+                                                                 parts))[0],
+                               parts)
+        elif tagtype == 9 or tagtype == 10 :
+            if len(STACK) >= maxdepth :
+                raise ValueError(DEPTH_EXCEED_MSG)
+            if tagtype == 10 :
+                STACK.append([-1, 0])
+            else :
+                HEAD: bytes = await _readexactly(reader, 5, parts)
+                ELEMTYPE: int = HEAD[0]
+                LENGTH = _INT.unpack_from(HEAD, 1)[0]
+                if LENGTH < 0 :
+                    raise ValueError("negative length")
+                if ELEMTYPE in _FIXED_SIZES :
+                    await _readexactly(reader,
+                                       LENGTH * _FIXED_SIZES[ELEMTYPE],
+                                       parts)
+                elif ELEMTYPE == 0 :
+                    if LENGTH :
+                        raise ValueError("list of TAG_End with elements")
+                else :
+                    STACK.append([ELEMTYPE, LENGTH])
+        else :
+            raise ValueError(f"unknown tag type id {tagtype}")
+        while STACK :
+            FRAME: List[int] = STACK[-1]
+            if FRAME[0] < 0 :
+                tagtype = (await _readexactly(reader, 1, parts))[0]
+                if tagtype :
+                    await _readexactly(reader,
+                                       _USHORT.unpack(await _readexactly(
+                                           reader, 2, parts
+                                       ))[0], parts)
+                    break
+            elif FRAME[1] :
+                FRAME[1] -= 1
+                tagtype = FRAME[0]
+                break
+            STACK.pop()
+        else :
+            return
+
+async def readfromasyncstream(reader: asyncio.StreamReader,
+                              tagtype: Optional[NBTTagType]=None, *,
+                              named: bool=True,
+                              maxdepth: int=MAX_DEPTH) -> NBTTag :
+    """
+    Read a tag from reader like readfromstream, never reading past it.
+    """
+    PARTS: Final[List[bytes]] = []
+    if tagtype is None :
+        TYPEID: int = cast(int, _BYTE.unpack(await _readexactly(reader, 1,
+                                                                PARTS))[0])
+        if TYPEID and named :
+            await _readexactly(reader,
+                               _USHORT.unpack(await _readexactly(reader, 2,
+                                                                 PARTS))[0],
+                               PARTS)
+    else :
+        TYPEID = cast(int, tagtype.value)
+    if TYPEID :
+        await _frame(reader, TYPEID, maxdepth, PARTS)
+    return _Decoder(b"".join(PARTS), maxdepth=maxdepth).root(tagtype, named)
+
+async def writetoasyncstream(tag: NBTTag, writer: asyncio.StreamWriter,
+                             name: Optional[str]=None, *, named: bool=True,
+                             maxdepth: int=MAX_DEPTH) -> int :
+    """
+    Write tag to writer like writetostream and wait for writer to drain.
+
+    With named false, a root tag is written without a name as in network
+    NBT; name is ignored then.
+    """
+    OUT: Final[bytearray] = _dump(tag, name, maxdepth) if named else \
+                            bytearray((cast(int, tag.type.value),)) + \
+                            _dump(tag, None, maxdepth)
+    writer.write(OUT)
+    await writer.drain()
+    return len(OUT)
@@ -0,0 +1,139 @@
+"""
+This module reads and writes compressed binary NBT.
+
+* Compression                an enum of the compressions used for NBT.
+* detectcompression          tell the compression of a payload from its head.
+* readcompressedfromstream   decode a possibly compressed tag from a stream.
+* writecompressedtostream    encode and compress a tag into a stream.
+
+Data is inflated and deflated in BLOCK_SIZE blocks, so neither side ever
+holds both the whole compressed and the whole uncompressed payload. The
+zlib implementation can be swapped for python-isal or zlib-ng when they are
+installed.
+"""
+
+__all__ = ["Compression", "BLOCK_SIZE", "detectcompression",
+           "readcompressedfromstream", "writecompressedtostream"]
+
+from enum import Enum
+import importlib
+from io import BufferedIOBase, BytesIO
+from types import ModuleType
+from typing import Any, Final, Optional, Tuple, Union, cast
+import zlib
+
+from .nbttag import NBTTag, NBTTagType
+from .nbttagio import MAX_DEPTH, _Decoder, _dump, _release, _streamdecoder
+
+BLOCK_SIZE: Final[int] = 1 << 16
+
+_BACKENDS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("isal", "isal.isal_zlib"), ("zlib-ng", "zlib_ng.zlib_ng"),
+    ("zlib", "zlib")
+)
+
+class Compression(Enum) :
+    NONE = 0
+    GZIP = 1
+    ZLIB = 2
+
+_WBITS: Final[Tuple[int, ...]] = (0, 31, 15)
+
+def detectcompression(head: bytes) -> Compression :
+    if head[:2] == b"\x1f\x8b" :
+        return Compression.GZIP
+    if len(head) >= 2 and head[0] & 15 == 8 and \
+       (head[0] << 8 | head[1]) % 31 == 0 :
+        return Compression.ZLIB
+    return Compression.NONE
+
+def _zlibbackend(backend: Optional[str]) -> ModuleType :
+    if backend is None or backend == "zlib" :
+        return zlib
+    if backend == "auto" :
+        for _, i in _BACKENDS :
+            try :
+                return importlib.import_module(i)
+            except ImportError :
+                pass
+    for k, v in _BACKENDS :
+        if k == backend :
+            return importlib.import_module(v)
+    raise ValueError(f"unknown zlib backend {backend!r}")
+
+class _Inflater :
+    def __init__(self, stream: BufferedIOBase, head: bytes, wbits: int,
+                 backend: ModuleType, blocksize: int) -> None :
+        self.stream: BufferedIOBase = stream
+        self.head: bytes = head
+        self.obj: Any = backend.decompressobj(wbits)
+        self.blocksize: int = blocksize
+
+    def read(self, size: int) -> bytes :
+        while not self.obj.eof :
+            data: bytes = self.obj.unconsumed_tail or \
+                          self.stream.read(self.blocksize)
+            if self.head :
+                data, self.head = self.head + data, b""
+            if not data :
+                break
+            OUT: bytes = self.obj.decompress(data, max(size, 1))
+            if OUT :
+                return OUT
+        return b""
+
+def readcompressedfromstream(stream: Union[BufferedIOBase, bytes, bytearray,
+                                           memoryview],
+                             compression: Optional[Compression]=None,
+                             tagtype: Optional[NBTTagType]=None, *,
+                             named: bool=True, backend: Optional[str]=None,
+                             blocksize: int=BLOCK_SIZE,
+                             maxdepth: int=MAX_DEPTH) -> NBTTag :
+    """
+    Read a tag like readfromstream from a possibly compressed stream or
+    bytes-like object. The compression is detected unless given.
+    backend is "zlib" (the default), "isal", "zlib-ng", or "auto" for the
+    fastest one installed.
+    """
+    STREAM: Final[BufferedIOBase] = cast(BufferedIOBase, stream) \
+                                    if hasattr(stream, "read") else \
+                                    cast(BufferedIOBase, BytesIO(stream))
+    HEAD: bytes = b""
+    if compression is None :
+        HEAD = STREAM.read(2)
+        compression = detectcompression(HEAD)
+    if compression == Compression.NONE :
+        # As readfromstream does, leave the stream right after the tag.
+        DECODER: Final[_Decoder] = _streamdecoder(STREAM, HEAD, blocksize,
+                                                  maxdepth)
+        TAG: Final[NBTTag] = DECODER.root(tagtype, named)
+        _release(STREAM, DECODER)
+        return TAG
+    return _Decoder(b"", _Inflater(STREAM, HEAD,
+                                   _WBITS[cast(int, compression.value)],
+                                   _zlibbackend(backend), blocksize).read,
+                    blocksize, maxdepth).root(tagtype, named)
+
+def writecompressedtostream(tag: NBTTag, stream: BufferedIOBase,
+                            compression: Compression=Compression.GZIP,
+                            name: Optional[str]="", *, level: int=-1,
+                            backend: Optional[str]=None,
+                            blocksize: int=BLOCK_SIZE,
+                            maxdepth: int=MAX_DEPTH) -> int :
+    """
+    Write tag like writetostream, compressed. As in .dat files, a named
+    root tag with an empty name is written unless name is None.
+    Return the number of compressed bytes written.
+    """
+    DATA: Final[memoryview] = memoryview(_dump(tag, name, maxdepth))
+    if compression == Compression.NONE :
+        return stream.write(DATA)
+    OBJ: Final[Any] = _zlibbackend(backend).\
+                      compressobj(level, zlib.DEFLATED,
+                                  _WBITS[cast(int, compression.value)])
+    res: int = 0
+    for i in range(0, len(DATA), blocksize) :
+        BLOCK: bytes = OBJ.compress(DATA[i:i+blocksize])
+        if BLOCK :
+            res += stream.write(BLOCK)
+    return res + stream.write(OBJ.flush())
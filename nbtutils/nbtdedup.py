@@ -0,0 +1,55 @@
+"""
+This module groups identical NBT tags without comparing them pairwise.
+
+* NBTDedupIndex  an index of tags grouped by their digest.
+
+Tags are grouped by nbttag.digest alone; with 16-byte digests, two
+different tags sharing one is not a practical concern. Freezing tags before
+adding them lets their digests be kept, so looking them up again costs
+nothing more than a dict lookup.
+"""
+
+__all__ = ["NBTDedupIndex"]
+
+from typing import Dict, Final, Iterable, Iterator, List, Tuple
+
+from .nbttag import NBTTag, digest
+
+class NBTDedupIndex :
+    """
+    The tags added so far, grouped with the tags equal to them in the order
+    they were added. The first tag of a group stands for all of it.
+    """
+
+    def __init__(self, tags: Iterable[NBTTag]=()) -> None :
+        self._groups: Dict[bytes, List[NBTTag]] = {}
+        for i in tags :
+            self.add(i)
+
+    def __len__(self) -> int :
+        return len(self._groups)
+
+    def __iter__(self) -> Iterator[Tuple[NBTTag, ...]] :
+        for i in self._groups.values() :
+            yield tuple(i)
+
+    def __contains__(self, tag: object) -> bool :
+        return isinstance(tag, NBTTag) and digest(tag) in self._groups
+
+    def add(self, tag: NBTTag) -> NBTTag :
+        """
+        Add tag to its group and return the first tag of the group, which
+        is tag itself if none equal to it was added before.
+        """
+        GROUP: Final[List[NBTTag]] = self._groups.setdefault(digest(tag), [])
+        GROUP.append(tag)
+        return GROUP[0]
+
+    def group(self, tag: NBTTag) -> Tuple[NBTTag, ...] :
+        """
+        Return the tags added so far that are equal to tag.
+        """
+        return tuple(self._groups.get(digest(tag), ()))
+
+    def clear(self) -> None :
+        self._groups.clear()
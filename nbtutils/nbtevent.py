@@ -0,0 +1,207 @@
+"""
+This module reads and writes binary NBT as a stream of events.
+
+* NBTEvent                  a NamedTuple of one reading or writing event.
+* EVENT_KINDS               the kinds of events.
+* iterreadeventsfromstream  read a tag from a stream event by event.
+* writeeventstostream       write a tag given as events into a stream.
+
+No tree is ever built: the reader holds one scalar and the path to it, and
+the writer flushes its buffer every WRITE_BLOCK_SIZE bytes, so files of any
+size can be filtered or transformed in constant memory.
+"""
+
+__all__ = ["NBTEvent", "EVENT_KINDS", "iterreadeventsfromstream",
+           "writeeventstostream"]
+
+from io import BufferedIOBase
+from typing import Any, Final, Iterable, Iterator, List, NamedTuple, \
+                   Optional, Tuple, Union, cast
+
+from .nbttag import NBTTag, NBTTagType
+from .nbttagio import DEPTH_EXCEED_MSG, INTERN_TABLE, MAX_DEPTH, \
+                      READ_CHUNK_SIZE, _BYTE, _INT, _TAG_TYPES, _Decoder, \
+                      _encode, _release, _streamdecoder
+
+WRITE_BLOCK_SIZE: Final[int] = 1 << 16
+
+EVENT_KINDS: Final[Tuple[str, ...]] = ("start_compound", "start_list",
+                                       "scalar", "end")
+
+class NBTEvent(NamedTuple) :
+    """
+    kind is one of EVENT_KINDS, and end closes the innermost list or
+    compound. name is the name of the tag in its compound, or that of a
+    named root tag, and None otherwise. tagtype is TAG_Compound, the
+    element type of a list, or the type of a scalar. value is the length of
+    a list or the NBTTag of a scalar.
+    """
+    kind: str
+    name: Optional[str] = None
+    tagtype: Optional[NBTTagType] = None
+    value: Union[None, int, NBTTag] = None
+
+_END: Final[NBTEvent] = NBTEvent("end")
+
+def _events(decoder: _Decoder, tagtype: Optional[NBTTagType],
+            named: bool) -> Iterator[NBTEvent] :
+    if tagtype is None :
+        TYPEID: int = cast(int, decoder.unpack(_BYTE))
+        name: Optional[str] = decoder.string() if TYPEID and named else None
+    else :
+        TYPEID = cast(int, tagtype.value)
+        name = None
+    if not TYPEID :
+        yield NBTEvent("scalar", name, NBTTagType.TAG_End,
+                       NBTTag(NBTTagType.TAG_End))
+        return
+    # Each frame is the element type id of a list and its remaining
+    # elements, or None and 0 for a compound.
+    STACK: Final[List[List[Any]]] = []
+    typeid: int = TYPEID
+    while 1 :
+        if typeid == 10 or typeid == 9 :
+            if len(STACK) >= decoder.maxdepth :
+                raise ValueError(DEPTH_EXCEED_MSG)
+            if typeid == 10 :
+                STACK.append([None, 0])
+                yield NBTEvent("start_compound", name,
+                               NBTTagType.TAG_Compound)
+            else :
+                ELEMTYPE: int = cast(int, decoder.unpack(_BYTE))
+                LENGTH: int = cast(int, decoder.unpack(_INT))
+                if not 0 <= ELEMTYPE < len(_TAG_TYPES) :
+                    raise ValueError(f"unknown tag type id {ELEMTYPE}")
+                if LENGTH < 0 :
+                    raise ValueError("negative length")
+                if ELEMTYPE == 0 and LENGTH :
+                    raise ValueError("list of TAG_End with elements")
+                STACK.append([ELEMTYPE, LENGTH])
+                yield NBTEvent("start_list", name, _TAG_TYPES[ELEMTYPE],
+                               LENGTH)
+        else :
+            VALUE: NBTTag = decoder.leaf(typeid)
+            yield NBTEvent("scalar", name, VALUE.type, VALUE)
+        while STACK :
+            FRAME: List[Any] = STACK[-1]
+            if FRAME[0] is None :
+                typeid = cast(int, decoder.unpack(_BYTE))
+                if typeid :
+                    name = decoder.key()
+                    break
+            elif FRAME[1] :
+                FRAME[1] -= 1
+                typeid = FRAME[0]
+                name = None
+                break
+            STACK.pop()
+            yield _END
+        else :
+            return
+
+def iterreadeventsfromstream(stream: BufferedIOBase,
+                             tagtype: Optional[NBTTagType]=None, *,
+                             named: bool=True,
+                             maxdepth: int=MAX_DEPTH) -> Iterator[NBTEvent] :
+    """
+    Read a tag from stream like readfromstream, yielding events instead of
+    building it.
+
+    Seekable streams are rewound to the end of the tag once the iterator is
+    exhausted.
+    """
+    DECODER: Final[_Decoder] = _streamdecoder(stream, b"", READ_CHUNK_SIZE,
+                                              maxdepth)
+    yield from _events(DECODER, tagtype, named)
+    _release(stream, DECODER)
+
+def writeeventstostream(events: Iterable[NBTEvent], stream: BufferedIOBase,
+                        *, header: bool=True,
+                        maxdepth: int=MAX_DEPTH) -> int :
+    """
+    Write the tag described by events into stream, and return the number
+    of bytes written.
+
+    With header, the type id of the root tag is written, followed by its
+    name unless that is None; otherwise only its payload is, which is what
+    iterreadeventsfromstream reads with tagtype. Events that do not
+    describe exactly one tag raise ValueError, as do lists whose elements
+    do not match their start_list event.
+    """
+    OUT: Final[bytearray] = bytearray()
+    res: int = 0
+    # Each frame is the element type of a list and its remaining elements,
+    # or None and 0 for a compound.
+    STACK: Final[List[List[Any]]] = []
+    done: bool = False
+    for EVENT in events :
+        if done :
+            raise ValueError("events after the end of the root tag")
+        if EVENT.kind == "end" :
+            if not STACK :
+                raise ValueError("end outside of any list or compound")
+            if STACK[-1][0] is None :
+                OUT.append(0)
+            elif STACK[-1][1] :
+                raise ValueError(f"{STACK[-1][1]} list elements missing")
+            STACK.pop()
+            done = not STACK
+            continue
+        if EVENT.kind not in EVENT_KINDS :
+            raise ValueError(f"unknown event kind {EVENT.kind!r}")
+        TYPE: NBTTagType = NBTTagType.TAG_Compound \
+                           if EVENT.kind == "start_compound" else \
+                           NBTTagType.TAG_List \
+                           if EVENT.kind == "start_list" else \
+                           cast(NBTTag, EVENT.value).type
+        if EVENT.kind == "scalar" :
+            if EVENT.tagtype is not None and EVENT.tagtype != TYPE :
+                raise ValueError(f"scalar of {EVENT.tagtype.name} with a "
+                                 f"{TYPE.name} value")
+            if TYPE == NBTTagType.TAG_End and STACK :
+                raise ValueError("TAG_End inside a list or compound")
+        elif EVENT.kind == "start_list" :
+            if not isinstance(EVENT.tagtype, NBTTagType) :
+                raise ValueError("start_list without an element type")
+            if not isinstance(EVENT.value, int) :
+                raise ValueError("start_list without a length")
+        if not STACK :
+            if header :
+                OUT.append(cast(int, TYPE.value))
+                if EVENT.name is not None and \
+                   TYPE != NBTTagType.TAG_End :
+                    OUT += INTERN_TABLE.encode(EVENT.name)
+        elif STACK[-1][0] is None :
+            if EVENT.name is None :
+                raise ValueError("compound entry without a name")
+            OUT.append(cast(int, TYPE.value))
+            OUT += INTERN_TABLE.encode(EVENT.name)
+        elif not STACK[-1][1] :
+            raise ValueError("more list elements than its length")
+        elif STACK[-1][0] != TYPE :
+            raise ValueError(f"{TYPE.name} in a list of {STACK[-1][0].name}")
+        else :
+            STACK[-1][1] -= 1
+        if EVENT.kind == "scalar" :
+            _encode(cast(NBTTag, EVENT.value), OUT, maxdepth - len(STACK))
+            done = not STACK
+        elif len(STACK) >= maxdepth :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        elif EVENT.kind == "start_compound" :
+            STACK.append([None, 0])
+        else :
+            LENGTH: int = cast(int, EVENT.value)
+            if LENGTH < 0 :
+                raise ValueError("negative length")
+            ELEMTYPE: NBTTagType = cast(NBTTagType, EVENT.tagtype)
+            if ELEMTYPE == NBTTagType.TAG_End and LENGTH :
+                raise ValueError("list of TAG_End with elements")
+            OUT.append(cast(int, ELEMTYPE.value))
+            OUT += _INT.pack(LENGTH)
+            STACK.append([ELEMTYPE, LENGTH])
+        if len(OUT) >= WRITE_BLOCK_SIZE :
+            res += stream.write(OUT)
+            OUT.clear()
+    if not done :
+        raise ValueError("events ended before the root tag did")
+    return res + stream.write(OUT) if OUT else res
@@ -1,6 +1,27 @@
 import builtins
+import functools
+import re
 
-from typing import Final, Iterable, List, SupportsIndex, Tuple, Union
+from typing import Any, Dict, Final, Iterable, List, Match, Optional, \
+                   Pattern, SupportsIndex, Tuple, Union, cast
+
+from .nbttag import NBTByte, NBTCompound, NBTInt, NBTIntArray, NBTList, \
+                    NBTLong, NBTTag, NBTTagType
+
+PATH_CACHE_SIZE: Final[int] = 1024
+
+_COMPONENT: Final[Pattern[str]] = \
+re.compile(r"""(?P<dot>\.)?(?:"(?P<dquote>(?:[^"\\]|\\.)*)"
+                              |'(?P<squote>(?:[^'\\]|\\.)*)'
+                              |(?P<key>[^{}\[\].'"\ ]+))
+             | \[(?P<index>[-+]?[0-9]+)\]""", re.S | re.X)
+_ESCAPE: Final[Pattern[str]] = re.compile(r"\\(.)", re.S)
+
+_ARRAY_ELEMENT_TYPES: Final[Dict[NBTTagType, type]] = {
+    NBTTagType.TAG_Byte_Array: NBTByte,
+    NBTTagType.TAG_Int_Array: NBTInt,
+    NBTTagType.TAG_Long_Array: NBTLong
+}
 
 class NBTPath(((len(""), repr(0))*2).__class__) :
     def __new__(cls, iterable: Iterable[Union[int, str]]=()) :
@@ -34,4 +55,99 @@ class NBTPath(((len(""), repr(0))*2).__class__) :
     def __getitem__(self, key: Union[SupportsIndex, slice]) :
         R: Final[Union[int, str, Tuple[Union[int, str], ...]]] = \
         super().__getitem__(key)
-        return R if isinstance(R, (int, str)) else type(self)(R)
\ No newline at end of file
+        return R if isinstance(R, (int, str)) else type(self)(R)
+
+    @classmethod
+    def parse(cls, text: str) -> "NBTPath" :
+        """
+        Parse a path in the format of str(NBTPath). Results are cached, so
+        parsing the same text again is a dictionary lookup.
+        """
+        return _parse(text) if cls is NBTPath else cls(_parse(text))
+
+    def compile(self) -> "NBTPathAccessor" :
+        return _compile(self)
+
+class NBTPathAccessor :
+    """
+    A callable returning the tag a path leads to in a tree, or None.
+
+    It walks the tree in a loop over the path components, without slicing
+    the path; NBTPath.compile caches accessors per path.
+    """
+
+    __slots__ = ("path", "_last")
+
+    def __init__(self, path: NBTPath) -> None :
+        self.path: Final[NBTPath] = path
+        self._last: Final[int] = len(path) - 1
+
+    def __repr__(self) -> str :
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def __call__(self, tag: NBTTag) -> Optional[NBTTag] :
+        current: NBTTag = tag
+        i: int = 0
+        for KEY in self.path :
+            TYPE: NBTTagType = current.type
+            if isinstance(KEY, str) :
+                if TYPE != NBTTagType.TAG_Compound :
+                    return None
+                NEXT: Optional[NBTTag] = \
+                cast(NBTCompound, current.view).get(KEY)
+                if NEXT is None :
+                    return None
+                current = NEXT
+            elif TYPE == NBTTagType.TAG_List :
+                try :
+                    current = cast(NBTList, current.view)[KEY]
+                except IndexError :
+                    return None
+            elif TYPE in _ARRAY_ELEMENT_TYPES :
+                if i != self._last :
+                    return None
+                try :
+                    return NBTTag(_ARRAY_ELEMENT_TYPES[TYPE]\
+                                  (cast(NBTIntArray, current.view)[KEY]))
+                except IndexError :
+                    return None
+            else :
+                return None
+            i += 1
+        return current
+
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def _parse(text: str) -> NBTPath :
+    if text == "{}" :
+        return NBTPath()
+    R: Final[List[Union[int, str]]] = []
+    pos: int = 0
+    while pos < len(text) or not R :
+        MATCH: Optional[Match[str]] = _COMPONENT.match(text, pos)
+        if MATCH is None or \
+           MATCH["index"] is None and bool(MATCH["dot"]) != bool(R) :
+            raise ValueError(f"invalid NBT path {text!r} at position {pos}")
+        if MATCH["index"] is not None :
+            R.append(int(MATCH["index"]))
+        else :
+            R.append(MATCH["key"] if MATCH["key"] is not None else \
+                     _ESCAPE.sub(r"\1", MATCH["dquote"] \
+                                        if MATCH["dquote"] is not None else \
+                                        MATCH["squote"]))
+        pos = MATCH.end()
+    return NBTPath(R)
+
+def _pathtree(paths: Iterable[NBTPath]) -> Dict[Any, Any] :
+    # Merge paths into a prefix tree. Nodes map path components to child
+    # nodes, and None to the indexes of the paths ending at the node.
+    TREE: Final[Dict[Any, Any]] = {}
+    for i, PATH in enumerate(paths) :
+        node: Dict[Any, Any] = TREE
+        for j in PATH :
+            node = node.setdefault(j, {})
+        node.setdefault(None, []).append(i)
+    return TREE
+
+@functools.lru_cache(maxsize=PATH_CACHE_SIZE)
+def _compile(path: NBTPath) -> NBTPathAccessor :
+    return NBTPathAccessor(path)
\ No newline at end of file
@@ -0,0 +1,363 @@
+"""
+This module compiles codecs for compounds whose layout is known in advance.
+
+* NBTSchema      the layout of a compound: field names and their types.
+* NBTListSchema  the layout of a list: the type of its elements.
+
+A schema is compiled once, when it is created. The fixed-size fields
+between two variable-size ones are merged into a single struct.Struct
+together with the type ids and names of all of them, so that they are
+written with one pack and read and checked with one unpack. Whatever does
+not match the schema, down to a single compound or list, is encoded or
+decoded by the generic codec of nbttagio instead, so any tag can be passed
+to a schema; only the tags that match get faster.
+"""
+
+__all__ = ["NBTSchema", "NBTListSchema"]
+
+from abc import ABC, abstractmethod
+import struct
+
+from io import BufferedIOBase
+from typing import Any, Callable, Dict, Final, List, Mapping, NamedTuple, \
+                   Optional, Tuple, Union, cast
+
+from .nbttag import NBTCompound, NBTList, NBTString, NBTTag, NBTTagType, \
+                    NBT_TAG_TYPE_CONSTRUCTOR
+from .nbttagio import DEPTH_EXCEED_MSG, INTERN_TABLE, MAX_DEPTH, \
+                      _ENCODERS, _FIXED_LEAVES, _FIXED_SIZES, _INT, \
+                      _Decoder, _encode, _encodestring, _readstream, _typeid
+
+_FIXED_FORMATS: Final[Dict[int, str]] = {
+    1: "b", 2: "h", 3: "i", 4: "q", 5: "f", 6: "d"
+}
+
+_LIST_HEAD: Final[struct.Struct] = struct.Struct(">bi")
+
+# NBTTag.type and NBTTag.view without the property calls.
+_GET: Final[Callable[[tuple, int], Any]] = tuple.__getitem__
+
+class _Run(NamedTuple) :
+    # A run of fixed-size fields followed by the type id and name of the
+    # next variable-size field, or by the end of the compound.
+    struct_: struct.Struct
+    # The arguments of struct_.pack, with the values of the fields left
+    # None between the headers.
+    template: List[Any]
+    headers: Tuple[bytes, ...]
+    names: Tuple[str, ...]
+    classes: Tuple[type, ...]
+    leaves: Tuple[Tuple[NBTTagType, Callable[[Any], Any]], ...]
+
+class _Field(NamedTuple) :
+    # A variable-size field; its header belongs to the previous run.
+    name: str
+    tagtype: NBTTagType
+    typeid: int
+    # The schema of a list or compound, or the exact class and encoder of
+    # a leaf payload.
+    schema: Optional["_Schema"]
+    class_: Optional[type]
+    encoder: Optional[Callable[[Any], bytes]]
+
+def _fallback(decoder: _Decoder, tagtype: int, maxdepth: int) -> NBTTag :
+    MAXDEPTH: Final[int] = decoder.maxdepth
+    decoder.maxdepth = maxdepth
+    try :
+        return decoder.payload(tagtype)
+    finally :
+        decoder.maxdepth = MAXDEPTH
+
+class _Schema(ABC) :
+    tagtype: NBTTagType
+
+    @abstractmethod
+    def _encodetag(self, tag: NBTTag, out: bytearray, maxdepth: int) -> None :
+        pass
+
+    @abstractmethod
+    def _decode(self, decoder: _Decoder, maxdepth: int) -> Optional[NBTTag] :
+        # Return None if the data does not match.
+        pass
+
+    def _decodepayload(self, decoder: _Decoder, maxdepth: int) -> NBTTag :
+        START: Final[int] = decoder.pos - cast(int, decoder.mark)
+        try :
+            TAG: Final[Optional[NBTTag]] = self._decode(decoder, maxdepth)
+        except EOFError :
+            # A payload laid out differently may well be shorter.
+            pass
+        else :
+            if TAG is not None :
+                return TAG
+        decoder.pos = cast(int, decoder.mark) + START
+        return _fallback(decoder, cast(int, self.tagtype.value), maxdepth)
+
+    def _root(self, decoder: _Decoder, tagtype: Optional[NBTTagType],
+              named: bool) -> NBTTag :
+        TYPEID: Final[int] = decoder.header(tagtype, named)
+        if TYPEID != self.tagtype.value :
+            return decoder.payload(TYPEID) if TYPEID else \
+                   NBTTag(NBTTagType.TAG_End)
+        decoder.mark = decoder.pos
+        try :
+            if decoder.read is not None and not decoder.chunksize :
+                # Never read past the tag of a stream that can't be
+                # rewound: frame it first, then decode it from memory.
+                decoder.skip(TYPEID)
+                decoder.pos = decoder.mark
+                decoder.read = None
+            return self._decodepayload(decoder, decoder.maxdepth)
+        finally :
+            decoder.mark = None
+
+    def dumps(self, tag: NBTTag, name: Optional[str]=None, *,
+              maxdepth: int=MAX_DEPTH) -> bytes :
+        """
+        Encode tag like nbttagio.dumps. The entries of compounds matching
+        the schema are written in the order of its fields.
+        """
+        OUT: Final[bytearray] = bytearray()
+        if name is not None :
+            OUT.append(cast(int, tag.type.value))
+            if tag.type == NBTTagType.TAG_End :
+                return bytes(OUT)
+            OUT += INTERN_TABLE.encode(name)
+        if tag.type is self.tagtype :
+            self._encodetag(tag, OUT, maxdepth)
+        else :
+            _encode(tag, OUT, maxdepth)
+        return bytes(OUT)
+
+    def writetostream(self, tag: NBTTag, stream: BufferedIOBase,
+                      name: Optional[str]=None, *,
+                      maxdepth: int=MAX_DEPTH) -> int :
+        """Like dumps, but write the result to stream with a single write."""
+        OUT: Final[bytes] = self.dumps(tag, name, maxdepth=maxdepth)
+        return stream.write(OUT) if OUT else 0
+
+    def loads(self, data: Union[bytes, bytearray, memoryview],
+              tagtype: Optional[NBTTagType]=None, *, named: bool=True,
+              maxdepth: int=MAX_DEPTH) -> NBTTag :
+        """Decode data like nbttagio.loads."""
+        return self._root(_Decoder(data, maxdepth=maxdepth), tagtype, named)
+
+    def readfromstream(self, stream: BufferedIOBase,
+                       tagtype: Optional[NBTTagType]=None, *,
+                       named: bool=True,
+                       maxdepth: int=MAX_DEPTH) -> NBTTag :
+        """Read a tag from stream like nbttagio.readfromstream."""
+        return _readstream(stream, maxdepth,
+                           lambda x: self._root(x, tagtype, named))
+
+def _check(spec: Union[NBTTagType, _Schema]) -> NBTTagType :
+    if isinstance(spec, _Schema) :
+        return spec.tagtype
+    if not isinstance(spec, NBTTagType) or spec == NBTTagType.TAG_End :
+        raise ValueError(f"invalid field type {spec!r}")
+    return spec
+
+def _run(fields: List[Tuple[str, NBTTagType, bytes]],
+         header: bytes) -> _Run :
+    FORMAT: Final[List[str]] = [">"]
+    TEMPLATE: Final[List[Any]] = []
+    for NAME, TYPE, HEADER in fields :
+        FORMAT.append(f"{len(HEADER)}s{_FIXED_FORMATS[TYPE.value]}")
+        TEMPLATE += (HEADER, None)
+    FORMAT.append(f"{len(header)}s")
+    TEMPLATE.append(header)
+    return _Run(struct.Struct("".join(FORMAT)), TEMPLATE,
+                tuple(TEMPLATE[0::2]), tuple(i[0] for i in fields),
+                tuple(NBT_TAG_TYPE_CONSTRUCTOR[cast(int, i[1].value)]
+                      for i in fields),
+                tuple(_FIXED_LEAVES[cast(int, i[1].value)][0::2]
+                      for i in fields))
+
+def _encoder(class_: Optional[type]) -> Optional[Callable[[Any], bytes]] :
+    if class_ is NBTString :
+        # Strings of a schema are mostly ids, repeated over and over.
+        return INTERN_TABLE.encode
+    return None if class_ is None else _ENCODERS[class_]
+
+class NBTSchema(_Schema) :
+    """
+    The layout of a compound. fields maps the names of its entries, in the
+    order they are written, to their NBTTagType, or to the NBTSchema or
+    NBTListSchema of a compound or list.
+
+    A compound matches when it has exactly these entries, with payloads of
+    exactly these classes and lists and compounds of these types.
+    """
+
+    tagtype: NBTTagType = NBTTagType.TAG_Compound
+
+    def __init__(self,
+                 fields: Mapping[str, Union[NBTTagType, _Schema]]) -> None :
+        self.fields: Final[Dict[str, Union[NBTTagType, _Schema]]] = \
+        dict(fields)
+        STEPS: Final[List[Tuple[_Run, Optional[_Field]]]] = []
+        run: List[Tuple[str, NBTTagType, bytes]] = []
+        for NAME, SPEC in self.fields.items() :
+            TYPE: NBTTagType = _check(SPEC)
+            HEADER: bytes = bytes((cast(int, TYPE.value),)) + \
+                            _encodestring(NAME)
+            if not isinstance(SPEC, _Schema) and \
+               TYPE.value in _FIXED_FORMATS :
+                run.append((NAME, TYPE, HEADER))
+                continue
+            CLASS: Optional[type] = None
+            if not isinstance(SPEC, _Schema) and \
+               TYPE != NBTTagType.TAG_List and \
+               TYPE != NBTTagType.TAG_Compound :
+                CLASS = NBT_TAG_TYPE_CONSTRUCTOR[cast(int, TYPE.value)]
+            STEPS.append((_run(run, HEADER),
+                          _Field(NAME, TYPE, cast(int, TYPE.value),
+                                 SPEC if isinstance(SPEC, _Schema) else None,
+                                 CLASS, _encoder(CLASS))))
+            run = []
+        STEPS.append((_run(run, b"\0"), None))
+        self._steps: Final[Tuple[Tuple[_Run, Optional[_Field]], ...]] = \
+        tuple(STEPS)
+
+    def __repr__(self) -> str :
+        return f"{self.__class__.__name__}({self.fields!r})"
+
+    def _encodetag(self, tag: NBTTag, out: bytearray, maxdepth: int) -> None :
+        if maxdepth < 1 :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        VIEW: Final[Any] = tag.view
+        START: Final[int] = len(out)
+        if len(VIEW) == len(self.fields) :
+            try :
+                for RUN, FIELD in self._steps :
+                    if RUN.names :
+                        PAYLOADS: List[Any] = [_GET(VIEW[i], 1)
+                                               for i in RUN.names]
+                        if tuple(map(type, PAYLOADS)) != RUN.classes :
+                            break
+                        ARGS: List[Any] = RUN.template.copy()
+                        ARGS[1::2] = PAYLOADS
+                        out += RUN.struct_.pack(*ARGS)
+                    else :
+                        out += RUN.headers[0]
+                    if FIELD is None :
+                        return
+                    ITEM: NBTTag = VIEW[FIELD.name]
+                    if FIELD.encoder is not None :
+                        if type(_GET(ITEM, 1)) is not FIELD.class_ :
+                            break
+                        out += FIELD.encoder(_GET(ITEM, 1))
+                    elif _GET(ITEM, 0) is not FIELD.tagtype :
+                        break
+                    elif FIELD.schema is not None :
+                        FIELD.schema._encodetag(ITEM, out, maxdepth - 1)
+                    else :
+                        _encode(ITEM, out, maxdepth - 1)
+            except KeyError :
+                pass
+        del out[START:]
+        _encode(tag, out, maxdepth)
+
+    def _decode(self, decoder: _Decoder, maxdepth: int) -> Optional[NBTTag] :
+        if maxdepth < 1 :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        RES: Final[NBTCompound] = NBTCompound._make(())
+        for RUN, FIELD in self._steps :
+            SIZE: int = RUN.struct_.size
+            POS: int = decoder.take(SIZE)
+            if not RUN.names :
+                if decoder.buf[POS:POS+SIZE] != RUN.headers[0] :
+                    return None
+            else :
+                VALUES: Tuple[Any, ...] = RUN.struct_.unpack_from(decoder.buf,
+                                                                  POS)
+                if VALUES[0::2] != RUN.headers :
+                    return None
+                # Decoded keys and tags need no checking.
+                for NAME, LEAF, VALUE in zip(RUN.names, RUN.leaves,
+                                             VALUES[1::2]) :
+                    dict.__setitem__(RES, NAME,
+                                     NBTTag._make(LEAF[0], LEAF[1](VALUE)))
+            if FIELD is None :
+                return NBTTag._make(NBTTagType.TAG_Compound, RES)
+            dict.__setitem__(
+                RES, FIELD.name,
+                FIELD.schema._decodepayload(decoder, maxdepth - 1)
+                if FIELD.schema is not None else
+                decoder.leaf(FIELD.typeid)
+                if FIELD.encoder is not None else
+                _fallback(decoder, FIELD.typeid, maxdepth - 1)
+            )
+        assert 0
+
+class NBTListSchema(_Schema) :
+    """
+    The layout of a list. element is the NBTTagType of its elements, or
+    the NBTSchema or NBTListSchema of each of them.
+
+    A list matches when it is empty or its elements are of that type;
+    lists of fixed-size elements are written and read with one struct.
+    """
+
+    tagtype: NBTTagType = NBTTagType.TAG_List
+
+    def __init__(self, element: Union[NBTTagType, _Schema]) -> None :
+        self.element: Final[Union[NBTTagType, _Schema]] = element
+        self._elemtype: Final[NBTTagType] = _check(element)
+        self._typeid: Final[int] = cast(int, self._elemtype.value)
+        self._schema: Final[Optional[_Schema]] = \
+        element if isinstance(element, _Schema) else None
+        self._format: Final[Optional[str]] = \
+        None if self._schema is not None else \
+        _FIXED_FORMATS.get(self._typeid)
+
+    def __repr__(self) -> str :
+        return f"{self.__class__.__name__}({self.element!r})"
+
+    def _encodetag(self, tag: NBTTag, out: bytearray, maxdepth: int) -> None :
+        VIEW: Final[Any] = tag.view
+        if not VIEW or _typeid(VIEW[0]) != self._typeid :
+            _encode(tag, out, maxdepth)
+            return
+        if maxdepth < 1 :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        out.append(self._typeid)
+        out += _INT.pack(len(VIEW))
+        if self._format is not None :
+            out += struct.pack(f">{len(VIEW)}{self._format}",
+                               *[_GET(i, 1) for i in VIEW])
+        elif self._schema is not None :
+            for i in VIEW :
+                self._schema._encodetag(i, out, maxdepth - 1)
+        else :
+            for i in VIEW :
+                _encode(i, out, maxdepth - 1)
+
+    def _decode(self, decoder: _Decoder, maxdepth: int) -> Optional[NBTTag] :
+        if maxdepth < 1 :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        HEAD: Final[int] = decoder.take(5)
+        ELEMTYPE: int
+        LENGTH: int
+        ELEMTYPE, LENGTH = _LIST_HEAD.unpack_from(decoder.buf, HEAD)
+        if not LENGTH :
+            return NBTTag._make(NBTTagType.TAG_List, NBTList._make([]))
+        if LENGTH < 0 or ELEMTYPE != self._typeid :
+            return None
+        ITEMS: List[NBTTag]
+        if self._format is not None :
+            POS: Final[int] = decoder.take(LENGTH * _FIXED_SIZES[ELEMTYPE])
+            TYPE: Final[NBTTagType] = self._elemtype
+            LEAF: Final[Callable[[Any], Any]] = _FIXED_LEAVES[ELEMTYPE][2]
+            ITEMS = [NBTTag._make(TYPE, LEAF(i))
+                     for i in struct.unpack_from(f">{LENGTH}{self._format}",
+                                                 decoder.buf, POS)]
+        elif self._schema is not None :
+            ITEMS = [self._schema._decodepayload(decoder, maxdepth - 1)
+                     for _ in range(LENGTH)]
+        elif ELEMTYPE == 9 or ELEMTYPE == 10 :
+            ITEMS = [_fallback(decoder, ELEMTYPE, maxdepth - 1)
+                     for _ in range(LENGTH)]
+        else :
+            ITEMS = [decoder.leaf(ELEMTYPE) for _ in range(LENGTH)]
+        return NBTTag._make(NBTTagType.TAG_List, NBTList._make(ITEMS))
@@ -8,26 +8,40 @@ This module contains objects about NBT Tags.
 * NBTLong       an immutable type to represent TAG_Long Tag Type.
 * NBTFloat      an immutable type to represent TAG_Float Tag Type.
 * NBTDouble     an immutable type to represent TAG_Double Tag Type.
-* NBTByteArray  a mutable type to represent TAG_Byte_Array Tag Type.
+* NBTByteArray  a mutable array.array to represent TAG_Byte_Array Tag Type.
 * NBTString     an immutable type to represent TAG_String Tag Type.
 * NBTList       a mutable type to represent NBT_List Tag Type.
 * NBTCompound   a mutable type to represent NBT_Compound Tag Type.
-* NBTIntArray   a mutable type to represent TAG_Int_Array Tag Type.
-* NBTLongArray  a mutable type to represent TAG_Long_Array Tag Type.
+* NBTIntArray   a mutable array.array to represent TAG_Int_Array Tag Type.
+* NBTLongArray  a mutable array.array to represent TAG_Long_Array Tag Type.
+* NBTPersistentList      an immutable, structurally shared NBTList.
+* NBTPersistentCompound  an immutable, structurally shared NBTCompound.
 * NBTTag        an immutable type to store single NBT tags.
+* freeze        make every list and compound in a tag persistent.
+* thaw          make a mutable copy of a tag.
+* digest        a structural digest of a tag, shared by equal tags.
 """
 
 __all__ = ["NBTTagType", "NBTByte", "NBTShort", "NBTInt", "NBTLong",
            "NBTFloat", "NBTDouble", "NBTByteArray", "NBTString", "NBTList",
            "NBTCompound", "NBTIntArray", "NBTLongArray",
-           "NBT_TAG_TYPE_CONSTRUCTOR", "NBTTag"]
+           "NBTPersistentList", "NBTPersistentCompound",
+           "NBT_TAG_TYPE_CONSTRUCTOR", "NBTTag", "freeze", "thaw",
+           "digest"]
 
+import array
 import builtins
+import collections.abc
 from enum import Enum
+import functools
+import hashlib
+import importlib
 from numbers import Integral, Real
 import struct
-from typing import Any, Final, Iterable, List, Literal, Mapping, Optional, \
-                   SupportsIndex, Tuple, Union, cast
+import sys
+from typing import Any, Callable, Dict, Final, FrozenSet, Iterable, \
+                   Iterator, List, Literal, Mapping, Optional, \
+                   SupportsIndex, Tuple, Union, cast, overload
 
 class NBTTagType(Enum) :
     TAG_End = 0
@@ -114,43 +128,165 @@ class NBTDouble(float) :
     def __str__(self) -> str :
         return f"{super().__repr__()}d"
 
-class NBTByteArray([NBTByte()].__class__) :
-    def __init__(self, iterable: Iterable[Integral]=()) -> None :
-        super().__init__(())
-        for i in iterable :
-            if not builtins.isinstance(i, Integral) :
-                raise ValueError("element of iterable is not Integral")
-            self.append(NBTByte(i))
+class _NBTArray(array.array) :
+    __slots__ = ()
+
+    TYPECODE: str = "b"
+    ELEMENT: type = int
+    PREFIX: str = ""
+    SUFFIX: str = ""
+    DTYPE: str = ">i1"
+
+    def __new__(cls, iterable: Iterable[Integral]=()) -> "_NBTArray" :
+        if isinstance(iterable, array.array) and \
+           iterable.typecode == cls.TYPECODE :
+            RES: Final[_NBTArray] = super().__new__(cls, cls.TYPECODE)
+            array.array.extend(RES, iterable)
+            return RES
+        if isinstance(iterable, (bytes, bytearray)) and cls.TYPECODE != "b" :
+            iterable = list(iterable)
+        elif not isinstance(iterable, (list, tuple, range, array.array,
+                                       bytes, bytearray)) :
+            iterable = list(iterable)
+        try :
+            return super().__new__(cls, cls.TYPECODE, iterable)
+        except OverflowError :
+            pass
+        except TypeError :
+            raise ValueError("element of iterable is not Integral") from None
+        # Out of range elements wrap around, but only Integral ones.
+        if not all(isinstance(i, Integral) for i in iterable) :
+            raise ValueError("element of iterable is not Integral")
+        return super().__new__(cls, cls.TYPECODE,
+                               [cls.ELEMENT(i) for i in iterable])
+
+    @classmethod
+    def frombuffer(cls, buffer: Union[bytes, bytearray,
+                                      memoryview]) -> "_NBTArray" :
+        RES: Final[_NBTArray] = super().__new__(cls, cls.TYPECODE)
+        RES.frombytes(buffer)
+        if sys.byteorder == "little" and RES.itemsize > 1 :
+            RES.byteswap()
+        return RES
+
+    def tobuffer(self) -> bytes :
+        if sys.byteorder == "big" or self.itemsize == 1 :
+            return self.tobytes()
+        SWAPPED: Final[array.array] = array.array(self.typecode, self)
+        SWAPPED.byteswap()
+        return SWAPPED.tobytes()
+
+    @classmethod
+    def fromnumpy(cls, ndarray: Any) -> "_NBTArray" :
+        """
+        Build an array from a one-dimensional integer numpy.ndarray of any
+        byte order. Out of range values wrap around like the element type.
+        """
+        NUMPY: Final[Any] = importlib.import_module("numpy")
+        if ndarray.ndim != 1 or ndarray.dtype.kind not in "biu" :
+            raise ValueError("expected a one-dimensional integer array")
+        RES: Final[_NBTArray] = super().__new__(cls, cls.TYPECODE)
+        RES.frombytes(NUMPY.ascontiguousarray(ndarray,
+                                              dtype=f"={cls.DTYPE[1:]}").\
+                      tobytes())
+        return RES
+
+    def tonumpy(self, bigendian: bool=False) -> Any :
+        """
+        Return the elements as a numpy.ndarray.
+
+        By default the result is a native-endian view sharing memory with
+        this array, which can't be resized while the view is alive. With
+        bigendian, a copy with the big-endian DTYPE is returned instead
+        (still a view on big-endian hosts).
+        """
+        NUMPY: Final[Any] = importlib.import_module("numpy")
+        VIEW: Final[Any] = NUMPY.frombuffer(self, dtype=f"={self.DTYPE[1:]}")
+        if bigendian and sys.byteorder == "little" and self.itemsize > 1 :
+            return VIEW.astype(self.DTYPE)
+        return VIEW
+
+    def _coerce(self, iterable: Iterable[Integral]) -> array.array :
+        try :
+            return array.array(self.typecode, iterable)
+        except (OverflowError, TypeError) :
+            raise ValueError from None
+
+    def __copy__(self) -> "_NBTArray" :
+        return type(self)(self)
+
+    def __deepcopy__(self, memo: Any) -> "_NBTArray" :
+        return type(self)(self)
+
+    def __eq__(self, value: object) -> bool :
+        if isinstance(value, list) :
+            return self.tolist() == value
+        return super().__eq__(value)
+
+    def __ne__(self, value: object) -> bool :
+        if isinstance(value, list) :
+            return self.tolist() != value
+        return super().__ne__(value)
 
     def __repr__(self) -> str :
-        return f"{self.__class__.__name__}({super().__repr__()})"
+        return f"{self.__class__.__name__}({self.tolist()!r})"
 
     def __str__(self) -> str :
-        return f"[B;{','.join(str(x) for x in self)}]"
+        return f"[{self.PREFIX};" \
+               f"{','.join(f'{x}{self.SUFFIX}' for x in self.tolist())}]"
+
+    @overload
+    def __getitem__(self, key: SupportsIndex) -> int :
+        pass
+    @overload
+    def __getitem__(self, key: slice) -> array.array :
+        pass
+    def __getitem__(self, key: Union[SupportsIndex, slice]) \
+    -> Union[int, array.array] :
+        # Elements are stored as plain ints; they are handed out as ELEMENT
+        # like the items of the list these arrays used to be.
+        ITEM: Final[Union[int, array.array]] = super().__getitem__(key)
+        return ITEM if isinstance(key, slice) else \
+               int.__new__(self.ELEMENT, ITEM)
+
+    def __iter__(self) -> Iterator[int] :
+        return map(functools.partial(int.__new__, self.ELEMENT),
+                   super().__iter__())
 
     def __setitem__(self, key: Any,
-                    value: Union[NBTByte, Iterable[NBTByte]]) -> None :
-        if not isinstance(value, NBTByte) :
-            for i in value :
-                if not builtins.isinstance(i, NBTByte) :
-                    raise ValueError
-        return super().__setitem__(key, value)
-
-    def append(self, object_: NBTByte) -> None :
-        if not builtins.isinstance(object_, NBTByte) :
-            raise ValueError
-        return super().append(object_)
-
-    def insert(self, index: SupportsIndex, object_: NBTByte) -> None :
-        if not builtins.isinstance(object_, NBTByte) :
-            raise ValueError
-        return super().insert(index, object_)
-
-    def extend(self, iterable: Iterable[NBTByte]) -> None:
-        for i in iterable :
-            if not builtins.isinstance(i, NBTByte) :
-                raise ValueError
-        return super().extend(iterable)
+                    value: Union[Integral, Iterable[Integral]]) -> None :
+        if isinstance(key, slice) :
+            return super().\
+                   __setitem__(key,
+                               self._coerce(cast(Iterable[Integral], value)))
+        try :
+            return super().__setitem__(key, value)
+        except (OverflowError, TypeError) :
+            raise ValueError from None
+
+    def append(self, object_: Integral) -> None :
+        try :
+            return super().append(object_)
+        except (OverflowError, TypeError) :
+            raise ValueError from None
+
+    def insert(self, index: SupportsIndex, object_: Integral) -> None :
+        try :
+            return super().insert(index, object_)
+        except (OverflowError, TypeError) :
+            raise ValueError from None
+
+    def extend(self, iterable: Iterable[Integral]) -> None :
+        return super().extend(self._coerce(iterable))
+
+class NBTByteArray(_NBTArray) :
+    __slots__ = ()
+
+    TYPECODE: str = "b"
+    ELEMENT: type = NBTByte
+    PREFIX: str = "B"
+    SUFFIX: str = "b"
+    DTYPE: str = ">i1"
 
 class NBTString(str) :
     def __new__(cls, object_: object="") -> "NBTString" :
@@ -166,16 +302,69 @@ class NBTString(str) :
     def __str__(self) -> str :
         return '"' + self.replace("\\", r"\\").replace('"', r'\"') + '"'
 
+def _changed(container: Any) -> None :
+    # Count a change of an NBTList or NBTCompound whose encoding may be
+    # cached, and of every list or compound whose cached encoding includes
+    # it.
+    STACK: Final[List[Any]] = [container]
+    while STACK :
+        CURRENT: Any = STACK.pop()
+        PARENTS: Optional[Dict[int, Any]] = CURRENT._parents
+        # A list or compound reached twice is counted once.
+        if PARENTS is None :
+            continue
+        CURRENT._version += 1
+        CURRENT._parents = None
+        for i in PARENTS.values() :
+            PARENT: Any = i()
+            if PARENT is not None and PARENT._parents is not None :
+                STACK.append(PARENT)
+
+def _changing(method: Callable[..., Any]) -> Callable[..., Any] :
+    # Wrap an inherited mutating method of list or dict so that calling it
+    # counts as a change, like calling the overridden ones.
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any :
+        if self._parents is not None :
+            _changed(self)
+        return method(self, *args, **kwargs)
+    return wrapper
+
 class NBTList(type([])) :
+    # While nbttagio.EncodeCache may hold an encoding of the list, _parents
+    # holds weak references to the lists and compounds whose cached
+    # encoding includes it, keyed by their id, and changes increment
+    # _version so that the cache can tell its entries are no longer valid.
+    # Otherwise _parents is None and changes cost nothing more.
+    _version: int = 0
+    _parents: Optional[Dict[int, Any]] = None
+
     def __init__(self, iterable: Iterable["NBTTag"]=()) -> None :
         super().__init__(iterable)
-        tagtype: Optional[NBTTagType] = None
-        for i in iterable :
-            if not builtins.isinstance(i, NBTTag) :
-                raise ValueError
-            if tagtype is None :
-                tagtype = i.type
-            elif tagtype != i.type :
+        if not isinstance(iterable, (NBTList, NBTPersistentList)) :
+            self._check(0)
+
+    @classmethod
+    def _make(cls, iterable: Iterable["NBTTag"]) -> "NBTList" :
+        # Unchecked construction from tags known to be of one type.
+        SELF: Final[NBTList] = list.__new__(cls)
+        list.extend(SELF, iterable)
+        return SELF
+
+    def __getstate__(self) -> None :
+        # What caches know of the list is not part of it.
+        return None
+
+    def _check(self, start: int) -> None :
+        # Check the items from start on, which are already in the list.
+        if len(self) <= start :
+            return
+        FIRST: Final[Any] = list.__getitem__(self, 0)
+        if not builtins.isinstance(FIRST, NBTTag) :
+            raise ValueError
+        TYPE: Final[NBTTagType] = FIRST.type
+        for i in self[start:] if start else self :
+            if not builtins.isinstance(i, NBTTag) or i.type != TYPE :
                 raise ValueError
 
     def __repr__(self) -> str :
@@ -187,6 +376,7 @@ class NBTList(type([])) :
     def __setitem__(self, key: Any,
                     value: Union["NBTTag", Iterable["NBTTag"]]) -> None :
         if not isinstance(value, NBTTag) :
+            value = list(value)
             for i in value :
                 if not builtins.isinstance(i, NBTTag) :
                     raise ValueError
@@ -194,6 +384,8 @@ class NBTList(type([])) :
                     raise ValueError
         elif self and self[0].type != value.type :
             raise ValueError
+        if self._parents is not None :
+            _changed(self)
         return super().__setitem__(key, value)
 
     def append(self, object_: "NBTTag") -> None :
@@ -201,6 +393,8 @@ class NBTList(type([])) :
             raise ValueError
         if self and self[0].type != object_.type :
             raise ValueError
+        if self._parents is not None :
+            _changed(self)
         return super().append(object_)
 
     def insert(self, index: SupportsIndex, object_: "NBTTag") -> None :
@@ -208,22 +402,42 @@ class NBTList(type([])) :
             raise ValueError
         if self and self[0].type != object_.type :
             raise ValueError
+        if self._parents is not None :
+            _changed(self)
         return super().insert(index, object_)
 
     def extend(self, iterable: Iterable["NBTTag"]) -> None:
-        for i in iterable :
-            if not builtins.isinstance(i, NBTTag) :
-                raise ValueError
-            if self and self[0].type != i.type :
-                raise ValueError
-        return super().extend(iterable)
+        LENGTH: Final[int] = len(self)
+        if self._parents is not None :
+            _changed(self)
+        super().extend(iterable)
+        try :
+            self._check(LENGTH)
+        except ValueError :
+            del self[LENGTH:]
+            raise
+
+    __delitem__ = _changing(list.__delitem__)
+    __iadd__ = _changing(list.__iadd__)
+    __imul__ = _changing(list.__imul__)
+    pop = _changing(list.pop)
+    remove = _changing(list.remove)
+    clear = _changing(list.clear)
+    sort = _changing(list.sort)
+    reverse = _changing(list.reverse)
 
 class NBTCompound(type({})) :
+    # Like those of NBTList.
+    _version: int = 0
+    _parents: Optional[Dict[int, Any]] = None
+
     def __init__(self,
                  obj: Union[Mapping[str, "NBTTag"],
                             Iterable[Iterable[Union[str,
                                                     "NBTTag"]]]]=()) -> None :
         getattr(super(), "__init__")(obj)
+        if isinstance(obj, (NBTCompound, NBTPersistentCompound)) :
+            return
         for k, v in self.items() :
             if not isinstance(k, str) :
                 raise ValueError
@@ -232,6 +446,19 @@ class NBTCompound(type({})) :
             if not isinstance(v, NBTTag) :
                 raise ValueError
 
+    def __getstate__(self) -> None :
+        # Like NBTList.__getstate__.
+        return None
+
+    @classmethod
+    def _make(cls,
+              obj: Union[Mapping[str, "NBTTag"],
+                         Iterable[Tuple[str, "NBTTag"]]]) -> "NBTCompound" :
+        # Unchecked construction from valid keys and tags.
+        SELF: Final[NBTCompound] = dict.__new__(cls)
+        dict.update(SELF, obj)
+        return SELF
+
     def __repr__(self) -> str :
         return f"{self.__class__.__name__}({super().__repr__()})"
 
@@ -261,6 +488,8 @@ class NBTCompound(type({})) :
             raise ValueError("string is with a length greater than 65535")
         if not isinstance(value, NBTTag) :
             raise ValueError
+        if self._parents is not None :
+            _changed(self)
         return super().__setitem__(key, value)
 
     def setdefault(self, key: str,
@@ -272,90 +501,709 @@ class NBTCompound(type({})) :
         if default is not None :
             if not isinstance(default, NBTTag) :
                 raise ValueError
+            if self._parents is not None :
+                _changed(self)
             return super().setdefault(key, default)
         return None
 
-class NBTIntArray([NBTInt()].__class__) :
-    def __init__(self, iterable: Iterable[Integral]=()) -> None :
-        super().__init__(())
-        for i in iterable :
-            if not builtins.isinstance(i, Integral) :
-                raise ValueError
-            self.append(NBTInt(i))
-
-    def __repr__(self) -> str :
-        return f"{self.__class__.__name__}({super().__repr__()})"
-
-    def __str__(self) -> str :
-        return f"[I;{','.join(str(x) for x in self)}]"
+    __delitem__ = _changing(dict.__delitem__)
+    pop = _changing(dict.pop)
+    popitem = _changing(dict.popitem)
+    clear = _changing(dict.clear)
+    update = _changing(dict.update)
+
+    def __ior__(self, other: Any) -> "NBTCompound" :
+        # dict.__ior__ is only there from Python 3.9 on.
+        self.update(other)
+        return self
+
+class NBTIntArray(_NBTArray) :
+    __slots__ = ()
+
+    TYPECODE: str = "i" if array.array("i").itemsize == 4 else "l"
+    ELEMENT: type = NBTInt
+    PREFIX: str = "I"
+    SUFFIX: str = ""
+    DTYPE: str = ">i4"
+
+class NBTLongArray(_NBTArray) :
+    __slots__ = ()
+
+    TYPECODE: str = "q"
+    ELEMENT: type = NBTLong
+    PREFIX: str = "L"
+    SUFFIX: str = "L"
+    DTYPE: str = ">i8"
+
+_HASH_MASK: Final[int] = (1 << 64) - 1
+_TRIE_BITS: Final[int] = 5
+_TRIE_WIDTH: Final[int] = 1 << _TRIE_BITS
+_TRIE_MASK: Final[int] = _TRIE_WIDTH - 1
+
+class _HAMTNode :
+    # A bitmap-indexed node of the hash array mapped trie behind
+    # NBTPersistentCompound. entries holds (key, value) pairs and subnodes
+    # in the order of their bits in bitmap. A node whose bitmap is -1 is a
+    # bucket of pairs whose hashes fully collide.
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: Tuple[Any, ...]) -> None :
+        self.bitmap: int = bitmap
+        self.entries: Tuple[Any, ...] = entries
+
+_EMPTY_HAMT: Final[_HAMTNode] = _HAMTNode(0, ())
+
+def _hamtpair(pair1: Tuple[str, Any], hash1: int,
+              pair2: Tuple[str, Any], hash2: int,
+              shift: int) -> _HAMTNode :
+    if shift >= 64 :
+        return _HAMTNode(-1, (pair1, pair2))
+    INDEX1: Final[int] = hash1 >> shift & _TRIE_MASK
+    INDEX2: Final[int] = hash2 >> shift & _TRIE_MASK
+    if INDEX1 == INDEX2 :
+        return _HAMTNode(1 << INDEX1, (_hamtpair(pair1, hash1, pair2, hash2,
+                                                 shift + _TRIE_BITS),))
+    return _HAMTNode(1 << INDEX1 | 1 << INDEX2,
+                     (pair1, pair2) if INDEX1 < INDEX2 else (pair2, pair1))
+
+def _hamtset(node: _HAMTNode, key: str, hash_: int, value: Any,
+             shift: int) -> Tuple[_HAMTNode, bool] :
+    # Return the node with key set to value, sharing every untouched
+    # subnode, and whether key is new.
+    ENTRIES: Final[Tuple[Any, ...]] = node.entries
+    if node.bitmap < 0 :
+        for i in range(len(ENTRIES)) :
+            if ENTRIES[i][0] == key :
+                if ENTRIES[i][1] is value :
+                    return node, False
+                return _HAMTNode(-1, ENTRIES[:i] + ((key, value),) + \
+                                     ENTRIES[i + 1:]), False
+        return _HAMTNode(-1, ENTRIES + ((key, value),)), True
+    BIT: Final[int] = 1 << (hash_ >> shift & _TRIE_MASK)
+    POS: Final[int] = bin(node.bitmap & (BIT - 1)).count("1")
+    if not node.bitmap & BIT :
+        return _HAMTNode(node.bitmap | BIT, ENTRIES[:POS] + ((key, value),) + \
+                                            ENTRIES[POS:]), True
+    ENTRY: Final[Any] = ENTRIES[POS]
+    added: bool = False
+    if type(ENTRY) is _HAMTNode :
+        new, added = _hamtset(ENTRY, key, hash_, value, shift + _TRIE_BITS)
+        if new is ENTRY :
+            return node, False
+    elif ENTRY[0] == key :
+        if ENTRY[1] is value :
+            return node, False
+        new = (key, value)
+    else :
+        new, added = _hamtpair(ENTRY, hash(ENTRY[0]) & _HASH_MASK,
+                               (key, value), hash_,
+                               shift + _TRIE_BITS), True
+    return _HAMTNode(node.bitmap, ENTRIES[:POS] + (new,) + \
+                                  ENTRIES[POS + 1:]), added
+
+def _hamtdelete(node: _HAMTNode, key: str, hash_: int,
+                shift: int) -> Optional[_HAMTNode] :
+    # Return the node without key, node itself if key is absent, or None if
+    # nothing is left.
+    ENTRIES: Final[Tuple[Any, ...]] = node.entries
+    if node.bitmap < 0 :
+        REST: Final[Tuple[Any, ...]] = tuple(i for i in ENTRIES \
+                                             if i[0] != key)
+        if len(REST) == len(ENTRIES) :
+            return node
+        return _HAMTNode(-1, REST) if REST else None
+    BIT: Final[int] = 1 << (hash_ >> shift & _TRIE_MASK)
+    if not node.bitmap & BIT :
+        return node
+    POS: Final[int] = bin(node.bitmap & (BIT - 1)).count("1")
+    ENTRY: Final[Any] = ENTRIES[POS]
+    if type(ENTRY) is _HAMTNode :
+        NEW: Final[Optional[_HAMTNode]] = \
+        _hamtdelete(ENTRY, key, hash_, shift + _TRIE_BITS)
+        if NEW is ENTRY :
+            return node
+        if NEW is not None :
+            # A lone pair moves up, so the trie stays as shallow as if the
+            # key had never been set.
+            return _HAMTNode(node.bitmap, ENTRIES[:POS] + \
+                                          (NEW.entries[0] \
+                                           if len(NEW.entries) == 1 and \
+                                           type(NEW.entries[0]) is not \
+                                           _HAMTNode else NEW,) + \
+                                          ENTRIES[POS + 1:])
+    elif ENTRY[0] != key :
+        return node
+    if node.bitmap == BIT :
+        return None
+    return _HAMTNode(node.bitmap & ~BIT, ENTRIES[:POS] + ENTRIES[POS + 1:])
+
+def _hamtget(node: _HAMTNode, key: str, hash_: int) -> Any :
+    # Return the value of key, or None if key is absent.
+    shift: int = 0
+    while 1 :
+        if node.bitmap < 0 :
+            for k, v in node.entries :
+                if k == key :
+                    return v
+            return None
+        BIT: int = 1 << (hash_ >> shift & _TRIE_MASK)
+        if not node.bitmap & BIT :
+            return None
+        ENTRY: Any = node.entries[bin(node.bitmap & (BIT - 1)).count("1")]
+        if type(ENTRY) is not _HAMTNode :
+            return ENTRY[1] if ENTRY[0] == key else None
+        node = ENTRY
+        shift += _TRIE_BITS
+
+def _compoundset(state: Tuple[_HAMTNode, int, "_EntryOrder"], key: str,
+                 value: "NBTTag") -> Tuple[_HAMTNode, int, "_EntryOrder"] :
+    # Return the root, length and entry order of NBTPersistentCompound
+    # state with key set to value. A new key goes last; an existing one
+    # keeps its place.
+    ROOT, LEN, ORDER = state
+    HASH: Final[int] = hash(key) & _HASH_MASK
+    OLD: Final[Optional[Tuple[int, NBTTag]]] = _hamtget(ROOT, key, HASH)
+    if OLD is None :
+        return _hamtset(ROOT, key, HASH, (len(ORDER), value), 0)[0], \
+               LEN + 1, ORDER.appended((key, value))
+    if OLD[1] is value :
+        return state
+    return _hamtset(ROOT, key, HASH, (OLD[0], value), 0)[0], LEN, \
+           ORDER.set(OLD[0], (key, value))
+
+def _checkitem(key: str, value: "NBTTag") -> None :
+    if not isinstance(key, str) :
+        raise ValueError
+    elif len(key) > 65535 :
+        raise ValueError("string is with a length greater than 65535")
+    if not isinstance(value, NBTTag) :
+        raise ValueError
 
-    def __setitem__(self, key: Any,
-                    value: Union[NBTInt, Iterable[NBTInt]]) -> None :
-        if not isinstance(value, NBTInt) :
-            for i in value :
-                if not builtins.isinstance(i, NBTInt) :
-                    raise ValueError
-        return super().__setitem__(key, value)
+def _digestsdiffer(container: Any, value: object) -> bool :
+    # Whether two persistent containers both keep a digest, and different
+    # ones, so that they can't be equal.
+    DIGEST: Final[Optional[bytes]] = getattr(value, "_digest", None)
+    return DIGEST is not None and container._digest is not None and \
+           type(value) in _PERSISTENT and DIGEST != container._digest
+
+class NBTPersistentCompound(collections.abc.Mapping) :
+    """
+    An immutable NBTCompound backed by a hash array mapped trie.
+
+    set, delete and updated return new compounds in O(log n), sharing all
+    untouched structure with this one, so keeping old versions is cheap.
+    Iteration follows insertion order, as that of NBTCompound does.
+    NBTCompound(persistent) and NBTPersistentCompound(compound) convert
+    between the two; use freeze and thaw to convert whole trees.
+    """
+
+    # _root maps each key to the position of its entry in _order and its
+    # tag. _order holds the (key, tag) entries in insertion order, with None
+    # in place of deleted ones. _digest is the digest kept by digest, or
+    # None.
+    __slots__ = ("_root", "_len", "_order", "_digest")
+
+    def __new__(cls,
+                obj: Union[Mapping[str, "NBTTag"],
+                           Iterable[Iterable[Union[str,
+                                                   "NBTTag"]]]]=()) \
+    -> "NBTPersistentCompound" :
+        if type(obj) is cls :
+            return cast(NBTPersistentCompound, obj)
+        return cls._make(_EMPTY_HAMT, 0, _EMPTY_ORDER).updated(obj)
+
+    @classmethod
+    def _make(cls, root: _HAMTNode, len_: int,
+              order: "_EntryOrder") -> "NBTPersistentCompound" :
+        SELF: Final[NBTPersistentCompound] = object.__new__(cls)
+        SELF._root = root
+        SELF._len = len_
+        SELF._order = order
+        SELF._digest = None
+        return SELF
 
-    def append(self, object_: NBTInt) -> None :
-        if not builtins.isinstance(object_, NBTInt) :
-            raise ValueError
-        return super().append(object_)
+    def __repr__(self) -> str :
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
 
-    def insert(self, index: SupportsIndex, object_: NBTInt) -> None :
-        if not builtins.isinstance(object_, NBTInt) :
-            raise ValueError
-        return super().insert(index, object_)
+    __str__ = NBTCompound.__str__
 
-    def extend(self, iterable: Iterable[NBTInt]) -> None:
-        for i in iterable :
-            if not builtins.isinstance(i, NBTInt) :
-                raise ValueError
-        return super().extend(iterable)
+    def __len__(self) -> int :
+        return self._len
 
-class NBTLongArray([NBTLong()].__class__) :
-    def __init__(self, iterable: Iterable[Integral]=()) -> None :
-        super().__init__(())
-        for i in iterable :
-            if not builtins.isinstance(i, Integral) :
+    def __eq__(self, value: object) -> bool :
+        if _digestsdiffer(self, value) :
+            return False
+        return super().__eq__(value)
+
+    __hash__ = None # type: ignore
+
+    def __iter__(self) -> Iterator[str] :
+        for k, _ in self.items() :
+            yield k
+
+    def __getitem__(self, key: str) -> "NBTTag" :
+        VALUE: Final[Optional[NBTTag]] = self.get(key)
+        if VALUE is None :
+            raise KeyError(key)
+        return VALUE
+
+    def __contains__(self, key: object) -> bool :
+        return isinstance(key, str) and \
+               _hamtget(self._root, key, hash(key) & _HASH_MASK) is not None
+
+    def get(self, key: str,
+            default: Optional["NBTTag"]=None) -> Optional["NBTTag"] :
+        ENTRY: Final[Optional[Tuple[int, NBTTag]]] = \
+        _hamtget(self._root, key, hash(key) & _HASH_MASK)
+        return default if ENTRY is None else ENTRY[1]
+
+    def items(self) -> Iterator[Tuple[str, "NBTTag"]] : # type: ignore
+        for i in self._order :
+            if i is not None :
+                yield i
+
+    def set(self, key: str, value: "NBTTag") -> "NBTPersistentCompound" :
+        _checkitem(key, value)
+        STATE: Final[Tuple[_HAMTNode, int, _EntryOrder]] = \
+        _compoundset((self._root, self._len, self._order), key, value)
+        return self if STATE[0] is self._root else self._make(*STATE)
+
+    def delete(self, key: str) -> "NBTPersistentCompound" :
+        HASH: Final[int] = hash(key) & _HASH_MASK \
+                           if isinstance(key, str) else 0
+        OLD: Final[Optional[Tuple[int, NBTTag]]] = \
+        _hamtget(self._root, key, HASH) if isinstance(key, str) else None
+        if OLD is None :
+            raise KeyError(key)
+        ROOT: Final[Optional[_HAMTNode]] = _hamtdelete(self._root, key, HASH,
+                                                       0)
+        LEN: Final[int] = self._len - 1
+        order: _EntryOrder = self._order.set(OLD[0], None)
+        while order and order[-1] is None :
+            order = order.popped()
+        if len(order) > 2 * LEN + _TRIE_WIDTH :
+            # Deleted entries are dropped once they outnumber the others,
+            # so that iterating stays linear in the length.
+            return self._make(_EMPTY_HAMT, 0, _EMPTY_ORDER).updated(
+                i for i in order if i is not None
+            )
+        return self._make(_EMPTY_HAMT if ROOT is None else ROOT, LEN, order)
+
+    def updated(self,
+                obj: Union[Mapping[str, "NBTTag"],
+                           Iterable[Iterable[Union[str, "NBTTag"]]]]) \
+    -> "NBTPersistentCompound" :
+        state: Tuple[_HAMTNode, int, _EntryOrder] = \
+        (self._root, self._len, self._order)
+        for k, v in cast(Iterable[Tuple[str, NBTTag]],
+                         obj.items() if isinstance(obj, Mapping) else obj) :
+            _checkitem(k, v)
+            state = _compoundset(state, k, v)
+        return self if state[0] is self._root else self._make(*state)
+
+    def tocompound(self) -> NBTCompound :
+        return NBTCompound._make(self.items())
+
+class NBTPersistentList(collections.abc.Sequence) :
+    """
+    An immutable NBTList backed by a 32-way bit-partitioned trie.
+
+    set, appended and popped return new lists in O(log n), sharing all
+    untouched structure with this one; inserted and delete rebuild the list.
+    None of them is named like a list method, so that they can't be taken
+    for changing the list in place.
+    NBTList(persistent) and NBTPersistentList(list) convert between the
+    two; use freeze and thaw to convert whole trees.
+    """
+
+    # _digest is the digest kept by digest, or None.
+    __slots__ = ("_len", "_shift", "_root", "_tail", "_digest")
+
+    def __new__(cls, iterable: Iterable["NBTTag"]=()) -> "NBTPersistentList" :
+        if type(iterable) is cls :
+            return cast(NBTPersistentList, iterable)
+        ITEMS: Final[Tuple[NBTTag, ...]] = tuple(iterable)
+        for i in ITEMS :
+            if not isinstance(i, NBTTag) or i.type != ITEMS[0].type :
                 raise ValueError
-            self.append(NBTLong(i))
+        TAILOFF: Final[int] = (len(ITEMS) - 1) & ~_TRIE_MASK \
+                              if len(ITEMS) > _TRIE_WIDTH else 0
+        nodes: Tuple[Any, ...] = tuple(ITEMS[i:i + _TRIE_WIDTH] \
+                                       for i in range(0, TAILOFF,
+                                                      _TRIE_WIDTH))
+        shift: int = _TRIE_BITS
+        while len(nodes) > _TRIE_WIDTH :
+            nodes = tuple(nodes[i:i + _TRIE_WIDTH] \
+                          for i in range(0, len(nodes), _TRIE_WIDTH))
+            shift += _TRIE_BITS
+        return cls._make(len(ITEMS), shift, nodes, ITEMS[TAILOFF:])
+
+    @classmethod
+    def _make(cls, len_: int, shift: int, root: Tuple[Any, ...],
+              tail: Tuple["NBTTag", ...]) -> "NBTPersistentList" :
+        SELF: Final[NBTPersistentList] = object.__new__(cls)
+        SELF._len = len_
+        SELF._shift = shift
+        SELF._root = root
+        SELF._tail = tail
+        SELF._digest = None
+        return SELF
 
     def __repr__(self) -> str :
-        return f"{self.__class__.__name__}({super().__repr__()})"
+        return f"{self.__class__.__name__}({list(self)!r})"
 
-    def __str__(self) -> str :
-        return f"[L;{','.join(str(x) for x in self)}]"
+    __str__ = NBTList.__str__
 
-    def __setitem__(self, key: Any,
-                    value: Union[NBTLong, Iterable[NBTLong]]) -> None :
-        if not isinstance(value, NBTLong) :
-            for i in value :
-                if not builtins.isinstance(i, NBTLong) :
-                    raise ValueError
-        return super().__setitem__(key, value)
+    def __len__(self) -> int :
+        return self._len
 
-    def append(self, object_: NBTLong) -> None :
-        if not builtins.isinstance(object_, NBTLong) :
-            raise ValueError
-        return super().append(object_)
+    def __iter__(self) -> Iterator["NBTTag"] :
+        STACK: Final[List[Iterator[Any]]] = [iter(self._root)]
+        while STACK :
+            NODE: Any = next(STACK[-1], None)
+            if NODE is None :
+                STACK.pop()
+            elif len(STACK) < self._shift // _TRIE_BITS :
+                STACK.append(iter(NODE))
+            else :
+                yield from NODE
+        yield from self._tail
 
-    def insert(self, index: SupportsIndex, object_: NBTLong) -> None :
-        if not builtins.isinstance(object_, NBTLong) :
+    def __eq__(self, value: object) -> bool :
+        if isinstance(value, (list, NBTPersistentList)) :
+            if _digestsdiffer(self, value) :
+                return False
+            return len(self) == len(value) and \
+                   all(i == j for i, j in zip(self, value))
+        return NotImplemented
+
+    def __ne__(self, value: object) -> bool :
+        EQ: Final[Any] = self.__eq__(value)
+        return EQ if EQ is NotImplemented else not EQ
+
+    __hash__ = None # type: ignore
+
+    def _index(self, index: SupportsIndex) -> int :
+        INDEX: Final[int] = index.__index__()
+        if not -self._len <= INDEX < self._len :
+            raise IndexError("list index out of range")
+        return INDEX + self._len if INDEX < 0 else INDEX
+
+    def _tailoff(self) -> int :
+        return self._len - len(self._tail)
+
+    @overload
+    def __getitem__(self, key: SupportsIndex) -> "NBTTag" :
+        pass
+    @overload
+    def __getitem__(self, key: slice) -> "NBTPersistentList" :
+        pass
+    def __getitem__(self, key: Union[SupportsIndex, slice]) \
+    -> Union["NBTTag", "NBTPersistentList"] :
+        if isinstance(key, slice) :
+            return NBTPersistentList(tuple(self)[key])
+        INDEX: Final[int] = self._index(key)
+        if INDEX >= self._tailoff() :
+            return self._tail[INDEX - self._tailoff()]
+        node: Any = self._root
+        level: int = self._shift
+        while level > 0 :
+            node = node[INDEX >> level & _TRIE_MASK]
+            level -= _TRIE_BITS
+        return node[INDEX & _TRIE_MASK]
+
+    def _check(self, value: "NBTTag") -> None :
+        if not isinstance(value, NBTTag) :
+            raise ValueError
+        if self._len and self[0].type != value.type :
             raise ValueError
-        return super().insert(index, object_)
 
-    def extend(self, iterable: Iterable[NBTLong]) -> None:
+    def set(self, index: SupportsIndex,
+            value: "NBTTag") -> "NBTPersistentList" :
+        INDEX: Final[int] = self._index(index)
+        self._check(value)
+        TAILOFF: Final[int] = self._tailoff()
+        if INDEX >= TAILOFF :
+            return self._make(self._len, self._shift, self._root,
+                              self._tail[:INDEX - TAILOFF] + (value,) + \
+                              self._tail[INDEX - TAILOFF + 1:])
+        def SET(node: Tuple[Any, ...], level: int) -> Tuple[Any, ...] :
+            POS: Final[int] = INDEX >> level & _TRIE_MASK
+            return node[:POS] + \
+                   (SET(node[POS], level - _TRIE_BITS) if level else value,) \
+                   + node[POS + 1:]
+        return self._make(self._len, self._shift, SET(self._root,
+                                                      self._shift),
+                          self._tail)
+
+    def appended(self, value: "NBTTag") -> "NBTPersistentList" :
+        self._check(value)
+        if len(self._tail) < _TRIE_WIDTH :
+            return self._make(self._len + 1, self._shift, self._root,
+                              self._tail + (value,))
+        # The full tail moves into the trie, which grows one level when the
+        # root is full.
+        def PATH(level: int) -> Any :
+            return self._tail if level == 0 else (PATH(level - _TRIE_BITS),)
+        def PUSH(node: Tuple[Any, ...], level: int) -> Tuple[Any, ...] :
+            POS: Final[int] = (self._len - 1) >> level & _TRIE_MASK
+            if level == _TRIE_BITS :
+                return node + (self._tail,)
+            if POS < len(node) :
+                return node[:POS] + (PUSH(node[POS], level - _TRIE_BITS),) \
+                       + node[POS + 1:]
+            return node + (PATH(level - _TRIE_BITS),)
+        if self._len >> _TRIE_BITS > 1 << self._shift :
+            return self._make(self._len + 1, self._shift + _TRIE_BITS,
+                              (self._root, PATH(self._shift)), (value,))
+        return self._make(self._len + 1, self._shift,
+                          PUSH(self._root, self._shift), (value,))
+
+    def extended(self, iterable: Iterable["NBTTag"]) -> "NBTPersistentList" :
+        result: NBTPersistentList = self
         for i in iterable :
-            if not builtins.isinstance(i, NBTLong) :
-                raise ValueError
-        return super().extend(iterable)
+            result = result.appended(i)
+        return result
+
+    def popped(self) -> "NBTPersistentList" :
+        if not self._len :
+            raise IndexError("pop from empty list")
+        if len(self._tail) > 1 or self._len == 1 :
+            return self._make(self._len - 1, self._shift, self._root,
+                              self._tail[:-1])
+        # The last leaf of the trie becomes the tail, and the root loses a
+        # level when only one child is left.
+        def POP(node: Tuple[Any, ...],
+                level: int) -> Tuple[Optional[Tuple[Any, ...]], Any] :
+            if level == 0 :
+                return None, node
+            REST, LEAF = POP(node[-1], level - _TRIE_BITS)
+            NEW: Final[Tuple[Any, ...]] = \
+            node[:-1] if REST is None else node[:-1] + (REST,)
+            return NEW or None, LEAF
+        ROOT, LEAF = POP(self._root, self._shift)
+        root: Tuple[Any, ...] = ROOT or ()
+        shift: int = self._shift
+        if shift > _TRIE_BITS and len(root) == 1 :
+            root = root[0]
+            shift -= _TRIE_BITS
+        return self._make(self._len - 1, shift, root, LEAF)
+
+    def inserted(self, index: SupportsIndex,
+                 value: "NBTTag") -> "NBTPersistentList" :
+        ITEMS: Final[List[NBTTag]] = list(self)
+        ITEMS.insert(index, value)
+        return NBTPersistentList(ITEMS)
+
+    def delete(self, index: SupportsIndex) -> "NBTPersistentList" :
+        INDEX: Final[int] = self._index(index)
+        if INDEX == self._len - 1 :
+            return self.popped()
+        ITEMS: Final[List[NBTTag]] = list(self)
+        del ITEMS[INDEX]
+        return NBTPersistentList(ITEMS)
+
+    def tolist(self) -> NBTList :
+        return NBTList._make(self)
+
+class _EntryOrder(NBTPersistentList) :
+    # The entries of an NBTPersistentCompound in insertion order, which
+    # may be anything.
+    __slots__ = ()
+
+    def _check(self, value: Any) -> None :
+        pass
+
+_EMPTY_ORDER: Final[_EntryOrder] = _EntryOrder._make(0, _TRIE_BITS, (), ())
+
+def _rebuild(tag: "NBTTag", persistent: bool) -> "NBTTag" :
+    # Rebuild the lists and compounds of tag bottom-up, as persistent ones
+    # keeping those already persistent, or as mutable copies. Each frame
+    # is whether it is a compound, an iterator over its entries, the
+    # rebuilt entries, and the key of the entry being rebuilt.
+    STACK: Final[List[List[Any]]] = []
+    current: NBTTag = tag
+    while 1 :
+        TYPE: NBTTagType = tuple.__getitem__(current, 0)
+        VIEW: Any = tuple.__getitem__(current, 1)
+        result: Optional[NBTTag] = None
+        if TYPE != NBTTagType.TAG_List and TYPE != NBTTagType.TAG_Compound :
+            # Arrays are copied either way, so that the result shares
+            # nothing mutable with tag.
+            result = current if persistent and \
+                                type(VIEW) not in _MUTABLE_PAYLOADS \
+                     else NBTTag(VIEW)
+        elif persistent and type(VIEW) in _PERSISTENT :
+            result = current
+        elif TYPE == NBTTagType.TAG_Compound :
+            STACK.append([True, iter(VIEW.items()), [], None])
+        else :
+            STACK.append([False, iter(VIEW), [], None])
+        while STACK :
+            FRAME: List[Any] = STACK[-1]
+            if result is not None :
+                FRAME[2].append((FRAME[3], result) if FRAME[0] else result)
+            ENTRY: Any = next(FRAME[1], None)
+            if ENTRY is not None :
+                if FRAME[0] :
+                    FRAME[3], current = ENTRY
+                else :
+                    current = ENTRY
+                break
+            STACK.pop()
+            if FRAME[0] :
+                result = NBTTag._make(NBTTagType.TAG_Compound,
+                                      NBTPersistentCompound(FRAME[2]) \
+                                      if persistent else \
+                                      NBTCompound._make(FRAME[2]))
+            else :
+                result = NBTTag._make(NBTTagType.TAG_List,
+                                      NBTPersistentList(FRAME[2]) \
+                                      if persistent else \
+                                      NBTList._make(FRAME[2]))
+        else :
+            return cast(NBTTag, result)
+
+def freeze(tag: "NBTTag") -> "NBTTag" :
+    """
+    Return tag with every list and compound in it persistent.
+
+    Persistent containers already in tag are kept as they are, so freezing
+    a tree edited through set and appended is cheap. Arrays elsewhere are
+    copied, so that changing those of tag leaves the result alone.
+    """
+    return _rebuild(tag, True)
+
+def thaw(tag: "NBTTag") -> "NBTTag" :
+    """
+    Return a mutable copy of tag, with every list and compound in it an
+    NBTList or NBTCompound.
+    """
+    return _rebuild(tag, False)
+
+_PERSISTENT: Final[FrozenSet[type]] = frozenset((NBTPersistentList,
+                                                NBTPersistentCompound))
+_DIGEST_SIZE: Final[int] = 16
+_DIGEST_LENGTH: Final[struct.Struct] = struct.Struct(">I")
+_DIGEST_SCALARS: Final[Dict[NBTTagType, struct.Struct]] = {
+    NBTTagType.TAG_Byte: struct.Struct(">b"),
+    NBTTagType.TAG_Short: struct.Struct(">h"),
+    NBTTagType.TAG_Int: struct.Struct(">i"),
+    NBTTagType.TAG_Long: struct.Struct(">q"),
+    NBTTagType.TAG_Float: struct.Struct(">f"),
+    NBTTagType.TAG_Double: struct.Struct(">d")
+}
+
+def _digestleaf(buf: bytearray, tag: "NBTTag") -> None :
+    # Append the canonical form of tag, which is no list or compound, to
+    # buf.
+    TYPE: Final[NBTTagType] = tuple.__getitem__(tag, 0)
+    PAYLOAD: Final[Any] = tuple.__getitem__(tag, 1)
+    buf.append(cast(int, TYPE.value))
+    SCALAR: Final[Optional[struct.Struct]] = _DIGEST_SCALARS.get(TYPE)
+    if SCALAR is not None :
+        # Adding 0 turns -0.0, which equals 0.0, into 0.0.
+        buf += SCALAR.pack(PAYLOAD + 0)
+    elif TYPE == NBTTagType.TAG_String :
+        ENCODED: Final[bytes] = PAYLOAD.encode("utf-8", "surrogatepass")
+        buf += _DIGEST_LENGTH.pack(len(ENCODED))
+        buf += ENCODED
+    elif TYPE != NBTTagType.TAG_End :
+        buf += _DIGEST_LENGTH.pack(len(PAYLOAD))
+        buf += PAYLOAD.tobuffer()
+
+def _digest(container: Any) -> Tuple[bytes, bool] :
+    # Return the digest of a list or compound, and whether nothing in it is
+    # a mutable list or compound, in which case a persistent one keeps it.
+    # The canonical form of a list or compound has the digests of the
+    # lists and compounds in it in place of their contents, so they are
+    # digested bottom-up. Each frame is a container being digested, an
+    # iterator over its entries, its canonical form so far, and whether
+    # nothing in it is mutable yet.
+    STACK: Final[List[List[Any]]] = []
+    current: Any = container
+    while 1 :
+        result: Optional[Tuple[bytes, bool]] = None
+        PERSISTENT: bool = type(current) in _PERSISTENT
+        if PERSISTENT and current._digest is not None :
+            result = current._digest, True
+        else :
+            BUF: bytearray = bytearray()
+            COMPOUND: bool = isinstance(current, (NBTCompound,
+                                                  NBTPersistentCompound))
+            BUF.append(NBTTagType.TAG_Compound.value if COMPOUND else \
+                       NBTTagType.TAG_List.value)
+            BUF += _DIGEST_LENGTH.pack(len(current))
+            # Keys are unique, so the tags are never compared.
+            STACK.append([current, iter(sorted(current.items())) \
+                                   if COMPOUND else iter(current), BUF,
+                          PERSISTENT, COMPOUND])
+        while STACK :
+            FRAME: List[Any] = STACK[-1]
+            BUF = FRAME[2]
+            if result is not None :
+                BUF += result[0]
+                if not result[1] :
+                    FRAME[3] = False
+                result = None
+            for ENTRY in FRAME[1] :
+                if FRAME[4] :
+                    ENCODED: bytes = ENTRY[0].encode("utf-8",
+                                                     "surrogatepass")
+                    BUF += _DIGEST_LENGTH.pack(len(ENCODED))
+                    BUF += ENCODED
+                    ENTRY = ENTRY[1]
+                TYPE: NBTTagType = tuple.__getitem__(ENTRY, 0)
+                if TYPE == NBTTagType.TAG_List or \
+                   TYPE == NBTTagType.TAG_Compound :
+                    BUF.append(cast(int, TYPE.value))
+                    current = tuple.__getitem__(ENTRY, 1)
+                    break
+                _digestleaf(BUF, ENTRY)
+            else :
+                STACK.pop()
+                DIGEST: bytes = hashlib.blake2b(
+                    BUF, digest_size=_DIGEST_SIZE
+                ).digest()
+                if FRAME[3] :
+                    FRAME[0]._digest = DIGEST
+                result = DIGEST, FRAME[3]
+                continue
+            break
+        else :
+            return cast(Tuple[bytes, bool], result)
+
+def digest(tag: "NBTTag") -> bytes :
+    """
+    Return a 16-byte BLAKE2b digest of a canonical form of tag.
+
+    Equal tags have the same digest, whether their lists and compounds are
+    persistent or not, in any process; tags with different digests are
+    never equal. Persistent lists and compounds with no mutable ones in
+    them keep their digest, so a frozen tree is hashed once, and comparing
+    two hashed ones that differ is immediate. Arrays in a frozen tree must
+    then not be changed in place through view.
+    """
+    if tag.type == NBTTagType.TAG_List or tag.type == NBTTagType.TAG_Compound :
+        return _digest(tag.view)[0]
+    BUF: Final[bytearray] = bytearray()
+    _digestleaf(BUF, tag)
+    return hashlib.blake2b(BUF, digest_size=_DIGEST_SIZE).digest()
 
 NBT_TAG_TYPE_CONSTRUCTOR: Final[Tuple[type, ...]] = \
 (type(None), NBTByte, NBTShort, NBTInt, NBTLong, NBTFloat, NBTDouble,
  NBTByteArray, NBTString, NBTList, NBTCompound, NBTIntArray,
  NBTLongArray)
 
+_TAG_TYPES: Final[Dict[type, NBTTagType]] = {
+    **{j: NBTTagType(i) for i, j in enumerate(NBT_TAG_TYPE_CONSTRUCTOR)},
+    NBTPersistentList: NBTTagType.TAG_List,
+    NBTPersistentCompound: NBTTagType.TAG_Compound
+}
+_MUTABLE_PAYLOADS: Final[FrozenSet[type]] = frozenset((
+    NBTByteArray, NBTList, NBTCompound, NBTIntArray, NBTLongArray
+))
+
 class NBTTag((NBTTagType(0), (None, NBTByte(), NBTShort(), NBTInt(), NBTLong(),
                               NBTFloat(), NBTDouble(), NBTByteArray(),
                               NBTString(), NBTList(), NBTCompound(),
@@ -363,7 +1211,7 @@ class NBTTag((NBTTagType(0), (None, NBTByte(), NBTShort(), NBTInt(), NBTLong(),
                               NBTLongArray())[len("")]).__class__) :
     @property
     def type(self) -> NBTTagType :
-        return self[0]
+        return tuple.__getitem__(self, 0)
 
     @property
     def value(self) -> Union[None, NBTByte, NBTShort, NBTInt, NBTLong,NBTFloat,
@@ -371,35 +1219,70 @@ class NBTTag((NBTTagType(0), (None, NBTByte(), NBTShort(), NBTInt(), NBTLong(),
                              NBTCompound, NBTIntArray, NBTLongArray] :
         return self[1]
 
+    @property
+    def view(self) -> Union[None, NBTByte, NBTShort, NBTInt, NBTLong, NBTFloat,
+                            NBTDouble, NBTByteArray, NBTString, NBTList,
+                            NBTCompound, NBTIntArray, NBTLongArray] :
+        """
+        The stored payload itself, without the copy made by value.
+
+        The result is borrowed: mutating it mutates this tag and every tag
+        sharing the same payload.
+        """
+        return tuple.__getitem__(self, 1)
+
     def __new__(cls, arg: Union[NBTTagType, None, NBTByte, NBTShort, NBTInt,
                                 NBTLong, NBTFloat, NBTDouble, NBTByteArray,
                                 NBTString, NBTList, NBTCompound, NBTIntArray,
                                 NBTLongArray]) -> "NBTTag" :
+        CLASS: Final[type] = type(arg)
+        TYPE: Final[Optional[NBTTagType]] = _TAG_TYPES.get(CLASS)
+        if TYPE is not None :
+            return tuple.__new__(cls, (TYPE, CLASS(arg) \
+                                             if CLASS in _MUTABLE_PAYLOADS \
+                                             else arg))
         if isinstance(arg, NBTTagType) :
             return super().__new__(cls, (arg, NBT_TAG_TYPE_CONSTRUCTOR\
                                               [cast(int, arg.value)]()))
+        elif isinstance(arg, NBTPersistentList) :
+            return super().__new__(cls, (NBTTagType.TAG_List, arg))
+        elif isinstance(arg, NBTPersistentCompound) :
+            return super().__new__(cls, (NBTTagType.TAG_Compound, arg))
         else :
             for i in range(len(NBT_TAG_TYPE_CONSTRUCTOR)) :
                 if isinstance(arg, NBT_TAG_TYPE_CONSTRUCTOR[i]) :
                     return super().__new__(cls, (NBTTagType(i),
                                                  arg if arg is None else \
                                                  type(arg)(cast(Any, arg))))
+            if type(arg).__module__ == "numpy" and \
+               getattr(arg, "ndim", None) == 1 :
+                for i in (NBTByteArray, NBTIntArray, NBTLongArray) :
+                    if cast(Any, arg).dtype.itemsize == \
+                       array.array(i.TYPECODE).itemsize :
+                        return cls(i.fromnumpy(arg))
         raise ValueError
 
+    @classmethod
+    def _make(cls, tagtype: NBTTagType, payload: Any) -> "NBTTag" :
+        # Trusted construction: payload must be an instance of the class of
+        # tagtype that nothing else holds, as it is neither checked nor
+        # copied.
+        return tuple.__new__(cls, (tagtype, payload))
+
     def __repr__(self) -> str :
-        return f"{self.__class__.__name__}({self.value!r})"
+        return f"{self.__class__.__name__}({self.view!r})"
 
     def __str__(self) -> str :
-        return f"{self.value!s}"
+        return f"{self.view!s}"
 
     def __eq__(self, value: object) -> bool :
         if isinstance(value, NBTTag) :
-            return self.type == value.type and self.value == value.value
+            return self.type == value.type and self.view == value.view
         return False
 
     def __ne__(self, value: object) -> bool :
         if isinstance(value, NBTTag) :
-            return self.type != value.type or self.value != value.value
+            return self.type != value.type or self.view != value.view
         return True
 
     def __getitem__(self,
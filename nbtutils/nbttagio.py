@@ -1,129 +1,1159 @@
-__all__ = ["writetostream", "writesnbttostream"]
+__all__ = ["readfromstream", "loads", "readpathsfromstream", "loadpaths",
+           "writetostream", "dumps",
+           "writesnbttostream", "dumpsnbt", "readsnbtfromstream", "loadsnbt",
+           "iterreadsnbtfromstream", "InternTable", "EncodeCache"]
 
+import codecs
+from collections import OrderedDict
+import functools
+import itertools
+import re
 import struct
+import sys
+import weakref
 
-from io import BufferedIOBase
-from typing import Final, Iterator, List, Tuple, cast
+from io import BufferedIOBase, TextIOBase
+from typing import Any, Callable, Dict, Final, FrozenSet, Iterable, \
+                   Iterator, List, Match, Optional, Pattern, Sequence, \
+                   Tuple, TypeVar, Union, cast
 
-from .nbttag import NBTByteArray, NBTCompound, NBTIntArray, NBTList, NBTLongArray, NBTString, NBTTag, NBTTagType
+from .datacommand import data
+from .mutf8 import IncrementalDecoder, _combinesurrogates, decode, encode
+from .nbtpath import NBTPath, _pathtree
+from .nbttag import NBTByte, NBTByteArray, NBTCompound, NBTDouble, NBTFloat, \
+                    NBTInt, NBTIntArray, NBTList, NBTLong, NBTLongArray, \
+                    NBTShort, NBTString, NBTTag, NBTTagType, \
+                    NBT_TAG_TYPE_CONSTRUCTOR
 
 EOF_REACH_MSG: Final[str] = "Stream reached EOF before the payload's end"
 
-def _format_name(name: str) -> bytes :
-    if not name :
-        return b'""'
-    RES: Final[List[bytes]] = []
-    if name.strip("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-                  "abcdefghijklmnopqrstuvwxyz_-.+") :
-        name = '"' + name.replace("\\", r"\\").replace('"', r'\"') + '"'
-    for i in name :
-        RES.append(bytes((0xed, ord(i)>>6&63|128, ord(i)&63|128)) \
-                   if "\ud7ff" < i < "\ue000" else i.encode())
-    return b"".join(RES)
-
-def writetostream(tag: NBTTag, stream: BufferedIOBase) -> int :
-    if tag.type == NBTTagType.TAG_End :
-        return 0
-    if tag.type == NBTTagType.TAG_Byte :
-        return stream.write(struct.pack(">b", tag.value))
-    if tag.type == NBTTagType.TAG_Short :
-        return stream.write(struct.pack(">h", tag.value))
-    if tag.type == NBTTagType.TAG_Int :
-        return stream.write(struct.pack(">i", tag.value))
-    if tag.type == NBTTagType.TAG_Long :
-        return stream.write(struct.pack(">l", tag.value))
-    if tag.type == NBTTagType.TAG_Float :
-        return stream.write(struct.pack(">f", tag.value))
-    if tag.type == NBTTagType.TAG_Double :
-        return stream.write(struct.pack(">d", tag.value))
-    if tag.type == NBTTagType.TAG_Byte_Array :
-        return stream.\
-               write(struct.pack(f">i{len(cast(NBTByteArray, tag.value))}s",
-                                 len(cast(NBTByteArray, tag.value)),
-                                 bytes(cast(NBTByteArray, tag.value))))
-    if tag.type == NBTTagType.TAG_String :
-        BYTES: Final[bytes] = \
-        b"".join(bytes((0xed, ord(i)>>6&63|128, ord(i)&63|128)) \
-                 if "\ud7ff" < i < "\ue000" else i.encode() \
-                 for i in cast(NBTString, tag.value))
-        return stream.write(struct.pack(f">H{len(BYTES)}s", len(BYTES), BYTES))
-    if tag.type == NBTTagType.TAG_List :
-        if tag.value :
-            return stream.write(bytes((cast(NBTTagType,
-                                            cast(NBTList,
-                                                 tag.value)[0].type).value,)))\
-                 + stream.write(struct.pack(">i", len(cast(NBTList,
-                                                           tag.value)))) + \
-                   sum(writetostream(i, stream) for i in cast(NBTList,
-                                                              tag.value))
-        return stream.write(bytes((NBTTagType.TAG_End.value, 0, 0, 0, 0)))
-    if tag.type == NBTTagType.TAG_Compound :
-        return sum(stream.write(bytes((cast(NBTCompound,
-                                            tag.value)[i].type.value,)))+\
-                   writetostream(NBTTag(NBTString(i)), stream)+\
-                   writetostream(cast(NBTCompound, tag.value)[i], stream)\
-                   for i in cast(NBTCompound, tag.value)) + \
-               stream.write(bytes((NBTTagType.TAG_End.value,)))
-    if tag.type == NBTTagType.TAG_Int_Array :
-        return stream.\
-               write(struct.pack(f">i{len(cast(NBTIntArray, tag.value))*4}s",
-                                 len(cast(NBTIntArray, tag.value)),
-                                 b"".join(i.to_bytes(4, "big",signed=True) for\
-                                          i in cast(NBTIntArray, tag.value))))
-    if tag.type == NBTTagType.TAG_Long_Array :
-        return stream.\
-               write(struct.pack(f">i{len(cast(NBTLongArray, tag.value))*8}s",
-                                 len(cast(NBTLongArray, tag.value)),
-                                 b"".join(i.to_bytes(8, "big",signed=True) for\
-                                          i in cast(NBTLongArray, tag.value))))
-    raise ValueError
-
-def writesnbttostream(tag: NBTTag, stream: BufferedIOBase) -> int :
-    if tag.type == NBTTagType.TAG_End :
+DEPTH_EXCEED_MSG: Final[str] = "Tag nesting depth exceeds the limit"
+
+MAX_DEPTH: Final[int] = 512
+READ_CHUNK_SIZE: Final[int] = 1 << 16
+INTERN_TABLE_SIZE: Final[int] = 1 << 16
+INTERN_MAX_LENGTH: Final[int] = 64
+SNBT_FLUSH_SIZE: Final[int] = 1 << 16
+ENCODE_CACHE_SIZE: Final[int] = 1 << 26
+
+_BYTE: Final[struct.Struct] = struct.Struct(">b")
+_SHORT: Final[struct.Struct] = struct.Struct(">h")
+_USHORT: Final[struct.Struct] = struct.Struct(">H")
+_INT: Final[struct.Struct] = struct.Struct(">i")
+_LONG: Final[struct.Struct] = struct.Struct(">q")
+_FLOAT: Final[struct.Struct] = struct.Struct(">f")
+_DOUBLE: Final[struct.Struct] = struct.Struct(">d")
+
+_FIXED_SIZES: Final[Dict[int, int]] = {1: 1, 2: 2, 3: 4, 4: 8, 5: 4, 6: 8}
+_ARRAY_ITEM_STRUCTS: Final[Dict[int, struct.Struct]] = {
+    7: _BYTE, 11: _INT, 12: _LONG
+}
+_ARRAY_ITEM_SIZES: Final[Dict[int, int]] = {7: 1, 11: 4, 12: 8}
+_ARRAY_ELEMENT_TYPES: Final[Dict[int, type]] = {
+    7: NBTByte, 11: NBTInt, 12: NBTLong
+}
+_TAG_TYPES: Final[Tuple[NBTTagType, ...]] = tuple(NBTTagType)
+# Unpacked values are in range already, so the payloads are built without
+# the normalization of their constructors.
+_FIXED_LEAVES: Final[Dict[int, Tuple[NBTTagType, struct.Struct,
+                                     Callable[[Any], Any]]]] = {
+    1: (NBTTagType.TAG_Byte, _BYTE, functools.partial(int.__new__, NBTByte)),
+    2: (NBTTagType.TAG_Short, _SHORT,
+        functools.partial(int.__new__, NBTShort)),
+    3: (NBTTagType.TAG_Int, _INT, functools.partial(int.__new__, NBTInt)),
+    4: (NBTTagType.TAG_Long, _LONG, functools.partial(int.__new__, NBTLong)),
+    5: (NBTTagType.TAG_Float, _FLOAT,
+        functools.partial(float.__new__, NBTFloat)),
+    6: (NBTTagType.TAG_Double, _DOUBLE,
+        functools.partial(float.__new__, NBTDouble))
+}
+_ARRAY_LEAVES: Final[Dict[int, Tuple[NBTTagType, type, int]]] = {
+    7: (NBTTagType.TAG_Byte_Array, NBTByteArray, 1),
+    11: (NBTTagType.TAG_Int_Array, NBTIntArray, 4),
+    12: (NBTTagType.TAG_Long_Array, NBTLongArray, 8)
+}
+
+_T = TypeVar("_T")
+
+class InternTable :
+    """
+    A bounded table letting decoded compound keys and short string values
+    share one object per distinct value, which also remembers the encoded
+    form of keys so that writers don't encode them again.
+
+    Strings longer than maxlength bytes are left alone. A table holding
+    maxsize entries of a kind is cleared before the next one is added, so
+    it stays bounded however many distinct strings pass through; maxsize 0
+    disables interning. Readers and writers use INTERN_TABLE.
+    """
+
+    def __init__(self, maxsize: int=INTERN_TABLE_SIZE,
+                 maxlength: int=INTERN_MAX_LENGTH) -> None :
+        self.maxsize: int = maxsize
+        self.maxlength: int = maxlength
+        self._keys: Dict[bytes, str] = {}
+        self._strings: Dict[bytes, NBTTag] = {}
+        self._encoded: Dict[str, bytes] = {}
+
+    def __len__(self) -> int :
+        return len(self._keys) + len(self._strings)
+
+    def clear(self) -> None :
+        self._keys.clear()
+        self._strings.clear()
+        self._encoded.clear()
+
+    def _add(self, table: Dict[Any, _T], key: Any, value: _T) -> None :
+        if len(table) >= self.maxsize :
+            table.clear()
+        table[key] = value
+
+    def key(self, raw: bytes) -> str :
+        """Decode raw, a compound key without its length prefix."""
+        KEY: Optional[str] = self._keys.get(raw)
+        if KEY is not None :
+            return KEY
+        NEW: Final[str] = decode(raw)
+        if self.maxsize and len(raw) <= self.maxlength :
+            self._add(self._keys, raw, NEW)
+            # raw is only what encode gives when it is ASCII without NUL,
+            # as readers also accept standard UTF-8 and raw NUL bytes.
+            if raw.isascii() and b"\0" not in raw and \
+               NEW not in self._encoded :
+                self._add(self._encoded, NEW, _USHORT.pack(len(raw)) + raw)
+        return NEW
+
+    def string(self, raw: bytes) -> NBTTag :
+        """Decode raw, a TAG_String payload without its length prefix."""
+        TAG: Optional[NBTTag] = self._strings.get(raw)
+        if TAG is not None :
+            return TAG
+        NEW: Final[NBTTag] = NBTTag._make(NBTTagType.TAG_String,
+                                          NBTString(decode(raw)))
+        if self.maxsize and len(raw) <= self.maxlength :
+            self._add(self._strings, raw, NEW)
+        return NEW
+
+    def encode(self, key: str) -> bytes :
+        """Encode key with its length prefix."""
+        RAW: Optional[bytes] = self._encoded.get(key)
+        if RAW is not None :
+            return RAW
+        NEW: Final[bytes] = _encodestring(key)
+        if self.maxsize and len(NEW) - 2 <= self.maxlength :
+            self._add(self._encoded, key, NEW)
+        return NEW
+
+INTERN_TABLE: Final[InternTable] = InternTable()
+
+class _Decoder :
+    def __init__(self, data: Union[bytes, bytearray, memoryview],
+                 read: Optional[Callable[[int], bytes]]=None,
+                 chunksize: int=0, maxdepth: int=MAX_DEPTH,
+                 peek: Optional[Callable[[int], bytes]]=None) -> None :
+        self.buf: Union[bytes, bytearray, memoryview] = data
+        self.pos: int = 0
+        self.read: Optional[Callable[[int], bytes]] = read
+        # Bytes are read ahead chunksize at a time, or not at all if it is
+        # 0 unless peek is given: peeked bytes are then read from the
+        # stream only once the next ones are needed, so that it is never
+        # read past what was used. peeked is the number of them at the end
+        # of buf.
+        self.chunksize: int = chunksize
+        self.peek: Optional[Callable[[int], bytes]] = peek
+        self.peeked: int = 0
+        self.maxdepth: int = maxdepth
+        # Bytes from mark on are kept when refilling, so that the decoder
+        # can be rewound to them. Refilling moves mark to 0.
+        self.mark: Optional[int] = None
+
+    def unused(self) -> int :
+        return len(self.buf) - self.pos
+
+    def fetch(self, size: int) -> bytes :
+        # Return some of the next size bytes of the stream, or more if
+        # they are read ahead. Sizes are bounded, so that lengths claimed
+        # by the data are not trusted with memory before it is there.
+        if self.peek is not None :
+            if self.peeked :
+                cast(Callable[[int], bytes], self.read)(self.peeked)
+            CHUNK: Final[bytes] = self.peek(size)
+            self.peeked = len(CHUNK)
+            return CHUNK
+        return cast(Callable[[int], bytes], self.read)\
+               (self.chunksize or min(size, READ_CHUNK_SIZE))
+
+    def take(self, size: int) -> int :
+        POS: Final[int] = self.pos
+        if len(self.buf) - POS >= size :
+            self.pos = POS + size
+            return POS
+        if self.read is None :
+            raise EOFError(EOF_REACH_MSG)
+        if self.mark is not None :
+            # Everything from mark on is kept, so the buffer grows in place
+            # rather than being copied again on every refill.
+            if self.mark or type(self.buf) is not bytearray :
+                self.buf = bytearray(self.buf[self.mark:])
+                self.pos = POS - self.mark
+                self.mark = 0
+            missing: int = self.pos + size - len(self.buf)
+            while missing > 0 :
+                CHUNK: bytes = self.fetch(missing)
+                if not CHUNK :
+                    raise EOFError(EOF_REACH_MSG)
+                self.buf += CHUNK
+                missing -= len(CHUNK)
+            self.pos += size
+            return self.pos - size
+        REST: Final[bytes] = bytes(self.buf[POS:])
+        CHUNKS: Final[List[bytes]] = [REST]
+        got: int = len(REST)
+        while got < size :
+            CHUNK = self.fetch(size - got)
+            if not CHUNK :
+                raise EOFError(EOF_REACH_MSG)
+            CHUNKS.append(CHUNK)
+            got += len(CHUNK)
+        self.buf = b"".join(CHUNKS)
+        self.pos = size
         return 0
-    if tag.type in (NBTTagType.TAG_Byte, NBTTagType.TAG_Short,
-                    NBTTagType.TAG_Int, NBTTagType.TAG_Long,
-                    NBTTagType.TAG_Float, NBTTagType.TAG_Double,
-                    NBTTagType.TAG_Byte_Array, NBTTagType.TAG_Int_Array,
-                    NBTTagType.TAG_Long_Array) :
-        return stream.write(str(tag.value).encode())
-    if tag.type == NBTTagType.TAG_String :
-        res: int = 0
-        for i in str(tag.value) :
-            res += stream.write(bytes((0xed, ord(i)>>6&63|128, ord(i)&63|128))\
-                                if "\ud7ff" < i < "\ue000" else i.encode())
-        return res
-    if tag.type == NBTTagType.TAG_List :
-        if not tag.value :
-            return stream.write(b"[]")
-        res: int = stream.write(b"[")
-        ITER: Iterator[NBTTag] = iter(cast(NBTList, tag.value))
-        nexttag: NBTTag
-        res += writesnbttostream(next(ITER), stream)
-        try :
-            while 1 :
-                nexttag = next(ITER)
-                res += stream.write(b",") + writesnbttostream(nexttag, stream)
-        except StopIteration :
-            pass
-        return res + stream.write(b"]")
-    if tag.type == NBTTagType.TAG_Compound :
-        if not tag.value :
-            return stream.write(b"{}")
-        res: int = stream.write(b"{")
-        ITER2: Iterator[Tuple[str, NBTTag]] = \
-        iter(cast(NBTCompound, tag.value).items())
-        nextnametag: Tuple[str, NBTTag] = next(ITER2)
-        res += stream.write(_format_name(nextnametag[0])) + stream.write(b":")\
-               + writesnbttostream(nextnametag[1], stream)
-        try :
+
+    def unpack(self, struct_: struct.Struct) -> Union[int, float] :
+        POS: Final[int] = self.take(struct_.size)
+        return struct_.unpack_from(self.buf, POS)[0]
+
+    def array(self, tagtype: NBTTagType, cls: type, itemsize: int) -> NBTTag :
+        LENGTH: Final[int] = cast(int, self.unpack(_INT))
+        if LENGTH < 0 :
+            raise ValueError("negative length")
+        return NBTTag._make(tagtype,
+                            cls.frombuffer(self.slice(LENGTH*itemsize)))
+
+    def slice(self, size: int) -> bytes :
+        POS: Final[int] = self.take(size)
+        return bytes(self.buf[POS:POS+size])
+
+    def string(self) -> str :
+        return decode(self.slice(cast(int, self.unpack(_USHORT))))
+
+    def key(self) -> str :
+        return INTERN_TABLE.key(self.slice(cast(int, self.unpack(_USHORT))))
+
+    def leaf(self, tagtype: int) -> NBTTag :
+        FIXED: Final[Optional[Tuple[NBTTagType, struct.Struct,
+                                    Callable[[Any], Any]]]] = \
+        _FIXED_LEAVES.get(tagtype)
+        if FIXED is not None :
+            return NBTTag._make(FIXED[0], FIXED[2](self.unpack(FIXED[1])))
+        if tagtype == 8 :
+            return INTERN_TABLE.string(self.slice(cast(int,
+                                                       self.unpack(_USHORT))))
+        ARRAY: Final[Optional[Tuple[NBTTagType, type, int]]] = \
+        _ARRAY_LEAVES.get(tagtype)
+        if ARRAY is not None :
+            return self.array(*ARRAY)
+        raise ValueError(f"unknown tag type id {tagtype}")
+
+    def open(self, tagtype: int, stack: List[List[Any]]) -> None :
+        if len(stack) >= self.maxdepth :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        if tagtype == 10 :
+            stack.append([10, NBTCompound(), None, 0])
+            return
+        ELEMTYPE: Final[int] = cast(int, self.unpack(_BYTE))
+        LENGTH: Final[int] = cast(int, self.unpack(_INT))
+        if LENGTH < 0 :
+            raise ValueError("negative length")
+        if ELEMTYPE == 0 and LENGTH :
+            raise ValueError("list of TAG_End with elements")
+        stack.append([9, [], ELEMTYPE, LENGTH])
+
+    def payload(self, tagtype: int) -> NBTTag :
+        if tagtype != 9 and tagtype != 10 :
+            return self.leaf(tagtype)
+        # Each frame is [tag type id, items, element type id of a list or
+        # pending entry name of a compound, remaining list elements].
+        STACK: Final[List[List[Any]]] = []
+        self.open(tagtype, STACK)
+        tag: NBTTag
+        while 1 :
+            FRAME: List[Any] = STACK[-1]
+            if FRAME[0] == 9 :
+                if FRAME[3] :
+                    FRAME[3] -= 1
+                    if FRAME[2] == 9 or FRAME[2] == 10 :
+                        self.open(FRAME[2], STACK)
+                    else :
+                        FRAME[1].append(self.leaf(FRAME[2]))
+                    continue
+                tag = NBTTag._make(NBTTagType.TAG_List,
+                                   NBTList._make(FRAME[1]))
+            else :
+                ENTRYTYPE: int = cast(int, self.unpack(_BYTE))
+                if ENTRYTYPE :
+                    NAME: str = self.key()
+                    if ENTRYTYPE == 9 or ENTRYTYPE == 10 :
+                        FRAME[2] = NAME
+                        self.open(ENTRYTYPE, STACK)
+                    else :
+                        # Decoded keys and tags need no checking.
+                        dict.__setitem__(FRAME[1], NAME,
+                                         self.leaf(ENTRYTYPE))
+                    continue
+                tag = NBTTag._make(NBTTagType.TAG_Compound, FRAME[1])
+            STACK.pop()
+            if not STACK :
+                return tag
+            if STACK[-1][0] == 9 :
+                STACK[-1][1].append(tag)
+            else :
+                dict.__setitem__(STACK[-1][1], STACK[-1][2], tag)
+        assert 0
+
+    def skip(self, tagtype: int) -> None :
+        # Each frame is [element type id of a list or -1 for a compound,
+        # remaining list elements].
+        STACK: Final[List[List[int]]] = []
+        while 1 :
+            if tagtype in _FIXED_SIZES :
+                self.take(_FIXED_SIZES[tagtype])
+            elif tagtype in _ARRAY_ITEM_SIZES :
+                LENGTH: int = cast(int, self.unpack(_INT))
+                if LENGTH < 0 :
+                    raise ValueError("negative length")
+                self.take(LENGTH * _ARRAY_ITEM_SIZES[tagtype])
+            elif tagtype == 8 :
+                self.take(cast(int, self.unpack(_USHORT)))
+            elif tagtype == 9 or tagtype == 10 :
+                if len(STACK) >= self.maxdepth :
+                    raise ValueError(DEPTH_EXCEED_MSG)
+                if tagtype == 10 :
+                    STACK.append([-1, 0])
+                else :
+                    ELEMTYPE: int = cast(int, self.unpack(_BYTE))
+                    LENGTH = cast(int, self.unpack(_INT))
+                    if LENGTH < 0 :
+                        raise ValueError("negative length")
+                    if ELEMTYPE in _FIXED_SIZES :
+                        self.take(LENGTH * _FIXED_SIZES[ELEMTYPE])
+                    elif ELEMTYPE == 0 :
+                        if LENGTH :
+                            raise ValueError("list of TAG_End with elements")
+                    else :
+                        STACK.append([ELEMTYPE, LENGTH])
+            else :
+                raise ValueError(f"unknown tag type id {tagtype}")
+            while STACK :
+                FRAME: List[int] = STACK[-1]
+                if FRAME[0] < 0 :
+                    tagtype = cast(int, self.unpack(_BYTE))
+                    if tagtype :
+                        self.take(cast(int, self.unpack(_USHORT)))
+                        break
+                elif FRAME[1] :
+                    FRAME[1] -= 1
+                    tagtype = FRAME[0]
+                    break
+                STACK.pop()
+            else :
+                return
+
+    def project(self, tagtype: int, node: Dict[Any, Any], depth: int,
+                paths: Sequence[NBTPath],
+                results: List[Optional[NBTTag]]) -> None :
+        if None in node :
+            _resolve(self.payload(tagtype), node, depth, paths, results)
+        elif tagtype == 10 :
             while 1 :
-                nextnametag = next(ITER2)
-                res += stream.write(b",") + \
-                       stream.write(_format_name(nextnametag[0])) + \
-                       stream.write(b":") + \
-                       writesnbttostream(nextnametag[1], stream)
-        except StopIteration :
-            pass
-        return res + stream.write(b"}")
-    raise ValueError("unexpected value error")
\ No newline at end of file
+                ENTRYTYPE: int = cast(int, self.unpack(_BYTE))
+                if not ENTRYTYPE :
+                    return
+                CHILD: Optional[Dict[Any, Any]] = node.get(self.key())
+                if CHILD is None :
+                    self.skip(ENTRYTYPE)
+                else :
+                    self.project(ENTRYTYPE, CHILD, depth + 1, paths, results)
+        elif tagtype == 9 :
+            ELEMTYPE: Final[int] = cast(int, self.unpack(_BYTE))
+            LENGTH: Final[int] = cast(int, self.unpack(_INT))
+            if LENGTH < 0 :
+                raise ValueError("negative length")
+            if ELEMTYPE == 0 and LENGTH :
+                raise ValueError("list of TAG_End with elements")
+            for i in range(LENGTH) :
+                CHILDREN: List[Dict[Any, Any]] = \
+                [j for j in (node.get(i), node.get(i - LENGTH)) \
+                 if j is not None]
+                if not CHILDREN :
+                    self.skip(ELEMTYPE)
+                elif len(CHILDREN) == 1 :
+                    self.project(ELEMTYPE, CHILDREN[0], depth + 1, paths,
+                                 results)
+                else :
+                    ELEMENT: NBTTag = self.payload(ELEMTYPE)
+                    for j in CHILDREN :
+                        _resolve(ELEMENT, j, depth + 1, paths, results)
+        elif tagtype in _ARRAY_ITEM_SIZES :
+            LENGTH = cast(int, self.unpack(_INT))
+            if LENGTH < 0 :
+                raise ValueError("negative length")
+            STRUCT: Final[struct.Struct] = _ARRAY_ITEM_STRUCTS[tagtype]
+            POS: Final[int] = self.take(LENGTH * STRUCT.size)
+            for k, v in node.items() :
+                if isinstance(k, int) and -LENGTH <= k < LENGTH and \
+                   len(v) == 1 and None in v :
+                    for i in v[None] :
+                        results[i] = NBTTag(_ARRAY_ELEMENT_TYPES[tagtype](
+                            STRUCT.unpack_from(self.buf,
+                                               POS + k % LENGTH * STRUCT.size)\
+                            [0]
+                        ))
+        else :
+            self.skip(tagtype)
+
+    def header(self, tagtype: Optional[NBTTagType], named: bool) -> int :
+        if tagtype is not None :
+            return cast(int, tagtype.value)
+        TYPEID: Final[int] = cast(int, self.unpack(_BYTE))
+        if TYPEID and named :
+            self.string()
+        return TYPEID
+
+    def root(self, tagtype: Optional[NBTTagType], named: bool) -> NBTTag :
+        TYPEID: Final[int] = self.header(tagtype, named)
+        return self.payload(TYPEID) if TYPEID else NBTTag(NBTTagType.TAG_End)
+
+    def projectroot(self, tagtype: Optional[NBTTagType], named: bool,
+                    paths: Sequence[NBTPath]) -> List[Optional[NBTTag]] :
+        RESULTS: Final[List[Optional[NBTTag]]] = [None] * len(paths)
+        TREE: Final[Dict[Any, Any]] = _pathtree(paths)
+        TYPEID: Final[int] = self.header(tagtype, named)
+        if TYPEID :
+            self.project(TYPEID, TREE, 0, paths, RESULTS)
+        else :
+            _resolve(NBTTag(NBTTagType.TAG_End), TREE, 0, paths, RESULTS)
+        return RESULTS
+
+def _resolve(tag: NBTTag, node: Dict[Any, Any], depth: int,
+             paths: Sequence[NBTPath],
+             results: List[Optional[NBTTag]]) -> None :
+    for k, v in node.items() :
+        if k is None :
+            for i in v :
+                results[i] = data.get(tag, cast(NBTPath,
+                                                paths[i][depth:])).tag
+        else :
+            _resolve(tag, v, depth, paths, results)
+
+def readfromstream(stream: BufferedIOBase,
+                   tagtype: Optional[NBTTagType]=None, *,
+                   named: bool=True, maxdepth: int=MAX_DEPTH) -> NBTTag :
+    """
+    Read a binary NBT tag from stream.
+
+    If tagtype is given, only its payload is read, mirroring writetostream.
+    Otherwise a root tag is read: its type id, its name when named is true,
+    and the payload. The name of a root tag is discarded.
+
+    Seekable streams are read in READ_CHUNK_SIZE blocks and rewound to the
+    end of the tag afterwards; other streams are never read past it, and
+    are read ahead through peek if they have it.
+    Lists and compounds nested deeper than maxdepth raise ValueError.
+    """
+    return _readstream(stream, maxdepth,
+                       lambda x: x.root(tagtype, named))
+
+def _readstream(stream: BufferedIOBase, maxdepth: int,
+                function: Callable[[_Decoder], _T]) -> _T :
+    DECODER: Final[_Decoder] = _streamdecoder(stream, b"", READ_CHUNK_SIZE,
+                                              maxdepth)
+    RESULT: Final[_T] = function(DECODER)
+    _release(stream, DECODER)
+    return RESULT
+
+def _streamdecoder(stream: BufferedIOBase, head: bytes, chunksize: int,
+                   maxdepth: int) -> _Decoder :
+    # Decode stream, read chunksize bytes at a time if it can be rewound
+    # by _release, or through peek if it has one.
+    if stream.seekable() :
+        return _Decoder(head, stream.read, chunksize, maxdepth)
+    return _Decoder(head, stream.read, 0, maxdepth,
+                    getattr(stream, "peek", None))
+
+def _release(stream: BufferedIOBase, decoder: _Decoder) -> None :
+    # Leave stream right after what decoder used of it.
+    if decoder.peek is not None :
+        if decoder.peeked > decoder.unused() :
+            stream.read(decoder.peeked - decoder.unused())
+        decoder.peeked = 0
+    elif decoder.chunksize and decoder.unused() :
+        stream.seek(-decoder.unused(), 1)
+
+def loads(data: Union[bytes, bytearray, memoryview],
+          tagtype: Optional[NBTTagType]=None, *, named: bool=True,
+          maxdepth: int=MAX_DEPTH) -> NBTTag :
+    """Like readfromstream, but decode from a bytes-like object."""
+    return _Decoder(data, maxdepth=maxdepth).root(tagtype, named)
+
+def readpathsfromstream(stream: BufferedIOBase, paths: Sequence[NBTPath],
+                        tagtype: Optional[NBTTagType]=None, *,
+                        named: bool=True,
+                        maxdepth: int=MAX_DEPTH) -> List[Optional[NBTTag]] :
+    """
+    Read a tag like readfromstream, but only decode what paths select.
+
+    Return, for each path, the tag data.get would find at it, or None.
+    Compound entries and list elements off every path are skipped using
+    their length prefixes without being decoded.
+    """
+    return _readstream(stream, maxdepth,
+                       lambda x: x.projectroot(tagtype, named, paths))
+
+def loadpaths(data: Union[bytes, bytearray, memoryview],
+              paths: Sequence[NBTPath], tagtype: Optional[NBTTagType]=None,
+              *, named: bool=True,
+              maxdepth: int=MAX_DEPTH) -> List[Optional[NBTTag]] :
+    """Like readpathsfromstream, but decode from a bytes-like object."""
+    return _Decoder(data, maxdepth=maxdepth).projectroot(tagtype, named,
+                                                         paths)
+
+def _encodestring(string: str) -> bytes :
+    RES: Final[bytes] = encode(string)
+    if len(RES) > 65535 :
+        raise ValueError("encoded string is longer than 65535 bytes")
+    return _USHORT.pack(len(RES)) + RES
+
+def _encodearray(array_: NBTByteArray) -> bytes :
+    return _INT.pack(len(array_)) + array_.tobuffer()
+
+# Encoders of leaf payloads, keyed by their exact class.
+_ENCODERS: Final[Dict[type, Callable[[Any], bytes]]] = {
+    type(None): lambda x: b"",
+    NBTByte: _BYTE.pack,
+    NBTShort: _SHORT.pack,
+    NBTInt: _INT.pack,
+    NBTLong: _LONG.pack,
+    NBTFloat: _FLOAT.pack,
+    NBTDouble: _DOUBLE.pack,
+    NBTByteArray: _encodearray,
+    NBTString: _encodestring,
+    NBTIntArray: _encodearray,
+    NBTLongArray: _encodearray
+}
+
+# Type ids keyed by the exact class of payloads. NBTTagType.value is slow
+# enough to matter in the encoder.
+_TYPE_IDS: Final[Dict[type, int]] = {
+    j: i for i, j in enumerate(NBT_TAG_TYPE_CONSTRUCTOR)
+}
+
+def _typeid(tag: NBTTag) -> int :
+    TYPEID: Final[Optional[int]] = _TYPE_IDS.get(type(tag.view))
+    return cast(int, tag.type.value) if TYPEID is None else TYPEID
+
+def _encode(tag: NBTTag, out: bytearray, maxdepth: int) -> None :
+    # Each frame is an iterator over the rest of a list or compound and
+    # whether it is a compound, whose end has to be marked.
+    STACK: Final[List[Tuple[Iterator[Any], bool]]] = []
+    item: NBTTag = tag
+    while 1 :
+        VIEW: Any = item.view
+        ENCODER: Optional[Callable[[Any], bytes]] = _ENCODERS.get(type(VIEW))
+        if ENCODER is not None :
+            out += ENCODER(VIEW)
+        elif item.type is NBTTagType.TAG_List :
+            if VIEW :
+                if len(STACK) >= maxdepth :
+                    raise ValueError(DEPTH_EXCEED_MSG)
+                out.append(_typeid(VIEW[0]))
+                out += _INT.pack(len(VIEW))
+                STACK.append((iter(VIEW), False))
+            else :
+                out += b"\0\0\0\0\0"
+        elif item.type is NBTTagType.TAG_Compound :
+            if len(STACK) >= maxdepth :
+                raise ValueError(DEPTH_EXCEED_MSG)
+            STACK.append((iter(VIEW.items()), True))
+        else :
+            # Instances of subclasses are encoded as their base class.
+            ENCODER = _ENCODERS.get(NBT_TAG_TYPE_CONSTRUCTOR\
+                                    [cast(int, item.type.value)])
+            if ENCODER is None :
+                raise ValueError
+            out += ENCODER(VIEW)
+        while STACK :
+            NEXT: Any = next(STACK[-1][0], None)
+            if NEXT is None :
+                if STACK.pop()[1] :
+                    out.append(0)
+            elif STACK[-1][1] :
+                item = NEXT[1]
+                out.append(_typeid(item))
+                out += INTERN_TABLE.encode(NEXT[0])
+                break
+            else :
+                item = NEXT
+                break
+        else :
+            return
+
+# Payloads that can be encoded once and for all.
+_IMMUTABLE_PAYLOADS: Final[FrozenSet[type]] = frozenset((
+    type(None), NBTByte, NBTShort, NBTInt, NBTLong, NBTFloat, NBTDouble,
+    NBTString
+))
+
+class EncodeCache :
+    """
+    A bounded cache of encoded lists and compounds, letting dumps and
+    writetostream re-encode only what changed since they last wrote it.
+
+    The entry of a container holds the encoding of all of it, except for
+    the arrays and persistent containers in it, which are encoded anew
+    each time. A change to a list or compound makes the entries of all
+    the containers holding it unused, so a change re-encodes the entries
+    and elements of the containers on its path only, and the rest is
+    copied from the entries of their siblings. Entries are dropped along
+    with their container, and the least recently written ones are evicted
+    while the entries hold more than maxsize bytes; maxsize 0 disables
+    caching.
+    """
+
+    def __init__(self, maxsize: int=ENCODE_CACHE_SIZE) -> None :
+        self.maxsize: int = maxsize
+        self.size: int = 0
+        # Entries keyed by the id of their container: a weak reference to
+        # it, its version, its encoded parts, its nesting depth and the
+        # size of the parts.
+        self._entries: "OrderedDict[int, Tuple[Any, ...]]" = OrderedDict()
+
+    def __len__(self) -> int :
+        return len(self._entries)
+
+    def clear(self) -> None :
+        self._entries.clear()
+        self.size = 0
+
+    def _drop(self, key: int, ref: "weakref.ref[Any]") -> None :
+        ENTRY: Final[Optional[Tuple[Any, ...]]] = self._entries.get(key)
+        if ENTRY is not None and ENTRY[0] is ref :
+            del self._entries[key]
+            self.size -= ENTRY[4]
+
+    def _get(self, container: Union[NBTList, NBTCompound]) \
+    -> Optional[Tuple[Any, ...]] :
+        KEY: Final[int] = id(container)
+        ENTRY: Final[Optional[Tuple[Any, ...]]] = self._entries.get(KEY)
+        if ENTRY is None or ENTRY[1] != container._version or \
+           ENTRY[0]() is not container :
+            return None
+        self._entries.move_to_end(KEY)
+        return ENTRY
+
+    def _add(self, container: Union[NBTList, NBTCompound],
+             parts: Tuple[Any, ...], depth: int) -> Tuple[Any, ...] :
+        KEY: Final[int] = id(container)
+        SIZE: Final[int] = sum(sys.getsizeof(i) for i in parts
+                               if type(i) is bytes)
+        ENTRY: Final[Tuple[Any, ...]] = (
+            weakref.ref(container, functools.partial(self._drop, KEY)),
+            container._version, parts, depth, SIZE
+        )
+        if SIZE > self.maxsize :
+            return ENTRY
+        OLD: Final[Optional[Tuple[Any, ...]]] = self._entries.pop(KEY, None)
+        if OLD is not None :
+            self.size -= OLD[4]
+        self._entries[KEY] = ENTRY
+        self.size += SIZE
+        while self.size > self.maxsize :
+            self.size -= self._entries.popitem(last=False)[1][4]
+        return ENTRY
+
+def _flush(out: bytearray, parts: List[Any]) -> None :
+    if out :
+        parts.append(bytes(out))
+        out.clear()
+
+def _cached(view: Union[NBTList, NBTCompound], maxdepth: int,
+            cache: EncodeCache) -> Tuple[Any, ...] :
+    # Return the cache entry of view, encoding it and the lists and
+    # compounds in it that need it. Each frame is a container being
+    # encoded, the depth left for it, an iterator over its entries, its
+    # parts, its bytes not yet in a part, and its nesting depth so far.
+    # The parts are bytes, and the tags encoded anew each time along with
+    # their nesting depth.
+    STACK: Final[List[List[Any]]] = []
+    current: Union[NBTList, NBTCompound] = view
+    left: int = maxdepth
+    while 1 :
+        if left < 1 and (current or isinstance(current, NBTCompound)) :
+            raise ValueError(DEPTH_EXCEED_MSG)
+        entry: Optional[Tuple[Any, ...]] = cache._get(current)
+        if entry is not None :
+            if entry[3] > left :
+                raise ValueError(DEPTH_EXCEED_MSG)
+        else :
+            # Have changes of current tracked.
+            if current._parents is None :
+                current._parents = {}
+            OUT: bytearray = bytearray()
+            ITEMS: Iterator[Tuple[Optional[str], NBTTag]]
+            if isinstance(current, NBTCompound) :
+                ITEMS = iter(current.items())
+            elif current :
+                OUT.append(_typeid(current[0]))
+                OUT += _INT.pack(len(current))
+                ITEMS = zip(itertools.repeat(None), current)
+            else :
+                ITEMS = iter(())
+                OUT += b"\0\0\0\0\0"
+            STACK.append([current, left, ITEMS, [], OUT, 0])
+        while STACK :
+            FRAME: List[Any] = STACK[-1]
+            CONTAINER: Union[NBTList, NBTCompound] = FRAME[0]
+            PARTS: List[Any] = FRAME[3]
+            OUT = FRAME[4]
+            if entry is not None :
+                # current is done. Changing it changes CONTAINER from now
+                # on.
+                cast(Dict[int, Any], current._parents)[id(CONTAINER)] = \
+                weakref.ref(CONTAINER)
+                FRAME[5] = max(FRAME[5], entry[3])
+                for i in entry[2] :
+                    if type(i) is bytes :
+                        OUT += i
+                    else :
+                        _flush(OUT, PARTS)
+                        PARTS.append((i[0], i[1] + 1))
+                entry = None
+            for KEY, ITEM in FRAME[2] :
+                if KEY is not None :
+                    OUT.append(_typeid(ITEM))
+                    OUT += INTERN_TABLE.encode(KEY)
+                VIEW: Any = ITEM.view
+                if type(VIEW) in _IMMUTABLE_PAYLOADS :
+                    OUT += _ENCODERS[type(VIEW)](VIEW)
+                elif isinstance(VIEW, (NBTList, NBTCompound)) :
+                    current, left = VIEW, FRAME[1] - 1
+                    break
+                else :
+                    _flush(OUT, PARTS)
+                    PARTS.append((ITEM, 1))
+            else :
+                STACK.pop()
+                if isinstance(CONTAINER, NBTCompound) :
+                    OUT.append(0)
+                _flush(OUT, PARTS)
+                entry = cache._add(CONTAINER, tuple(PARTS),
+                                   FRAME[5] + 1 \
+                                   if CONTAINER or \
+                                      isinstance(CONTAINER, NBTCompound) \
+                                   else 0)
+                current = CONTAINER
+                continue
+            break
+        else :
+            return cast(Tuple[Any, ...], entry)
+
+def _dump(tag: NBTTag, name: Optional[str], maxdepth: int,
+          cache: Optional[EncodeCache]=None) -> bytearray :
+    OUT: Final[bytearray] = bytearray()
+    if name is not None :
+        OUT.append(cast(int, tag.type.value))
+        if tag.type == NBTTagType.TAG_End :
+            return OUT
+        OUT += INTERN_TABLE.encode(name)
+    if cache is not None and isinstance(tag.view, (NBTList, NBTCompound)) :
+        for i in _cached(cast(Union[NBTList, NBTCompound], tag.view),
+                         maxdepth, cache)[2] :
+            if type(i) is bytes :
+                OUT += i
+            else :
+                _encode(i[0], OUT, maxdepth - i[1])
+    else :
+        _encode(tag, OUT, maxdepth)
+    return OUT
+
+def dumps(tag: NBTTag, name: Optional[str]=None, *,
+          maxdepth: int=MAX_DEPTH,
+          cache: Optional[EncodeCache]=None) -> bytes :
+    """
+    Encode tag to binary NBT.
+
+    Only the payload is encoded unless name is given, in which case the
+    result is a named root tag as stored in .dat files. Lists and compounds
+    nested deeper than maxdepth raise ValueError.
+
+    With cache, lists and compounds unchanged since cache last saw them
+    are written from it instead of being encoded again.
+    """
+    return bytes(_dump(tag, name, maxdepth, cache))
+
+def writetostream(tag: NBTTag, stream: BufferedIOBase,
+                  name: Optional[str]=None, *,
+                  maxdepth: int=MAX_DEPTH,
+                  cache: Optional[EncodeCache]=None) -> int :
+    """Like dumps, but write the result to stream with a single write."""
+    OUT: Final[bytearray] = _dump(tag, name, maxdepth, cache)
+    return stream.write(OUT) if OUT else 0
+
+_SNBT_QUOTE: Final[Dict[int, str]] = str.maketrans({"\\": "\\\\",
+                                                    '"': '\\"'})
+_SNBT_NAME: Final[Pattern[str]] = re.compile(r"[0-9A-Za-z_\-.+]+")
+_SNBT_ARRAY_TYPES: Final[Tuple[NBTTagType, ...]] = (
+    NBTTagType.TAG_Byte_Array, NBTTagType.TAG_Int_Array,
+    NBTTagType.TAG_Long_Array
+)
+_SNBT_ARRAY_CHUNK: Final[int] = 4096
+
+def _snbtquote(string: str) -> str :
+    return '"' + string.translate(_SNBT_QUOTE) + '"' \
+           if "\\" in string or '"' in string else '"' + string + '"'
+
+def _snbtchunks(tag: NBTTag, indent: Optional[int], flushsize: int,
+                maxdepth: int) -> Iterator[str] :
+    # Yield the SNBT of tag in chunks of about flushsize characters.
+    PARTS: Final[List[str]] = []
+    APPEND: Final[Callable[[str], None]] = PARTS.append
+    # Formatted names, as the same ones keep coming back.
+    NAMES: Final[Dict[str, str]] = {}
+    COLON: Final[str] = ":" if indent is None else ": "
+    size: int = 0
+    # Each frame is an iterator over the rest of a list or compound, whether
+    # it is a compound and whether an element has been written yet.
+    STACK: Final[List[List[Any]]] = []
+    item: NBTTag = tag
+    while 1 :
+        TYPE: NBTTagType = item.type
+        VIEW: Any = item.view
+        if TYPE is NBTTagType.TAG_List or TYPE is NBTTagType.TAG_Compound :
+            if len(STACK) >= maxdepth :
+                raise ValueError(DEPTH_EXCEED_MSG)
+            IS_COMPOUND: bool = TYPE is NBTTagType.TAG_Compound
+            if not VIEW :
+                APPEND("{}" if IS_COMPOUND else "[]")
+            else :
+                APPEND("{" if IS_COMPOUND else "[")
+                STACK.append([iter(VIEW.items() if IS_COMPOUND else VIEW),
+                              IS_COMPOUND, False])
+        elif TYPE is NBTTagType.TAG_String :
+            APPEND(_snbtquote(VIEW))
+            size += len(PARTS[-1])
+        elif TYPE in _SNBT_ARRAY_TYPES :
+            # Big arrays are joined a chunk at a time.
+            APPEND(f"[{VIEW.PREFIX};")
+            SEPARATOR: str = VIEW.SUFFIX + ","
+            for i in range(0, len(VIEW), _SNBT_ARRAY_CHUNK) :
+                APPEND(("," if i else "") + \
+                       SEPARATOR.join(map(str, VIEW[i:i+_SNBT_ARRAY_CHUNK])) \
+                       + VIEW.SUFFIX)
+                size += len(PARTS[-1])
+                if size >= flushsize :
+                    yield "".join(PARTS)
+                    PARTS.clear()
+                    size = 0
+            APPEND("]")
+        elif TYPE is not NBTTagType.TAG_End :
+            APPEND(str(VIEW))
+            size += len(PARTS[-1])
+        while STACK :
+            FRAME: List[Any] = STACK[-1]
+            NEXT: Any = next(FRAME[0], None)
+            if NEXT is None :
+                STACK.pop()
+                if indent is not None :
+                    APPEND("\n" + " " * (indent * len(STACK)))
+                APPEND("}" if FRAME[1] else "]")
+                continue
+            if indent is not None :
+                APPEND(("," if FRAME[2] else "") + "\n" + \
+                       " " * (indent * len(STACK)))
+            elif FRAME[2] :
+                APPEND(",")
+            FRAME[2] = True
+            if FRAME[1] :
+                NAME: Optional[str] = NAMES.get(NEXT[0])
+                if NAME is None :
+                    NAME = NEXT[0] if _SNBT_NAME.fullmatch(NEXT[0]) else \
+                           _snbtquote(NEXT[0])
+                    if len(NAMES) < INTERN_TABLE_SIZE :
+                        NAMES[NEXT[0]] = NAME
+                APPEND(NAME)
+                APPEND(COLON)
+                size += len(NAME)
+                item = NEXT[1]
+            else :
+                item = NEXT
+            break
+        else :
+            yield "".join(PARTS)
+            return
+        if size >= flushsize or len(PARTS) >= flushsize :
+            yield "".join(PARTS)
+            PARTS.clear()
+            size = 0
+
+def writesnbttostream(tag: NBTTag, stream: BufferedIOBase, *,
+                      indent: Optional[int]=None,
+                      flushsize: int=SNBT_FLUSH_SIZE,
+                      maxdepth: int=MAX_DEPTH) -> int :
+    """
+    Write tag to stream as SNBT, and return the number of bytes written.
+
+    Output is gathered and written in blocks of about flushsize
+    characters. With indent, it is pretty-printed with one entry per line,
+    indented by that many spaces per level. Lone surrogates are encoded as
+    in modified UTF-8.
+    """
+    res: int = 0
+    for i in _snbtchunks(tag, indent, flushsize, maxdepth) :
+        res += stream.write(i.encode("utf-8", "surrogatepass"))
+    return res
+
+def dumpsnbt(tag: NBTTag, *, indent: Optional[int]=None,
+             maxdepth: int=MAX_DEPTH) -> str :
+    """Like writesnbttostream, but return the SNBT as a str."""
+    return "".join(_snbtchunks(tag, indent, SNBT_FLUSH_SIZE, maxdepth))
+
+_SNBT_TOKEN: Final[Pattern[str]] = re.compile(r"""\s*(?:
+    (?P<array>\[[BIL];)
+  | (?P<punct>[{}\[\]:,])
+  | "(?P<dquote>(?:[^"\\]|\\.)*)"
+  | '(?P<squote>(?:[^'\\]|\\.)*)'
+  | (?P<word>[0-9A-Za-z_\-.+]+)
+  | (?P<error>\S|\Z)
+)""", re.S | re.X)
+_SNBT_ESCAPE: Final[Pattern[str]] = re.compile(r"\\(.)", re.S)
+_SNBT_SCALARS: Final[Tuple[Tuple[Pattern[str], type, int], ...]] = (
+    (re.compile(r"[-+]?(?:[0-9]+[.]|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?", re.I),
+     NBTDouble, 0),
+    (re.compile(r"[-+]?(?:[0-9]+[.]?|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?d",
+                re.I), NBTDouble, 1),
+    (re.compile(r"[-+]?(?:[0-9]+[.]?|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?f",
+                re.I), NBTFloat, 1),
+    (re.compile(r"[-+]?(?:0|[1-9][0-9]*)b", re.I), NBTByte, 1),
+    (re.compile(r"[-+]?(?:0|[1-9][0-9]*)l", re.I), NBTLong, 1),
+    (re.compile(r"[-+]?(?:0|[1-9][0-9]*)s", re.I), NBTShort, 1),
+    (re.compile(r"[-+]?(?:0|[1-9][0-9]*)"), NBTInt, 0)
+)
+_SNBT_BOUNDS: Final[Dict[type, Tuple[int, int]]] = {
+    NBTByte: (-0x80, 0x7f), NBTShort: (-0x8000, 0x7fff),
+    NBTInt: (-0x80000000, 0x7fffffff),
+    NBTLong: (-0x8000000000000000, 0x7fffffffffffffff)
+}
+_SNBT_ARRAYS: Final[Dict[str, Tuple[type, NBTTagType]]] = {
+    "[B;": (NBTByteArray, NBTTagType.TAG_Byte),
+    "[I;": (NBTIntArray, NBTTagType.TAG_Int),
+    "[L;": (NBTLongArray, NBTTagType.TAG_Long)
+}
+_SNBT_STRUCTURE: Final[Pattern[str]] = \
+re.compile(r"""(?P<quoted>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+             | (?P<open>[\[{]) | (?P<close>[\]}]) | (?P<partial>["'])""",
+           re.S | re.X)
+_SNBT_WORD_END: Final[Pattern[str]] = re.compile(r"[\s\[\]{}\"',:;]")
+_NON_SPACE: Final[Pattern[str]] = re.compile(r"\S")
+
+def _snbtunescape(match: Match[str]) -> str :
+    if match[1] not in "\\\"'" :
+        raise ValueError(f"invalid escape sequence \\{match[1]}")
+    return match[1]
+
+def _snbtstring(match: Match[str]) -> str :
+    TEXT: Final[str] = match[cast(str, match.lastgroup)]
+    return _SNBT_ESCAPE.sub(_snbtunescape, TEXT) if "\\" in TEXT else TEXT
+
+def _snbtscalar(word: str) -> NBTTag :
+    for PATTERN, TYPE, SUFFIX in _SNBT_SCALARS :
+        if PATTERN.fullmatch(word) :
+            DIGITS: str = word[:len(word)-SUFFIX]
+            if TYPE is NBTDouble or TYPE is NBTFloat :
+                return NBTTag(TYPE(float(DIGITS)))
+            LOW, HIGH = _SNBT_BOUNDS[TYPE]
+            if LOW <= int(DIGITS) <= HIGH :
+                return NBTTag(TYPE(int(DIGITS)))
+            break
+    if word == "true" :
+        return NBTTag(NBTByte(1))
+    if word == "false" :
+        return NBTTag(NBTByte(0))
+    return NBTTag(NBTString(word))
+
+def _snbterror(match: Match[str]) -> ValueError :
+    if match.lastgroup == "error" and not match[0].strip() :
+        return ValueError("SNBT ended before the value's end")
+    return ValueError(f"unexpected {match[0].strip()!r} at position "
+                      f"{match.end() - len(match[0].lstrip())} of SNBT")
+
+def _parsesnbt(text: str, pos: int, maxdepth: int) -> Tuple[NBTTag, int] :
+    TOKENS: Final[Iterator[Match[str]]] = _SNBT_TOKEN.finditer(text, pos)
+    # Each frame is [tag type id, items, pending entry name of a compound].
+    STACK: Final[List[List[Any]]] = []
+    match: Match[str] = next(TOKENS)
+    value: NBTTag
+    while 1 :
+        KIND: Optional[str] = match.lastgroup
+        if KIND == "punct" and match["punct"] in "{[" :
+            if len(STACK) >= maxdepth :
+                raise ValueError(DEPTH_EXCEED_MSG)
+            IS_COMPOUND: bool = match["punct"] == "{"
+            match = next(TOKENS)
+            if match.lastgroup == "punct" and \
+               match["punct"] == ("}" if IS_COMPOUND else "]") :
+                value = NBTTag(NBTCompound() if IS_COMPOUND else NBTList())
+            elif IS_COMPOUND :
+                STACK.append([10, NBTCompound(), None])
+                match = _snbtkey(TOKENS, match, STACK[-1])
+                continue
+            else :
+                STACK.append([9, NBTList(), None])
+                continue
+        elif KIND == "array" :
+            ARRAYTYPE, ELEMTYPE = _SNBT_ARRAYS[match["array"]]
+            ELEMENTS: List[int] = []
+            match = next(TOKENS)
+            while match.lastgroup == "word" :
+                ELEMENT: NBTTag = _snbtscalar(match["word"])
+                if ELEMENT.type != ELEMTYPE :
+                    raise ValueError(f"{ELEMENT} is not allowed in "
+                                     f"{ARRAYTYPE.__name__}")
+                ELEMENTS.append(cast(int, ELEMENT.view))
+                match = next(TOKENS)
+                if match.lastgroup != "punct" or match["punct"] != "," :
+                    break
+                match = next(TOKENS)
+            if match.lastgroup != "punct" or match["punct"] != "]" :
+                raise _snbterror(match)
+            value = NBTTag(ARRAYTYPE(ELEMENTS))
+        elif KIND == "dquote" or KIND == "squote" :
+            value = NBTTag(NBTString(_snbtstring(match)))
+        elif KIND == "word" :
+            value = _snbtscalar(match["word"])
+        else :
+            raise _snbterror(match)
+        while 1 :
+            if not STACK :
+                return value, match.end()
+            FRAME: List[Any] = STACK[-1]
+            if FRAME[0] == 9 :
+                if FRAME[1] and FRAME[1][0].type != value.type :
+                    raise ValueError(f"{value.type.name} in a list of "
+                                     f"{FRAME[1][0].type.name}")
+                list.append(FRAME[1], value)
+            else :
+                dict.__setitem__(FRAME[1], FRAME[2], value)
+            CLOSE: str = "]" if FRAME[0] == 9 else "}"
+            match = next(TOKENS)
+            if match.lastgroup == "punct" and match["punct"] == "," :
+                match = next(TOKENS)
+            elif match.lastgroup != "punct" or match["punct"] != CLOSE :
+                raise _snbterror(match)
+            if match.lastgroup == "punct" and match["punct"] == CLOSE :
+                value = NBTTag._make(_TAG_TYPES[FRAME[0]], STACK.pop()[1])
+                continue
+            if FRAME[0] == 10 :
+                match = _snbtkey(TOKENS, match, FRAME)
+            break
+    assert 0
+
+def _snbtkey(tokens: Iterator[Match[str]], match: Match[str],
+             frame: List[Any]) -> Match[str] :
+    if match.lastgroup == "word" :
+        frame[2] = match["word"]
+    elif match.lastgroup == "dquote" or match.lastgroup == "squote" :
+        frame[2] = _snbtstring(match)
+    else :
+        raise _snbterror(match)
+    if len(frame[2]) > 65535 :
+        raise ValueError("string is with a length greater than 65535")
+    COLON: Final[Match[str]] = next(tokens)
+    if COLON.lastgroup != "punct" or COLON["punct"] != ":" :
+        raise _snbterror(COLON)
+    return next(tokens)
+
+def _snbttext(data: Union[str, bytes, bytearray, memoryview]) -> str :
+    return data if isinstance(data, str) else decode(bytes(data))
+
+def loadsnbt(data: Union[str, bytes, bytearray, memoryview], *,
+             maxdepth: int=MAX_DEPTH) -> NBTTag :
+    """
+    Parse SNBT text, or bytes as written by writesnbttostream, into a tag.
+    Anything but whitespace after the value raises ValueError.
+    """
+    TEXT: Final[str] = _snbttext(data)
+    RESULT, END = _parsesnbt(TEXT, 0, maxdepth)
+    if _NON_SPACE.search(TEXT, END) :
+        raise ValueError(f"unexpected data at position {END} of SNBT")
+    return RESULT
+
+def readsnbtfromstream(stream: Union[BufferedIOBase, TextIOBase], *,
+                       maxdepth: int=MAX_DEPTH) -> NBTTag :
+    """Like loadsnbt, but parse the rest of stream."""
+    return loadsnbt(stream.read(), maxdepth=maxdepth)
+
+def iterreadsnbtfromstream(stream: Union[BufferedIOBase, TextIOBase], *,
+                           chunksize: int=READ_CHUNK_SIZE,
+                           maxdepth: int=MAX_DEPTH) -> Iterator[NBTTag] :
+    """
+    Incrementally parse whitespace-separated SNBT values from stream.
+
+    The stream is read in chunksize blocks, and every value is yielded as
+    soon as its last character has been read. Bracket nesting and quoting
+    are tracked across blocks, so each value is tokenized only once.
+    """
+    DECODER: Final[codecs.IncrementalDecoder] = IncrementalDecoder()
+    buf: str = ""
+    pos: int = 0
+    start: int = -1
+    depth: int = 0
+    eof: bool = False
+    while 1 :
+        while 1 :
+            if start < 0 :
+                FIRST: Optional[Match[str]] = _NON_SPACE.search(buf, pos)
+                if FIRST is None :
+                    buf, pos = "", 0
+                    break
+                start = pos = FIRST.start()
+            end: int = -1
+            if depth == 0 and buf[start] not in "[{\"'" :
+                WORD_END: Optional[Match[str]] = \
+                _SNBT_WORD_END.search(buf, start)
+                if WORD_END is None :
+                    pos = len(buf)
+                else :
+                    end = WORD_END.start()
+            else :
+                for i in _SNBT_STRUCTURE.finditer(buf, pos) :
+                    if i.lastgroup == "partial" :
+                        pos = i.start()
+                        break
+                    if i.lastgroup == "open" :
+                        depth += 1
+                    elif i.lastgroup == "close" :
+                        depth -= 1
+                    if depth <= 0 :
+                        end = i.end()
+                        break
+                else :
+                    pos = len(buf)
+            if end < 0 :
+                break
+            yield loadsnbt(_combinesurrogates(buf[start:end]),
+                           maxdepth=maxdepth)
+            pos, start, depth = end, -1, 0
+        if eof :
+            if start >= 0 :
+                yield loadsnbt(_combinesurrogates(buf[start:]),
+                               maxdepth=maxdepth)
+            return
+        # What was parsed is dropped once per block rather than once per
+        # value.
+        if start > 0 :
+            buf, pos, start = buf[start:], pos - start, 0
+        CHUNK: Union[str, bytes] = stream.read(chunksize)
+        if not CHUNK :
+            eof = True
+        buf += CHUNK if isinstance(CHUNK, str) else \
+               DECODER.decode(CHUNK, not CHUNK)
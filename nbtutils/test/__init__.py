@@ -1,5 +1,17 @@
-__all__ = ["test_nbtpath", "test_nbttag", "test_nbttagio"]
+__all__ = ["test_anvilregion", "test_batch", "test_datacommand",
+           "test_mutf8", "test_nbtasync", "test_nbtcompression",
+           "test_nbtdedup", "test_nbtevent", "test_nbtpath",
+           "test_nbtschema", "test_nbttag", "test_nbttagio"]
 
+from . import test_anvilregion
+from . import test_batch
+from . import test_datacommand
+from . import test_mutf8
+from . import test_nbtasync
+from . import test_nbtcompression
+from . import test_nbtdedup
+from . import test_nbtevent
 from . import test_nbtpath
+from . import test_nbtschema
 from . import test_nbttag
 from . import test_nbttagio
\ No newline at end of file
@@ -1,9 +1,14 @@
 from types import ModuleType
 from typing import Final, Tuple
 import unittest
-from . import test_nbtpath, test_nbttag, test_nbttagio
+from . import test_anvilregion, test_batch, test_datacommand, \
+              test_mutf8, test_nbtasync, test_nbtcompression, \
+              test_nbtdedup, test_nbtevent, test_nbtpath, test_nbtschema, \
+              test_nbttag, test_nbttagio
 
 MODS: Final[Tuple[ModuleType, ...]] = (
-    test_nbtpath, test_nbttag, test_nbttagio
+    test_anvilregion, test_batch, test_datacommand, test_mutf8,
+    test_nbtasync, test_nbtcompression, test_nbtdedup, test_nbtevent,
+    test_nbtpath, test_nbtschema, test_nbttag, test_nbttagio
 )
 [unittest.main(module=i, exit=False) for i in MODS]
\ No newline at end of file
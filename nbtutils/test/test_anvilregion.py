@@ -0,0 +1,69 @@
+__all__ = ["Test"]
+
+import os
+import struct
+import tempfile
+from typing import Final, List
+import unittest
+import zlib
+
+from ..anvilregion import AnvilRegion
+from ..nbttag import NBTCompound, NBTInt, NBTTag
+from ..nbttagio import dumps
+
+def chunk(x: int, z: int) -> NBTTag :
+    return NBTTag(NBTCompound({"xPos": NBTTag(NBTInt(x)),
+                               "zPos": NBTTag(NBTInt(z))}))
+
+class Test(unittest.TestCase) :
+    def setUp(self) :
+        self.dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.dir.name, "r.1.-1.mca")
+        OFFSETS: Final[List[int]] = [0] * 1024
+        TIMESTAMPS: Final[List[int]] = [0] * 1024
+        SECTORS: Final[List[bytes]] = []
+        for x, z, t in ((0, 0, 100), (5, 31, 200), (2, 3, 300)) :
+            DATA: bytes = zlib.compress(dumps(chunk(x, z), ""))
+            if t == 300 :
+                with open(os.path.join(self.dir.name, "c.34.-29.mcc"),
+                          "wb") as f :
+                    f.write(DATA)
+                BODY: bytes = struct.pack(">iB", 1, 130)
+            else :
+                BODY = struct.pack(">iB", len(DATA) + 1, 2) + DATA
+            BODY += b"\0" * (-len(BODY) % 4096)
+            OFFSETS[x + z * 32] = (2 + sum(len(i) for i in SECTORS) // 4096) \
+                                  << 8 | len(BODY) // 4096
+            TIMESTAMPS[x + z * 32] = t
+            SECTORS.append(BODY)
+        with open(self.path, "wb") as f :
+            f.write(struct.pack(">1024I", *OFFSETS))
+            f.write(struct.pack(">1024I", *TIMESTAMPS))
+            f.write(b"".join(SECTORS))
+
+    def tearDown(self) :
+        self.dir.cleanup()
+
+    def test_read(self) :
+        with AnvilRegion(self.path) as region :
+            self.assertEqual(len(region), 3)
+            self.assertEqual(list(region), [(0, 0), (2, 3), (5, 31)])
+            self.assertEqual(list(region.iterchunks(150)), [(2, 3), (5, 31)])
+            self.assertEqual(region.timestamp(37, -1), 200)
+            self.assertIn((5, 31), region)
+            self.assertNotIn((1, 1), region)
+            self.assertIsNone(region.readchunk(1, 1))
+            self.assertEqual(region.readchunk(5, 31), chunk(5, 31))
+            self.assertEqual(region.readchunk(2, 3), chunk(2, 3))
+            COMPRESSION, DATA = region.readrawchunk(0, 0) or (0, b"")
+            self.assertEqual(COMPRESSION, 2)
+            self.assertEqual(zlib.decompress(DATA), dumps(chunk(0, 0), ""))
+
+    def test_empty(self) :
+        open(self.path, "wb").close()
+        with AnvilRegion(self.path) as region :
+            self.assertEqual(len(region), 0)
+            self.assertIsNone(region.readchunk(0, 0))
+
+if __name__ == "__main__" :
+    unittest.main()
@@ -0,0 +1,62 @@
+__all__ = ["Test"]
+
+import gzip
+import os
+import tempfile
+from typing import Final, List, Tuple
+import unittest
+
+from ..batch import processfiles
+from ..nbtcompression import Compression, writecompressedtostream
+from ..nbtpath import NBTPath
+from ..nbttag import NBTCompound, NBTInt, NBTTag
+
+def sample(n: int) -> NBTTag :
+    return NBTTag(NBTCompound({"Data": NBTTag(NBTCompound({
+        "n": NBTTag(NBTInt(n))
+    }))}))
+
+class Test(unittest.TestCase) :
+    def setUp(self) :
+        self.dir: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.files: List[str] = []
+        for i in range(5) :
+            self.files.append(os.path.join(self.dir.name, f"{i}.dat"))
+            with open(self.files[-1], "wb") as f :
+                writecompressedtostream(sample(i), f)
+        self.files.append(os.path.join(self.dir.name, "missing.dat"))
+
+    def tearDown(self) :
+        self.dir.cleanup()
+
+    def test_serial(self) :
+        PROGRESS: Final[List[Tuple[int, int]]] = []
+        RESULTS = list(processfiles(self.files, "query",
+                                    NBTPath(("Data", "n")), workers=0,
+                                    chunksize=4,
+                                    progress=lambda *x: PROGRESS.append(x)))
+        self.assertEqual([i.result for i in RESULTS], [0, 1, 2, 3, 4, 0])
+        self.assertEqual(RESULTS[3].tag(), NBTTag(NBTInt(3)))
+        self.assertIsNotNone(RESULTS[-1].error)
+        self.assertEqual(PROGRESS, [(4, 6), (6, 6)])
+        self.assertEqual(next(processfiles(self.files[:1], workers=0)).tag(),
+                         sample(0))
+        REENCODED = next(processfiles(self.files[:1], "reencode",
+                                      compression=Compression.NONE,
+                                      workers=0))
+        self.assertIsNone(REENCODED.tag())
+        self.assertEqual(REENCODED.data[:3], b"\x0a\0\0")
+
+    def test_pool(self) :
+        RESULTS = list(processfiles(self.files[:5], "decode", workers=2,
+                                    ordered=False))
+        self.assertEqual(sorted(RESULTS), sorted(processfiles(self.files[:5],
+                                                              workers=2)))
+        self.assertEqual([i.tag() for i in sorted(RESULTS)],
+                         [sample(i) for i in range(5)])
+        with open(self.files[0], "rb") as f :
+            self.assertEqual(gzip.decompress(f.read())[:3], b"\x0a\0\0")
+        self.assertRaises(ValueError, next, processfiles(self.files, "x"))
+
+if __name__ == "__main__" :
+    unittest.main()
@@ -0,0 +1,118 @@
+__all__ = ["Test"]
+
+from typing import Final, List, Optional, cast
+import unittest
+
+from ..datacommand import data
+from ..nbtpath import NBTPath
+from ..nbttag import NBTByte, NBTCompound, NBTInt, NBTIntArray, NBTList, \
+                     NBTString, NBTTag, freeze
+
+SAMPLE: Final[NBTTag] = NBTTag(NBTCompound({
+    "Foo": NBTTag(NBTList([NBTTag(NBTCompound({
+        "bar": NBTTag(NBTIntArray((5, 6)))
+    }))])),
+    "name": NBTTag(NBTString("four"))
+}))
+
+class Test(unittest.TestCase) :
+    def test_get(self) :
+        self.assertEqual(data.get(SAMPLE, NBTPath(("Foo", 0, "bar", -1))).tag,
+                         NBTTag(NBTInt(6)))
+        self.assertEqual(data.get(SAMPLE, NBTPath(("name",))).result, 4)
+        self.assertEqual(data.get(SAMPLE, NBTPath(("Foo",)), 2.5).result, 2)
+        self.assertEqual(data.get(SAMPLE, NBTPath()).tag, SAMPLE)
+        self.assertFalse(data.get(SAMPLE, NBTPath(("Foo", 1))).success)
+        self.assertFalse(data.get(SAMPLE,
+                                  NBTPath(("Foo", 0, "bar", 0, 0))).success)
+        self.assertFalse(data.get(SAMPLE, NBTPath(("name", "x"))).success)
+        self.assertEqual(data.get(freeze(SAMPLE),
+                                  NBTPath(("Foo", -1, "bar", 1))).result, 6)
+
+    def test_getmany(self) :
+        PATHS: Final[List[NBTPath]] = [NBTPath.parse(i) for i in (
+            "Foo[0].bar[1]", "name", "Foo[0].bar[2]", "Foo[0]", "name", "{}",
+            "Foo[0].bar[0].x"
+        )]
+        TAGS: Final[List[NBTTag]] = [SAMPLE, NBTTag(NBTCompound()),
+                                     NBTTag(NBTInt(3))]
+        COLUMNS: Final[List[List[Optional[NBTTag]]]] = \
+        data.getmany(iter(TAGS), PATHS)
+        self.assertEqual(COLUMNS, [[data.get(j, i).tag for j in TAGS] \
+                                   for i in PATHS])
+        self.assertEqual(COLUMNS[0], [NBTTag(NBTInt(6)), None, None])
+        self.assertEqual(data.getmany(TAGS, PATHS, 2, results=True),
+                         [[data.get(j, i, 2) for j in TAGS] for i in PATHS])
+
+    def test_merge(self) :
+        RESULT: Final[NBTTag] = cast(NBTTag, data.merge(SAMPLE, NBTTag(
+            NBTCompound({"name": NBTTag(NBTByte(1))})
+        )).tag)
+        self.assertEqual(data.get(RESULT, NBTPath(("name",))).tag,
+                         NBTTag(NBTByte(1)))
+        self.assertEqual(data.get(SAMPLE, NBTPath(("name",))).result, 4)
+
+    def test_modify(self) :
+        COPY: Final[NBTTag] = cast(NBTTag, data.modify(
+            SAMPLE, NBTPath.parse("Foo[0].bar"), "append", NBTTag(NBTInt(7)),
+            inplace=False
+        ).tag)
+        self.assertEqual(data.get(COPY, NBTPath.parse("Foo[0].bar[-1]")).tag,
+                         NBTTag(NBTInt(7)))
+        self.assertFalse(data.get(SAMPLE,
+                                  NBTPath.parse("Foo[0].bar[3]")).success)
+        self.assertIs(cast(NBTCompound, COPY.view)["name"],
+                      cast(NBTCompound, SAMPLE.view)["name"])
+        TAG: Final[NBTTag] = NBTTag(NBTCompound({
+            "list": NBTTag(NBTList([NBTTag(NBTInt(1))])),
+            "array": NBTTag(NBTIntArray([1, 2]))
+        }))
+        self.assertTrue(data.modify(TAG, NBTPath.parse("list"), "insert", 0,
+                                    NBTTag(NBTInt(0))).success)
+        self.assertTrue(data.modify(TAG, NBTPath.parse("array"), "insert",
+                                    -1, NBTTag(NBTByte(3))).success)
+        self.assertTrue(data.modify(TAG, NBTPath.parse("a.b"), "set",
+                                    NBTTag(NBTInt(2))).success)
+        self.assertFalse(data.modify(TAG, NBTPath.parse("a.b"), "set",
+                                     NBTTag(NBTInt(2))).success)
+        self.assertFalse(data.modify(TAG, NBTPath.parse("x.y[0].z"), "set",
+                                     NBTTag(NBTInt(2))).success)
+        self.assertNotIn("x", cast(NBTCompound, TAG.view))
+        self.assertTrue(data.modify(TAG, NBTPath.parse("array[0]"),
+                                    "remove").success)
+        self.assertFalse(data.modify(TAG, NBTPath.parse("list"), "insert",
+                                     5, NBTTag(NBTInt(0))).success)
+        self.assertTrue(data.modify(TAG, NBTPath(), "merge", NBTTag(
+            NBTCompound({"a": NBTTag(NBTCompound({"c": NBTTag(NBTInt(4))}))})
+        )).success)
+        self.assertEqual(str(TAG),
+                         "{list:[0,1],array:[I;2,3],a:{b:2,c:4}}")
+        self.assertRaises(ValueError, data.modify, TAG, NBTPath(), "clear",
+                          NBTTag(NBTInt(0)))
+
+    def test_modify_frozen(self) :
+        FROZEN: Final[NBTTag] = freeze(SAMPLE)
+        for i in (True, False) :
+            self.assertRaises(ValueError, data.modify, FROZEN,
+                              NBTPath.parse("Foo"), "append",
+                              NBTTag(NBTCompound()), inplace=i)
+            self.assertRaises(ValueError, data.modify, FROZEN,
+                              NBTPath.parse("Foo"), "insert", 0,
+                              NBTTag(NBTCompound()), inplace=i)
+            self.assertRaises(ValueError, data.modify, FROZEN,
+                              NBTPath.parse("name"), "set",
+                              NBTTag(NBTInt(1)), inplace=i)
+            self.assertRaises(ValueError, data.modify, FROZEN,
+                              NBTPath.parse("Foo[0]"), "remove", inplace=i)
+        TAG: Final[NBTTag] = NBTTag(NBTCompound({"a": FROZEN}))
+        self.assertRaises(ValueError, data.modify, TAG, NBTPath(), "merge",
+                          NBTTag(NBTCompound({"a": NBTTag(NBTCompound({
+                              "name": NBTTag(NBTInt(1))
+                          }))})))
+        self.assertTrue(data.modify(TAG, NBTPath(), "merge", NBTTag(
+            NBTCompound({"b": FROZEN})
+        )).success)
+        self.assertEqual(FROZEN, SAMPLE)
+
+if __name__ == "__main__" :
+    unittest.main()
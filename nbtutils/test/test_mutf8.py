@@ -0,0 +1,50 @@
+__all__ = ["Test"]
+
+import codecs
+from typing import Final
+import unittest
+
+from ..mutf8 import IncrementalDecoder, decode, encode, register
+from ..nbttag import NBTCompound, NBTString, NBTTag
+from ..nbttagio import dumps, loads
+
+TEXT: Final[str] = "a\0\xe9中\U0001f600"
+DATA: Final[bytes] = b"a\xc0\x80\xc3\xa9\xe4\xb8\xad\xed\xa0\xbd\xed\xb8\x80"
+
+class Test(unittest.TestCase) :
+    def test_encode(self) :
+        self.assertEqual(encode(TEXT), DATA)
+        self.assertEqual(encode("ascii\0"), b"ascii\xc0\x80")
+        self.assertEqual(encode("\ud83d"), b"\xed\xa0\xbd")
+
+    def test_decode(self) :
+        self.assertEqual(decode(DATA), TEXT)
+        self.assertEqual(decode(TEXT.encode()), TEXT)
+        self.assertEqual(decode(memoryview(b"ascii")), "ascii")
+        with self.assertRaises(UnicodeDecodeError) :
+            decode(b"\xff")
+
+    def test_incremental(self) :
+        for SIZE in range(1, len(DATA) + 1) :
+            DECODER: IncrementalDecoder = IncrementalDecoder()
+            self.assertEqual("".join(
+                DECODER.decode(DATA[i:i + SIZE])
+                for i in range(0, len(DATA), SIZE)
+            ) + DECODER.decode(b"", True), TEXT)
+
+    def test_register(self) :
+        register()
+        register()
+        self.assertEqual(TEXT.encode("mutf-8"), DATA)
+        self.assertEqual(DATA.decode("java-modified-utf-8"), TEXT)
+        self.assertEqual(codecs.lookup("mutf8").name, "mutf-8")
+        for i in ("mutf-8", "mutf_8", "java-modified-utf-8",
+                  "java_modified_utf_8") :
+            self.assertEqual(codecs.lookup(i).name, "mutf-8")
+
+    def test_nbt(self) :
+        TAG: Final[NBTTag] = NBTTag(NBTCompound({
+            TEXT: NBTTag(NBTString(TEXT))
+        }))
+        self.assertIn(b"\x00\x0e" + DATA, dumps(TAG, ""))
+        self.assertEqual(loads(dumps(TAG, "")), TAG)
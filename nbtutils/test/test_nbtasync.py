@@ -0,0 +1,57 @@
+__all__ = ["Test"]
+
+import asyncio
+import socket
+from typing import Final, List
+import unittest
+
+from ..nbtasync import readfromasyncstream, writetoasyncstream
+from ..nbttag import NBTCompound, NBTInt, NBTList, NBTLongArray, NBTString, \
+                     NBTTag, NBTTagType
+from ..nbttagio import dumps
+
+SAMPLE: Final[NBTTag] = NBTTag(NBTCompound({
+    "text": NBTTag(NBTString("hello")),
+    "extra": NBTTag(NBTList([NBTTag(NBTCompound({
+        "color": NBTTag(NBTInt(3))
+    }))] * 3)),
+    "data": NBTTag(NBTLongArray(range(1000)))
+}))
+
+class Test(unittest.TestCase) :
+    def test_read(self) :
+        async def READ() -> List[NBTTag] :
+            READER: asyncio.StreamReader = asyncio.StreamReader()
+            READER.feed_data(dumps(SAMPLE, "root"))
+            READER.feed_data(b"\x0a" + dumps(SAMPLE))
+            READER.feed_data(dumps(SAMPLE) + b"\x0a")
+            READER.feed_eof()
+            RESULT: List[NBTTag] = [
+                await readfromasyncstream(READER),
+                await readfromasyncstream(READER, named=False),
+                await readfromasyncstream(READER, NBTTagType.TAG_Compound)
+            ]
+            with self.assertRaises(EOFError) :
+                await readfromasyncstream(READER, named=False)
+            return RESULT
+        self.assertEqual(asyncio.run(READ()), [SAMPLE] * 3)
+
+    def test_roundtrip(self) :
+        async def ROUNDTRIP() -> List[NBTTag] :
+            LEFT, RIGHT = socket.socketpair()
+            READER, LEFTWRITER = await asyncio.open_connection(sock=LEFT)
+            _, WRITER = await asyncio.open_connection(sock=RIGHT)
+            await writetoasyncstream(SAMPLE, WRITER, "")
+            await writetoasyncstream(SAMPLE, WRITER, named=False)
+            RESULT: List[NBTTag] = [
+                await readfromasyncstream(READER),
+                await readfromasyncstream(READER, named=False)
+            ]
+            for i in (WRITER, LEFTWRITER) :
+                i.close()
+                await i.wait_closed()
+            return RESULT
+        self.assertEqual(asyncio.run(ROUNDTRIP()), [SAMPLE] * 2)
+
+if __name__ == "__main__" :
+    unittest.main()
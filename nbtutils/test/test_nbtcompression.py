@@ -0,0 +1,48 @@
+__all__ = ["Test"]
+
+import gzip
+from io import BytesIO
+from typing import Final
+import unittest
+import zlib
+
+from ..nbtcompression import Compression, detectcompression, \
+                             readcompressedfromstream, writecompressedtostream
+from ..nbttag import NBTCompound, NBTLongArray, NBTString, NBTTag
+from ..nbttagio import dumps
+
+SAMPLE: Final[NBTTag] = NBTTag(NBTCompound({
+    "Data": NBTTag(NBTCompound({
+        "LevelName": NBTTag(NBTString("world")),
+        "Blocks": NBTTag(NBTLongArray(range(5000)))
+    }))
+}))
+
+class Test(unittest.TestCase) :
+    def test_roundtrip(self) :
+        for i in Compression :
+            STREAM: BytesIO = BytesIO()
+            writecompressedtostream(SAMPLE, STREAM, i, blocksize=100)
+            self.assertEqual(detectcompression(STREAM.getvalue()[:2]), i)
+            STREAM.seek(0)
+            self.assertEqual(readcompressedfromstream(STREAM, blocksize=100),
+                             SAMPLE)
+        STREAM = BytesIO(dumps(SAMPLE, "") + b"tail")
+        self.assertEqual(readcompressedfromstream(STREAM), SAMPLE)
+        self.assertEqual(STREAM.read(), b"tail")
+
+    def test_interop(self) :
+        RAW: Final[bytes] = dumps(SAMPLE, "")
+        self.assertEqual(readcompressedfromstream(gzip.compress(RAW)), SAMPLE)
+        self.assertEqual(readcompressedfromstream(zlib.compress(RAW),
+                                                  Compression.ZLIB), SAMPLE)
+        STREAM: Final[BytesIO] = BytesIO()
+        writecompressedtostream(SAMPLE, STREAM, level=9, backend="auto")
+        self.assertEqual(gzip.decompress(STREAM.getvalue()), RAW)
+        self.assertRaises(EOFError, readcompressedfromstream,
+                          gzip.compress(RAW)[:-20])
+        self.assertRaises(ValueError, writecompressedtostream, SAMPLE,
+                          BytesIO(), backend="lz4")
+
+if __name__ == "__main__" :
+    unittest.main()
@@ -0,0 +1,42 @@
+__all__ = ["Test"]
+
+from typing import List
+import unittest
+
+from ..nbtdedup import NBTDedupIndex
+from ..nbttag import NBTByte, NBTCompound, NBTList, NBTString, NBTTag, \
+                     freeze
+
+def _item(id_: str, count: int) -> NBTTag :
+    return NBTTag(NBTCompound({
+        "id": NBTTag(NBTString(id_)),
+        "Count": NBTTag(NBTByte(count)),
+        "tag": NBTTag(NBTCompound({"Lore": NBTTag(NBTList())}))
+    }))
+
+class Test(unittest.TestCase) :
+    def test_index(self) :
+        ITEMS: List[NBTTag] = [_item("minecraft:stone", i % 3) \
+                               for i in range(9)]
+        INDEX: NBTDedupIndex = NBTDedupIndex(ITEMS[:6])
+        self.assertEqual(len(INDEX), 3)
+        self.assertIs(INDEX.add(ITEMS[6]), ITEMS[0])
+        FROZEN: NBTTag = freeze(ITEMS[7])
+        self.assertIs(INDEX.add(FROZEN), ITEMS[1])
+        self.assertEqual(INDEX.group(ITEMS[1]),
+                         (ITEMS[1], ITEMS[4], FROZEN))
+        self.assertIn(ITEMS[8], INDEX)
+        self.assertNotIn(_item("minecraft:dirt", 0), INDEX)
+        self.assertNotIn(ITEMS[0].view, INDEX)
+        self.assertEqual(INDEX.group(_item("minecraft:dirt", 0)), ())
+        for i in INDEX :
+            self.assertTrue(all(j == i[0] for j in i))
+        self.assertEqual(sorted(len(i) for i in INDEX), [2, 3, 3])
+        DIRT: NBTTag = _item("minecraft:dirt", 0)
+        self.assertIs(INDEX.add(DIRT), DIRT)
+        self.assertEqual(len(INDEX), 4)
+        INDEX.clear()
+        self.assertEqual(len(INDEX), 0)
+
+if __name__ == "__main__" :
+    unittest.main()
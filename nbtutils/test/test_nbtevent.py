@@ -0,0 +1,80 @@
+__all__ = ["Test"]
+
+from io import BytesIO
+from typing import Final, List
+import unittest
+
+from ..nbtevent import NBTEvent, iterreadeventsfromstream, \
+                       writeeventstostream
+from ..nbttag import NBTByte, NBTCompound, NBTInt, NBTIntArray, NBTList, \
+                     NBTString, NBTTag, NBTTagType
+from ..nbttagio import dumps, loads
+
+SAMPLE: Final[NBTTag] = NBTTag(NBTCompound({
+    "Items": NBTTag(NBTList([NBTTag(NBTCompound({
+        "id": NBTTag(NBTString("stone")),
+        "Count": NBTTag(NBTByte(3))
+    }))] * 2)),
+    "Empty": NBTTag(NBTList()),
+    "Pos": NBTTag(NBTIntArray((1, 2, 3)))
+}))
+
+class Test(unittest.TestCase) :
+    def test_read(self) :
+        STREAM: Final[BytesIO] = BytesIO(dumps(SAMPLE, "root") + b"tail")
+        EVENTS: Final[List[NBTEvent]] = list(iterreadeventsfromstream(STREAM))
+        self.assertEqual(STREAM.read(), b"tail")
+        self.assertEqual(EVENTS[:3], [
+            NBTEvent("start_compound", "root", NBTTagType.TAG_Compound),
+            NBTEvent("start_list", "Items", NBTTagType.TAG_Compound, 2),
+            NBTEvent("start_compound", None, NBTTagType.TAG_Compound)
+        ])
+        self.assertEqual(EVENTS[3], NBTEvent("scalar", "id",
+                                             NBTTagType.TAG_String,
+                                             NBTTag(NBTString("stone"))))
+        self.assertEqual([i.kind for i in EVENTS].count("end"), 5)
+        PAYLOAD: Final[bytes] = dumps(SAMPLE)
+        self.assertEqual(list(iterreadeventsfromstream(
+            BytesIO(PAYLOAD), NBTTagType.TAG_Compound
+        ))[1:], EVENTS[1:])
+        for i in (b"\xff", b"\x0d") :
+            self.assertRaises(ValueError, list, iterreadeventsfromstream(
+                BytesIO(b"\x0a\x00\x00\x09\x00\x01x" + i +
+                        b"\x00\x00\x00\x01\x0c\x00\x01y")
+            ))
+
+    def test_write(self) :
+        for i in ("root", None) :
+            OUT: BytesIO = BytesIO()
+            DATA: bytes = dumps(SAMPLE, "") if i is None else \
+                          dumps(SAMPLE, i)
+            writeeventstostream(iterreadeventsfromstream(BytesIO(DATA)),
+                                OUT)
+            self.assertEqual(OUT.getvalue(), DATA)
+        OUT = BytesIO()
+        writeeventstostream((j for j in iterreadeventsfromstream(
+            BytesIO(dumps(SAMPLE, ""))
+        ) if j.name != "Count"), OUT)
+        self.assertEqual(str(loads(OUT.getvalue())),
+                         '{Items:[{id:"stone"},{id:"stone"}],Empty:[],'
+                         'Pos:[I;1,2,3]}')
+        for i in ([NBTEvent("start_compound", "")],
+                  [NBTEvent("start_list", "", NBTTagType.TAG_Int, 1),
+                   NBTEvent("scalar", None, NBTTagType.TAG_Byte,
+                            NBTTag(NBTByte(0))), NBTEvent("end")],
+                  [NBTEvent("scalar", "", NBTTagType.TAG_Int,
+                            NBTTag(NBTInt(0))), NBTEvent("end")],
+                  [NBTEvent("start_compound", ""),
+                   NBTEvent("scalar", "e", NBTTagType.TAG_End,
+                            NBTTag(NBTTagType.TAG_End)),
+                   NBTEvent("scalar", "i", NBTTagType.TAG_Int,
+                            NBTTag(NBTInt(0))), NBTEvent("end")],
+                  [NBTEvent("scalar", "", NBTTagType.TAG_Long,
+                            NBTTag(NBTInt(0)))],
+                  [NBTEvent("start_list", "", None, 0), NBTEvent("end")],
+                  [NBTEvent("start_list", "", NBTTagType.TAG_Int),
+                   NBTEvent("end")]) :
+            self.assertRaises(ValueError, writeeventstostream, i, BytesIO())
+
+if __name__ == "__main__" :
+    unittest.main()
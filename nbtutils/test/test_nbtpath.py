@@ -4,6 +4,7 @@ from typing import Final
 import unittest
 
 from ..nbtpath import NBTPath
+from ..nbttag import NBTCompound, NBTIntArray, NBTInt, NBTList, NBTTag
 
 class Test(unittest.TestCase) :
     def test_new(self) :
@@ -18,5 +19,28 @@ class Test(unittest.TestCase) :
         self.assertEqual(PATH[1:4], NBTPath((1, "bar", -2)))
         self.assertEqual(PATH[::-1], NBTPath(("Baz ", -2, "bar", 1, "Foo")))
 
+    def test_parse(self) :
+        PATH: Final[NBTPath] = NBTPath(("Foo", 1, "bar", -2, "Baz ", "",
+                                        'a"b\\c'))
+        self.assertEqual(NBTPath.parse(str(PATH)), PATH)
+        self.assertIs(NBTPath.parse(str(PATH)), NBTPath.parse(str(PATH)))
+        self.assertEqual(NBTPath.parse("{}"), NBTPath())
+        self.assertEqual(NBTPath.parse("[0].'x y'"), NBTPath((0, "x y")))
+        for i in ("", "a..b", ".a", "a[x]", "a b", "a.") :
+            self.assertRaises(ValueError, NBTPath.parse, i)
+
+    def test_compile(self) :
+        TAG: Final[NBTTag] = NBTTag(NBTCompound({"a": NBTTag(NBTList([
+            NBTTag(NBTIntArray((1, 2)))
+        ]))}))
+        self.assertIs(NBTPath.parse("a[0]").compile(),
+                      NBTPath(("a", 0)).compile())
+        self.assertEqual(NBTPath.parse("a[0][-1]").compile()(TAG),
+                         NBTTag(NBTInt(2)))
+        self.assertIsNone(NBTPath.parse("a[0][2]").compile()(TAG))
+        self.assertIsNone(NBTPath.parse("a[0][0][0]").compile()(TAG))
+        self.assertIsNone(NBTPath.parse("a.b").compile()(TAG))
+        self.assertEqual(NBTPath().compile()(TAG), TAG)
+
 if __name__ == "__main__" :
     unittest.main()
\ No newline at end of file
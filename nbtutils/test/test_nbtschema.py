@@ -0,0 +1,103 @@
+__all__ = ["Test"]
+
+from io import BufferedReader, BytesIO
+from typing import Final
+import unittest
+
+from ..nbtschema import NBTListSchema, NBTSchema
+from ..nbttag import NBTByte, NBTCompound, NBTDouble, NBTFloat, NBTInt, \
+                     NBTIntArray, NBTList, NBTShort, NBTString, NBTTag, \
+                     NBTTagType
+from ..nbttagio import dumps
+
+ITEM: Final[NBTSchema] = NBTSchema({
+    "Slot": NBTTagType.TAG_Byte,
+    "id": NBTTagType.TAG_String,
+    "Count": NBTTagType.TAG_Byte
+})
+ENTITY: Final[NBTSchema] = NBTSchema({
+    "id": NBTTagType.TAG_String,
+    "Pos": NBTListSchema(NBTTagType.TAG_Double),
+    "Health": NBTTagType.TAG_Float,
+    "Air": NBTTagType.TAG_Short,
+    "UUID": NBTTagType.TAG_Int_Array,
+    "Items": NBTListSchema(ITEM),
+    "Tags": NBTTagType.TAG_List
+})
+
+def _entity(**kwargs: NBTTag) -> NBTTag :
+    return NBTTag(NBTCompound({
+        "id": NBTTag(NBTString("minecraft:zombie")),
+        "Pos": NBTTag(NBTList([NBTTag(NBTDouble(i / 3)) for i in range(3)])),
+        "Health": NBTTag(NBTFloat(20)),
+        "Air": NBTTag(NBTShort(300)),
+        "UUID": NBTTag(NBTIntArray((1, 2, 3, 4))),
+        "Items": NBTTag(NBTList([NBTTag(NBTCompound({
+            "Slot": NBTTag(NBTByte(i)),
+            "id": NBTTag(NBTString("minecraft:stone")),
+            "Count": NBTTag(NBTByte(64))
+        })) for i in range(3)])),
+        "Tags": NBTTag(NBTList()),
+        **kwargs
+    }))
+
+class _Unseekable(BytesIO) :
+    def seekable(self) -> bool :
+        return False
+
+class Test(unittest.TestCase) :
+    def test_match(self) :
+        TAG: Final[NBTTag] = _entity()
+        DATA: Final[bytes] = dumps(TAG, "entity")
+        self.assertEqual(ENTITY.dumps(TAG, "entity"), DATA)
+        self.assertEqual(ENTITY.dumps(TAG), dumps(TAG))
+        self.assertEqual(ENTITY.loads(DATA), TAG)
+        self.assertEqual(ENTITY.loads(dumps(TAG), NBTTagType.TAG_Compound),
+                         TAG)
+        LIST: Final[NBTTag] = NBTTag(NBTList([TAG] * 3))
+        self.assertEqual(NBTListSchema(ENTITY).loads(dumps(LIST, "")), LIST)
+
+    def test_mismatch(self) :
+        for TAG in (
+            _entity(extra=NBTTag(NBTInt(1))),
+            _entity(Health=NBTTag(NBTDouble(20))),
+            _entity(Pos=NBTTag(NBTList([NBTTag(NBTInt(1))]))),
+            _entity(Items=NBTTag(NBTList([NBTTag(NBTCompound())]))),
+            NBTTag(NBTCompound({"id": NBTTag(NBTString("minecraft:pig"))})),
+            NBTTag(NBTInt(5))
+        ) :
+            DATA: bytes = dumps(TAG, "")
+            self.assertEqual(ENTITY.dumps(TAG, ""), DATA)
+            self.assertEqual(ENTITY.loads(DATA), TAG)
+        # Compounds are written in the order of the schema.
+        TAG = _entity()
+        REVERSED: Final[NBTTag] = NBTTag(NBTCompound(
+            reversed(list(TAG.view.items()))
+        ))
+        self.assertEqual(ENTITY.dumps(REVERSED), dumps(TAG))
+        self.assertEqual(ENTITY.loads(dumps(REVERSED, "")), TAG)
+
+    def test_stream(self) :
+        for TAG in (_entity(), _entity(extra=NBTTag(NBTInt(1)))) :
+            for STREAM in (BytesIO(), _Unseekable()) :
+                ENTITY.writetostream(TAG, STREAM, "")
+                STREAM.write(b"tail")
+                STREAM.seek(0)
+                self.assertEqual(ENTITY.readfromstream(STREAM), TAG)
+                self.assertEqual(STREAM.read(), b"tail")
+            PIPE: BufferedReader = BufferedReader(_Unseekable(
+                ENTITY.dumps(TAG, "") + b"tail"
+            ), 16)
+            self.assertEqual(ENTITY.readfromstream(PIPE), TAG)
+            self.assertEqual(PIPE.read(), b"tail")
+
+    def test_error(self) :
+        DATA: Final[bytes] = dumps(_entity(), "")
+        with self.assertRaises(EOFError) :
+            ENTITY.loads(DATA[:-1])
+        with self.assertRaises(ValueError) :
+            ENTITY.loads(DATA, maxdepth=2)
+        with self.assertRaises(ValueError) :
+            ENTITY.dumps(_entity(), maxdepth=2)
+        with self.assertRaises(ValueError) :
+            NBTSchema({"a": NBTTagType.TAG_End})
@@ -1,8 +1,14 @@
 __all__ = ["Test"]
 
+import importlib.util
+from typing import List
 import unittest
 
-from ..nbttag import NBTByte, NBTByteArray, NBTFloat, NBTShort, NBTInt, NBTLong
+from ..nbttag import NBTByte, NBTByteArray, NBTCompound, NBTDouble, \
+                     NBTFloat, NBTShort, NBTInt, NBTIntArray, NBTList, \
+                     NBTLong, NBTLongArray, NBTPersistentCompound, \
+                     NBTPersistentList, NBTString, NBTTag, NBTTagType, \
+                     digest, freeze, thaw
 
 class Test(unittest.TestCase) :
     def test_new(self) :
@@ -14,5 +20,183 @@ class Test(unittest.TestCase) :
     def test_slice(self) :
         pass
 
+    def test_array(self) :
+        LONGS: NBTLongArray = NBTLongArray(x for x in (1, 2**64 - 1))
+        self.assertEqual(LONGS, [1, -1])
+        self.assertEqual(str(LONGS), "[L;1L,-1L]")
+        self.assertEqual(LONGS.tobuffer(), b"\0"*7 + b"\1" + b"\xff"*8)
+        self.assertEqual(NBTLongArray.frombuffer(LONGS.tobuffer()), LONGS)
+        self.assertEqual(NBTIntArray(b"\1\2"), [1, 2])
+        self.assertEqual(NBTByteArray(b"\xff"), [-1])
+        self.assertEqual(str(NBTTag(NBTByteArray((1, 2)))), "[B;1b,2b]")
+        LONGS.extend((3, 4))
+        LONGS[0:2] = (5, 6)
+        self.assertEqual(LONGS, [5, 6, 3, 4])
+        self.assertRaises(ValueError, LONGS.append, 2**63)
+        self.assertRaises(ValueError, LONGS.extend, (1, 2.5))
+        self.assertRaises(ValueError, NBTIntArray, ("1",))
+        self.assertRaises(ValueError, NBTByteArray, (300, 1.5))
+        self.assertEqual(NBTByteArray((300, True)), [44, 1])
+        self.assertEqual(LONGS, [5, 6, 3, 4])
+        self.assertIs(type(LONGS[1]), NBTLong)
+        self.assertEqual(NBTTag(LONGS[-1]), NBTTag(NBTLong(4)))
+        self.assertEqual([type(i) for i in NBTByteArray((1, 2))],
+                         [NBTByte, NBTByte])
+
+    @unittest.skipIf(importlib.util.find_spec("numpy") is None,
+                     "numpy is not installed")
+    def test_numpy(self) :
+        import numpy
+        INTS: NBTIntArray = NBTIntArray((1, -2, 3))
+        VIEW = INTS.tonumpy()
+        VIEW[0] = 7
+        self.assertEqual(INTS, [7, -2, 3])
+        self.assertEqual(INTS.tonumpy(True).dtype, numpy.dtype(">i4"))
+        self.assertEqual(NBTLongArray.fromnumpy(numpy.array([1, 2**40],
+                                                            ">i8")),
+                         [1, 2**40])
+        self.assertEqual(NBTTag(numpy.array([1, -1], "i1")).value,
+                         NBTByteArray((1, -1)))
+        self.assertRaises(ValueError, NBTIntArray.fromnumpy,
+                          numpy.zeros(2, "f4"))
+
+    def test_view(self) :
+        TAG: NBTTag = NBTTag(NBTCompound({"a": NBTTag(NBTByte(1))}))
+        self.assertIsNot(TAG.value, TAG.view)
+        self.assertIs(TAG.view, TAG.view)
+        TAG.view["b"] = NBTTag(NBTByte(2))
+        self.assertEqual(TAG.value, {"a": NBTTag(NBTByte(1)),
+                                     "b": NBTTag(NBTByte(2))})
+
+    def test_construct(self) :
+        class Subclass(NBTInt) :
+            pass
+        COMPOUND: NBTCompound = NBTCompound()
+        STRING: NBTString = NBTString("s")
+        self.assertIsNot(NBTTag(COMPOUND).view, COMPOUND)
+        self.assertIs(NBTTag(STRING).view, STRING)
+        self.assertEqual(NBTTag(Subclass(3)).type, NBTTagType.TAG_Int)
+        self.assertIs(type(NBTTag(Subclass(3)).view), Subclass)
+        self.assertIs(NBTTag._make(NBTTagType.TAG_Compound, COMPOUND).view,
+                      COMPOUND)
+        self.assertRaises(ValueError, NBTTag, 3)
+
+    def test_bulk(self) :
+        LIST: NBTList = NBTList(NBTTag(NBTInt(i)) for i in range(3))
+        self.assertEqual(LIST, [NBTTag(NBTInt(i)) for i in range(3)])
+        self.assertRaises(ValueError, NBTList,
+                          (i for i in (NBTTag(NBTInt(0)), NBTTag(NBTByte(0)))))
+        LIST.extend(NBTTag(NBTInt(i)) for i in range(2))
+        self.assertEqual(len(LIST), 5)
+        self.assertRaises(ValueError, LIST.extend,
+                          iter((NBTTag(NBTInt(0)), NBTTag(NBTByte(0)))))
+        self.assertEqual(len(LIST), 5)
+        self.assertIsInstance(NBTList._make(LIST), NBTList)
+        self.assertEqual(NBTCompound._make({"a": LIST[0]}), {"a": LIST[0]})
+        self.assertRaises(ValueError, NBTCompound, {"a": 1})
+
+    def test_persistent(self) :
+        ITEMS: List[NBTTag] = [NBTTag(NBTInt(i)) for i in range(1100)]
+        lst: NBTPersistentList = NBTPersistentList(ITEMS[:40])
+        for i in ITEMS[40:] :
+            lst = lst.appended(i)
+        OLD: NBTPersistentList = lst
+        lst = lst.set(500, NBTTag(NBTInt(-1))).popped()
+        self.assertEqual(OLD, ITEMS)
+        self.assertEqual(len(lst), 1099)
+        self.assertEqual(lst[500], NBTTag(NBTInt(-1)))
+        self.assertEqual(lst[-1], ITEMS[-2])
+        self.assertRaises(ValueError, lst.appended, NBTTag(NBTByte(0)))
+        self.assertEqual(NBTList(lst)[:500], ITEMS[:500])
+        compound: NBTPersistentCompound = NBTPersistentCompound()
+        for i in range(1000) :
+            compound = compound.set(str(i), ITEMS[i])
+        SNAPSHOT: NBTPersistentCompound = compound
+        compound = compound.delete("7").set("8", ITEMS[0])
+        self.assertEqual(len(SNAPSHOT), 1000)
+        self.assertEqual(SNAPSHOT["7"], ITEMS[7])
+        self.assertNotIn("7", compound)
+        self.assertEqual(compound["8"], ITEMS[0])
+        self.assertEqual(NBTCompound(SNAPSHOT),
+                         {str(i): ITEMS[i] for i in range(1000)})
+        self.assertRaises(KeyError, compound.delete, "7")
+        self.assertEqual(list(compound)[:9],
+                         ["0", "1", "2", "3", "4", "5", "6", "8", "9"])
+        for i in range(10, 1000) :
+            compound = compound.delete(str(i))
+        self.assertEqual(list(compound.set("7", ITEMS[7]).set("0", ITEMS[1])),
+                         ["0", "1", "2", "3", "4", "5", "6", "8", "9", "7"])
+        self.assertLess(len(compound._order), 100)
+        TAG: NBTTag = NBTTag(NBTCompound({
+            "a": NBTTag(NBTList(ITEMS[:3])),
+            "b": NBTTag(NBTCompound({"c": ITEMS[3]}))
+        }))
+        FROZEN: NBTTag = freeze(TAG)
+        self.assertIsInstance(FROZEN.view, NBTPersistentCompound)
+        self.assertIs(NBTTag(FROZEN.view).view, FROZEN.view)
+        self.assertEqual(FROZEN, TAG)
+        self.assertEqual(str(FROZEN.view["b"]),
+                         "{c:3}")
+        self.assertIsInstance(thaw(FROZEN).view["a"].view, NBTList)
+        self.assertEqual(thaw(FROZEN), TAG)
+        ARRAY: NBTTag = NBTTag(NBTCompound({"d": NBTTag(NBTIntArray((1,)))}))
+        FROZEN = freeze(ARRAY)
+        DIGEST: bytes = digest(FROZEN)
+        ARRAY.view["d"].view[0] = 2
+        self.assertEqual(FROZEN.view["d"], NBTTag(NBTIntArray((1,))))
+        self.assertEqual(digest(FROZEN), DIGEST)
+
+    def test_depth(self) :
+        deep: NBTTag = NBTTag(NBTCompound())
+        for i in range(5000) :
+            deep = NBTTag(NBTList([deep])) if i % 2 else \
+                   NBTTag(NBTCompound({"x": deep}))
+        FROZEN: NBTTag = freeze(deep)
+        THAWED: NBTTag = thaw(FROZEN)
+        self.assertEqual(digest(FROZEN), digest(deep))
+        self.assertEqual(digest(THAWED), digest(deep))
+        for i in range(5000) :
+            self.assertIsInstance(FROZEN.view, (NBTPersistentList,
+                                                NBTPersistentCompound))
+            self.assertIsInstance(THAWED.view, (NBTList, NBTCompound))
+            FROZEN, THAWED = (j.view["x"] if i % 2 else j.view[0] \
+                              for j in (FROZEN, THAWED))
+        self.assertEqual(THAWED, NBTTag(NBTCompound()))
+
+    def test_digest(self) :
+        TAG: NBTTag = NBTTag(NBTCompound({
+            "a": NBTTag(NBTList([NBTTag(NBTDouble(-0.)),
+                                 NBTTag(NBTDouble(1.5))])),
+            "b": NBTTag(NBTCompound({"c": NBTTag(NBTString("\ud800"))})),
+            "d": NBTTag(NBTIntArray((1, 2)))
+        }))
+        DIGEST: bytes = digest(TAG)
+        self.assertEqual(len(DIGEST), 16)
+        REVERSED: NBTTag = NBTTag(NBTCompound(reversed(TAG.view.items())))
+        self.assertEqual(digest(REVERSED), DIGEST)
+        FROZEN: NBTTag = freeze(TAG)
+        self.assertEqual(digest(FROZEN), DIGEST)
+        self.assertEqual(FROZEN.view._digest, DIGEST)
+        self.assertEqual(FROZEN.view["a"].view._digest,
+                         digest(TAG.view["a"]))
+        TAG.view["a"].view[0] = NBTTag(NBTDouble(0.))
+        self.assertEqual(digest(TAG), DIGEST)
+        TAG.view["b"].view["c"] = NBTTag(NBTString("d"))
+        self.assertNotEqual(digest(TAG), DIGEST)
+        self.assertNotEqual(digest(NBTTag(NBTInt(1))),
+                            digest(NBTTag(NBTLong(1))))
+        self.assertNotEqual(digest(NBTTag(NBTIntArray((1,)))),
+                            digest(NBTTag(NBTLongArray((1,)))))
+        self.assertNotEqual(digest(NBTTag(NBTList([NBTTag(NBTString("ab"))]))),
+                            digest(NBTTag(NBTList([NBTTag(NBTString("a")),
+                                                   NBTTag(NBTString("b"))]))))
+        OTHER: NBTTag = freeze(TAG)
+        self.assertNotEqual(FROZEN, OTHER)
+        self.assertIsNone(OTHER.view._digest)
+        digest(OTHER)
+        self.assertNotEqual(FROZEN, OTHER)
+        self.assertEqual(NBTTag(FROZEN.view.set("b", OTHER.view["b"])),
+                         OTHER)
+
 if __name__ == "__main__" :
     unittest.main()
\ No newline at end of file
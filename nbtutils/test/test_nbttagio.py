@@ -1,11 +1,34 @@
 __all__ = ["Test"]
 
-from io import BytesIO
-from typing import Final
+from io import BufferedReader, BytesIO
+from typing import Final, List, Optional, cast
 import unittest
 
-from ..nbttag import NBTByte, NBTCompound, NBTList, NBTString, NBTTag
-from ..nbttagio import writesnbttostream
+from ..datacommand import data
+from ..nbtpath import NBTPath
+from ..nbttag import NBTByte, NBTByteArray, NBTCompound, NBTDouble, \
+                     NBTInt, NBTIntArray, NBTList, NBTLong, NBTLongArray, \
+                     NBTShort, NBTString, NBTTag, NBTTagType, freeze
+from ..nbttagio import EncodeCache, InternTable, dumps, dumpsnbt, \
+                       iterreadsnbtfromstream, loadpaths, loads, loadsnbt, \
+                       readfromstream, readpathsfromstream, \
+                       readsnbtfromstream, writesnbttostream, writetostream
+
+SAMPLE: Final[NBTTag] = NBTTag(NBTCompound({
+    "byte": NBTTag(NBTByte(-5)),
+    "long": NBTTag(NBTLong(-0x123456789)),
+    "double": NBTTag(NBTDouble(0.5)),
+    "str\0ing": NBTTag(NBTString("héllo \U0001f600")),
+    "bytes": NBTTag(NBTByteArray((1, -2, 3))),
+    "ints": NBTTag(NBTIntArray((1, -0x80000000))),
+    "longs": NBTTag(NBTLongArray((0x7fffffffffffffff, -1))),
+    "list": NBTTag(NBTList([NBTTag(NBTList()), NBTTag(NBTList())])),
+    "nested": NBTTag(NBTCompound({"x": NBTTag(NBTCompound())}))
+}))
+
+class _Pipe(BytesIO) :
+    def seekable(self) -> bool :
+        return False
 
 class Test(unittest.TestCase) :
     def test(self) :
@@ -18,6 +41,197 @@ class Test(unittest.TestCase) :
         STREAM.seek(0)
         self.assertEqual(STREAM.read(),
                          b'{foo:1b,"bar!!!":"baz","":["E","M","P","T","Y"]}')
+        TAG: Final[NBTTag] = NBTTag(NBTCompound({
+            "a": NBTTag(NBTList([NBTTag(NBTString('"\\\ud800'))])),
+            "b": NBTTag(NBTCompound()),
+            "c": NBTTag(NBTLongArray(range(5000)))
+        }))
+        self.assertEqual(dumpsnbt(TAG, indent=2)[:34],
+                         '{\n  a: [\n    "\\"\\\\\ud800"\n  ],\n  b: {},')
+        STREAM.seek(0)
+        STREAM.truncate()
+        writesnbttostream(TAG, STREAM, flushsize=100)
+        self.assertEqual(STREAM.getvalue(),
+                         dumpsnbt(TAG).encode("utf-8", "surrogatepass"))
+        self.assertEqual(loadsnbt(dumpsnbt(TAG, indent=4)), TAG)
+
+    def test_read(self) :
+        STREAM: Final[BytesIO] = BytesIO()
+        writetostream(SAMPLE, STREAM)
+        PAYLOAD: Final[bytes] = STREAM.getvalue()
+        self.assertEqual(loads(PAYLOAD, NBTTagType.TAG_Compound), SAMPLE)
+        self.assertEqual(loads(memoryview(b"\x0a\x00\x01r" + PAYLOAD)),
+                         SAMPLE)
+        self.assertEqual(loads(b"\x0a" + PAYLOAD, named=False), SAMPLE)
+        STREAM.write(b"tail")
+        STREAM.seek(0)
+        self.assertEqual(readfromstream(STREAM, NBTTagType.TAG_Compound),
+                         SAMPLE)
+        self.assertEqual(STREAM.read(), b"tail")
+        self.assertEqual(dumps(freeze(SAMPLE), ""), dumps(SAMPLE, ""))
+        self.assertEqual(loads(b"\x00\x08\xc0\x80\xed\xa0\xbd\xed\xb8"
+                               b"\x80", NBTTagType.TAG_String).value,
+                         "\0\U0001f600")
+        self.assertRaises(EOFError, loads, PAYLOAD[:-1],
+                          NBTTagType.TAG_Compound)
+        self.assertRaises(ValueError, loads, b"\x0d\x00\x00")
+        for i in (_Pipe, lambda x: BufferedReader(_Pipe(x), 7)) :
+            PIPE: BytesIO = i(PAYLOAD + b"tail")
+            self.assertEqual(readfromstream(PIPE, NBTTagType.TAG_Compound),
+                             SAMPLE)
+            self.assertEqual(PIPE.read(), b"tail")
+            self.assertRaises(EOFError, readfromstream,
+                              i(b"\x0c\x00\x00\x7f\xff\xff\xff\0"))
+
+    def test_snbt(self) :
+        STREAM: Final[BytesIO] = BytesIO()
+        writesnbttostream(SAMPLE, STREAM)
+        STREAM.seek(0)
+        self.assertEqual(readsnbtfromstream(STREAM), SAMPLE)
+        self.assertEqual(loadsnbt("{ a : [I; 1, 2,], 'b\\'c' : [1.5, 2d],"
+                                  " c: 1e3, d: true, e: 300b, f: -3s }"),
+                         NBTTag(NBTCompound({
+                             "a": NBTTag(NBTIntArray((1, 2))),
+                             "b'c": NBTTag(NBTList([NBTTag(NBTDouble(1.5)),
+                                                    NBTTag(NBTDouble(2))])),
+                             "c": NBTTag(NBTString("1e3")),
+                             "d": NBTTag(NBTByte(1)),
+                             "e": NBTTag(NBTString("300b")),
+                             "f": NBTTag(NBTShort(-3))
+                         })))
+        self.assertEqual(list(iterreadsnbtfromstream(BytesIO(
+                             b'1b {"]":[2L]} "x y"\n[B;1b] abc'
+                         ), chunksize=3)),
+                         [NBTTag(NBTByte(1)),
+                          loadsnbt('{"]":[2L]}'),
+                          NBTTag(NBTString("x y")),
+                          NBTTag(NBTByteArray((1,))),
+                          NBTTag(NBTString("abc"))])
+        for i in ("{a:1", "{a 1}", "[1,1b]", "[B;1]", '"\\n"', "1 2", "") :
+            self.assertRaises(ValueError, loadsnbt, i)
+
+    def test_intern(self) :
+        TABLE: Final[InternTable] = InternTable(maxsize=2, maxlength=3)
+        self.assertIs(TABLE.key(b"id"), TABLE.key(b"id"))
+        self.assertIs(TABLE.string(b"abc"), TABLE.string(b"abc"))
+        self.assertIsNot(TABLE.string(b"abcd"), TABLE.string(b"abcd"))
+        self.assertEqual(TABLE.encode("id"), b"\0\2id")
+        TABLE.key(b"\xc3\xa9")
+        TABLE.key(b"a\0")
+        self.assertEqual(TABLE.encode("\xe9"), b"\0\2\xc3\xa9")
+        self.assertEqual(TABLE.encode("a\0"), b"\0\3a\xc0\x80")
+        TABLE.key(b"x")
+        TABLE.key(b"y")
+        self.assertEqual(len(TABLE), 2)
+        TAGS: Final[NBTTag] = loads(dumps(NBTTag(NBTList([
+            NBTTag(NBTCompound({"id": NBTTag(NBTString("stone"))}))
+        ] * 2)), ""))
+        FIRST, SECOND = (cast(NBTCompound, i.view) \
+                         for i in cast(NBTList, TAGS.view))
+        self.assertIs(next(iter(FIRST)), next(iter(SECOND)))
+        self.assertIs(FIRST["id"], SECOND["id"])
+        self.assertEqual(dumps(loads(b"\x0a\x01\x00\x04\xf0\x9f\x98\x80"
+                                     b"\x01\x00", named=False)),
+                         b"\x01\x00\x06\xed\xa0\xbd\xed\xb8\x80\x01\x00")
+
+    def test_depth(self) :
+        deep: NBTTag = NBTTag(NBTCompound())
+        for i in range(5000) :
+            deep = NBTTag(NBTList([deep])) if i % 2 else \
+                   NBTTag(NBTCompound({"x": deep}))
+        PAYLOAD: Final[bytes] = dumps(deep, "", maxdepth=6000)
+        self.assertEqual(dumps(loads(PAYLOAD, maxdepth=6000), "",
+                               maxdepth=6000), PAYLOAD)
+        STREAM: Final[BytesIO] = BytesIO()
+        writesnbttostream(deep, STREAM, maxdepth=6000)
+        self.assertEqual(STREAM.getvalue(), b"[{x:" * 2500 + b"{}" + \
+                                            b"}]" * 2500)
+        self.assertRaises(ValueError, loads, PAYLOAD)
+        self.assertRaises(ValueError, dumps, deep)
+        self.assertRaises(ValueError, writesnbttostream, deep, BytesIO())
+        self.assertRaises(ValueError, loadsnbt, "[" * 600 + "]" * 600)
+        CACHE: Final[EncodeCache] = EncodeCache()
+        self.assertEqual(dumps(deep, "", maxdepth=6000, cache=CACHE), PAYLOAD)
+        innermost: NBTTag = deep
+        while innermost.view :
+            innermost = innermost.view[0] \
+                        if innermost.type == NBTTagType.TAG_List \
+                        else innermost.view["x"]
+        innermost.view["y"] = NBTTag(NBTInt(1))
+        self.assertEqual(dumps(deep, "", maxdepth=6000, cache=CACHE),
+                         dumps(deep, "", maxdepth=6000))
+        self.assertRaises(ValueError, dumps, deep, cache=CACHE)
+
+    def test_paths(self) :
+        PATHS: Final[List[NBTPath]] = [
+            NBTPath(("nested", "x")), NBTPath(("ints", -1)),
+            NBTPath(("list", 1)), NBTPath(("list", -1)),
+            NBTPath(("nested",)), NBTPath(("nested", "x", "y")),
+            NBTPath(("bytes", 3)), NBTPath(("byte", "x")),
+            NBTPath(("list", 0, 0)), NBTPath()
+        ]
+        PAYLOAD: Final[bytes] = dumps(SAMPLE, "")
+        EXPECTED: Final[List[Optional[NBTTag]]] = \
+        [data.get(SAMPLE, i).tag for i in PATHS]
+        self.assertEqual(EXPECTED[1], NBTTag(NBTInt(-0x80000000)))
+        self.assertEqual(loadpaths(PAYLOAD, PATHS), EXPECTED)
+        STREAM: Final[BytesIO] = BytesIO(PAYLOAD + b"tail")
+        self.assertEqual(readpathsfromstream(STREAM, PATHS[:2]),
+                         EXPECTED[:2])
+        self.assertEqual(STREAM.read(), b"tail")
+
+    def test_dumps(self) :
+        STREAM: Final[BytesIO] = BytesIO()
+        self.assertEqual(writetostream(SAMPLE, STREAM, "root"),
+                         len(STREAM.getvalue()))
+        self.assertEqual(STREAM.getvalue(), dumps(SAMPLE, "root"))
+        self.assertEqual(STREAM.getvalue()[:7], b"\x0a\x00\x04root")
+        self.assertEqual(loads(dumps(SAMPLE, "root")), SAMPLE)
+        self.assertEqual(dumps(NBTTag(NBTList())), b"\0"*5)
+        self.assertEqual(dumps(NBTTag(NBTLong(-2))), b"\xff"*7 + b"\xfe")
+
+    def test_cache(self) :
+        CACHE: Final[EncodeCache] = EncodeCache()
+        TAG: Final[NBTTag] = loads(dumps(SAMPLE, ""))
+        VIEW: Final[NBTCompound] = cast(NBTCompound, TAG.view)
+        SHARED: Final[NBTTag] = NBTTag(NBTCompound({"a": NBTTag(NBTInt(1))}))
+        VIEW["shared"] = SHARED
+        VIEW["list"].view.append(NBTTag(NBTList([SHARED])))
+        for MUTATE in (
+            lambda: None,
+            lambda: VIEW.__setitem__("byte", NBTTag(NBTByte(1))),
+            lambda: cast(NBTCompound, SHARED.view).update(
+                b=NBTTag(NBTInt(2))
+            ),
+            lambda: VIEW["nested"].view["x"].view.setdefault(
+                "y", NBTTag(NBTList())
+            ),
+            lambda: VIEW["nested"].view["x"].view["y"].view.append(
+                NBTTag(NBTString("z"))
+            ),
+            lambda: VIEW["list"].view.pop(0),
+            lambda: VIEW["ints"].view.append(7),
+            lambda: VIEW.pop("str\0ing"),
+            lambda: VIEW.__ior__({"ior": NBTTag(NBTInt(3))})
+        ) :
+            MUTATE()
+            self.assertEqual(dumps(TAG, "root", cache=CACHE),
+                             dumps(TAG, "root"))
+        self.assertEqual(dumps(TAG, "root", cache=CACHE),
+                         dumps(TAG, "root"))
+        self.assertTrue(len(CACHE))
+        with self.assertRaises(ValueError) :
+            dumps(TAG, cache=CACHE, maxdepth=3)
+        STREAM: Final[BytesIO] = BytesIO()
+        writetostream(TAG, STREAM, cache=CACHE)
+        self.assertEqual(STREAM.getvalue(), dumps(TAG))
+        SMALL: Final[EncodeCache] = EncodeCache(200)
+        self.assertEqual(dumps(TAG, cache=SMALL), dumps(TAG))
+        self.assertLessEqual(SMALL.size, 200)
+        self.assertEqual(dumps(TAG, cache=EncodeCache(0)), dumps(TAG))
+        CACHE.clear()
+        dumps(NBTTag(NBTCompound()), cache=CACHE)
+        self.assertEqual((len(CACHE), CACHE.size), (0, 0))
 
 if __name__ == "__main__" :
-    unittest.main()
\ No newline at end of file
+    unittest.main()
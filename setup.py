@@ -11,5 +11,7 @@ setup(
     name = "nbtutils",
     version = "0.0.1a1",
     author = "REGE",
-    packages = find_packages()
+    packages = find_packages(),
+    extras_require = {"numpy": ["numpy"], "isal": ["isal"],
+                      "zlib-ng": ["zlib-ng"]}
 )
\ No newline at end of file